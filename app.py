@@ -0,0 +1,108 @@
+
+# HTTP serving app for the kidney disease classifier
+import threading
+from flask import Flask, jsonify, request, render_template
+from flask_cors import CORS
+from PIL import UnidentifiedImageError
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.utils.common_functions import decodeImageToBytes
+from kidney_disease_classifier.config.configuration import configure_process
+from kidney_disease_classifier.pipeline.stage_5_prediction import PredictionPipeline
+
+# app.py is the entry point under gunicorn too: set up logging and the oneDNN/OpenMP
+# environment before the model preload imports TensorFlow
+configure_process()
+
+# Create the Flask app and allow cross-origin requests
+app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = 64 * 1024 * 1024  # Reject request bodies above 64 MB
+CORS(app)
+
+# Set once the model is loaded and warmed up
+model_ready = threading.Event()
+
+
+def _preload_model():
+    # Load the model in the background so the health probe answers while it warms up
+    try:
+        PredictionPipeline.get_engine()
+        model_ready.set()
+        logger.info("Model loaded, server is ready")
+    except Exception as e:
+        logger.exception(f"Failed to load the model: {e}")
+
+
+def _read_images(batch: bool) -> list:
+    """
+    Collect encoded image bytes from a multipart upload or a base64 JSON body.
+
+    Single requests use the "file" form field or {"image": "<base64>"}; batch
+    requests use repeated "files" form fields or {"images": ["<base64>", ...]}.
+    """
+    if request.files:
+        files = request.files.getlist("files" if batch else "file")
+        return [f.read() for f in files]
+
+    payload = request.get_json(silent=True) or {}
+    if batch:
+        return [decodeImageToBytes(image) for image in payload.get("images", [])]
+    return [decodeImageToBytes(payload["image"])] if "image" in payload else []
+
+
+def _predict(batch: bool):
+    try:
+        images = _read_images(batch)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid base64 image: {e}"}), 400
+    if not images:
+        field = "files / images" if batch else "file / image"
+        return jsonify({"error": f"No image provided (expected '{field}')"}), 400
+
+    try:
+        # Concurrent requests are micro-batched together by the inference engine
+        predictions = PredictionPipeline.predict_images(images)
+    except UnidentifiedImageError as e:
+        return jsonify({"error": f"Could not decode image: {e}"}), 400
+
+    return jsonify({"predictions": predictions} if batch else predictions[0])
+
+
+@app.route("/", methods=["GET"])
+def home():
+    # Render the landing page
+    return render_template("index.html")
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    # Liveness probe: the process is up and serving HTTP
+    return jsonify({"status": "ok"})
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    # Readiness probe: the model is loaded and warmed up
+    if model_ready.is_set():
+        return jsonify({"status": "ready"})
+    return jsonify({"status": "loading"}), 503
+
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    # Predict a single image
+    return _predict(batch=False)
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    # Predict several images in one request
+    return _predict(batch=True)
+
+
+# Start loading the model as soon as the app is imported (by gunicorn or directly)
+threading.Thread(target=_preload_model, name="model-preload", daemon=True).start()
+
+
+if __name__ == "__main__":
+    # Development server; production runs under gunicorn (see Dockerfile)
+    app.run(host="0.0.0.0", port=8080, threaded=True)
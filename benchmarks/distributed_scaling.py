@@ -0,0 +1,83 @@
+"""
+Scaling benchmark for multi-worker training on one machine.
+
+Launches the training stage as a local MultiWorkerMirroredStrategy cluster with
+1, 2, 4, ... worker processes (TF_CONFIG is generated per worker, the CPU cores are
+split between them) and reports the training throughput of every cluster size and
+its scaling efficiency relative to one worker:
+
+    efficiency(N) = images/sec with N workers / (N x images/sec with 1 worker)
+
+BATCH_SIZE stays per replica, so the global batch grows with the number of workers.
+The trained models are written to a temporary directory, not to the configured path.
+
+Usage (from the repository root):
+    python benchmarks/distributed_scaling.py [--workers 1 2 4] [--epochs N]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from dataclasses import replace
+
+RESULT_MARKER = "SCALING_RESULT"
+
+
+def run_worker(epochs, model_dir):
+    # Runs inside every worker process launched with TF_CONFIG
+    from kidney_disease_classifier.config.configuration import ConfigurationManager
+    from kidney_disease_classifier.components.model_trainer import Training
+    from kidney_disease_classifier.utils.distributed import is_chief
+
+    config = ConfigurationManager().get_training_config()
+    config = replace(
+        config,
+        params_epochs=epochs,
+        params_distribution={**config.params_distribution, "STRATEGY": "multi_worker"},
+        trained_model_path=os.path.join(model_dir, "model.h5")
+    )
+    training = Training(config=config)
+    training.get_base_model()
+    training.train_valid_generator()
+    training.train()
+
+    if is_chief(training.strategy):
+        # Skip the first epoch, which includes graph tracing and cache warm-up
+        throughput = training.history.history["images_per_sec"]
+        steady = throughput[1:] or throughput
+        print(f"{RESULT_MARKER} {json.dumps({'images_per_sec': sum(steady) / len(steady)})}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Cluster sizes to run")
+    parser.add_argument("--epochs", type=int, default=3, help="Epochs per run (the first one is not timed)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--model-dir", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.epochs, args.model_dir)
+
+    from kidney_disease_classifier.utils.distributed import launch_local_workers
+
+    results = {}
+    with tempfile.TemporaryDirectory() as model_dir:
+        for num_workers in sorted(set(args.workers)):
+            command = [sys.executable, os.path.abspath(__file__), "--worker",
+                       "--epochs", str(args.epochs), "--model-dir", model_dir]
+            outputs = launch_local_workers(num_workers, command, capture_output=True)
+            lines = [line for output in outputs for line in output.stdout.splitlines()
+                     if line.startswith(RESULT_MARKER)]
+            results[num_workers] = json.loads(lines[0][len(RESULT_MARKER):])["images_per_sec"]
+
+    baseline = results[min(results)] / min(results)
+    for num_workers, images_per_sec in results.items():
+        efficiency = images_per_sec / (num_workers * baseline)
+        print(f"{num_workers:>2} workers: {images_per_sec:8.1f} images/sec | "
+              f"speedup {images_per_sec / results[min(results)]:.2f}x | scaling efficiency {efficiency:.0%}")
+
+
+if __name__ == "__main__":
+    main()
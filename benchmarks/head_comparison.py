@@ -0,0 +1,110 @@
+"""
+Compare the classification heads (HEAD: flatten, gap, gap_dense) on the configured backbone.
+
+For every head the model is built exactly like PrepareBaseModel builds it and the
+script reports the head's parameter count, the saved .h5 size, the median time of
+one training step on a BATCH_SIZE batch and the peak resident memory of a process
+that loads the saved model and predicts one batch. Each head is measured in a fresh
+process so the memory numbers do not include the other models.
+
+Usage (from the repository root):
+    python benchmarks/head_comparison.py [--steps N] [--weights imagenet|none]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+HEADS = ("flatten", "gap", "gap_dense")
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _build_and_train(head, weights, steps, model_path, results):
+    import tensorflow as tf
+    from kidney_disease_classifier.config.configuration import ConfigurationManager
+    from kidney_disease_classifier.components.prepare_base_models import PrepareBaseModel, build_backbone
+
+    config = ConfigurationManager().get_prepare_base_model_config()
+    model = PrepareBaseModel._prepare_full_model(
+        model=build_backbone(config.params_backbone, config.params_image_size, weights),
+        classes=config.params_classes,
+        freeze_all=True,
+        freeze_till=None,
+        learning_rate=config.params_learning_rate,
+        head=head,
+        dense_units=config.params_head_dense_units,
+        dropout=config.params_head_dropout
+    )
+    head_params = sum(int(np.prod(w.shape)) for layer in model.layers
+                      if layer.name.startswith("head_") for w in layer.weights)
+    model.save(model_path)
+
+    # Time training steps on a synthetic batch after one warm-up step
+    batch_size = ConfigurationManager().params.BATCH_SIZE
+    images = tf.random.uniform((batch_size, *config.params_image_size))
+    labels = tf.random.uniform((batch_size,), maxval=config.params_classes, dtype=tf.int32)
+    model.train_on_batch(images, labels)
+    step_times = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        model.train_on_batch(images, labels)
+        step_times.append(time.perf_counter() - start)
+
+    results.update({
+        "head_params": head_params,
+        "model_size_mb": os.path.getsize(model_path) / 2 ** 20,
+        "train_step_ms": float(np.median(step_times) * 1000),
+        "batch_size": batch_size
+    })
+
+
+def _load_and_predict(model_path, batch_size, results):
+    import tensorflow as tf
+    baseline = _peak_rss_mb()
+    model = tf.keras.models.load_model(model_path, compile=False)
+    model.predict_on_batch(np.zeros((batch_size, *model.input_shape[1:]), dtype=np.float32))
+    results.update({"inference_peak_rss_mb": _peak_rss_mb(), "inference_rss_increase_mb": _peak_rss_mb() - baseline})
+
+
+def _run_in_subprocess(target, *args):
+    # Run one measurement in a fresh interpreter and collect its results
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        results = manager.dict()
+        process = context.Process(target=target, args=(*args, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"{target.__name__} failed with exit code {process.exitcode}")
+        return dict(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=10, help="Timed training steps per head")
+    parser.add_argument("--weights", default="imagenet", help='Backbone weights ("none" for random initialization)')
+    args = parser.parse_args()
+    weights = None if args.weights.lower() == "none" else args.weights
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for head in HEADS:
+            model_path = os.path.join(tmp_dir, f"model_{head}.h5")
+            result = _run_in_subprocess(_build_and_train, head, weights, args.steps, model_path)
+            result.update(_run_in_subprocess(_load_and_predict, model_path, result["batch_size"]))
+            print(f"{head:>9}: {result['head_params']:>10,} head params | "
+                  f"{result['model_size_mb']:7.1f} MB saved | "
+                  f"{result['train_step_ms']:8.1f} ms/train step (batch {result['batch_size']}) | "
+                  f"{result['inference_peak_rss_mb']:7.0f} MB peak RSS "
+                  f"(+{result['inference_rss_increase_mb']:.0f} MB for load + predict)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Measure the import time of every pipeline entry point against its budget.
+
+Every module is imported in a fresh interpreter with `python -X importtime`, so
+nothing is cached between measurements. The script reports the total import time
+(the minimum over --repeat runs), whether TensorFlow or MLflow were loaded, and
+the heaviest packages it pulls in. Lightweight entry points (configuration, the
+pipeline runner, data ingestion) must not load TensorFlow or MLflow at all.
+
+Save a run with --save and pass it to --compare after a change to print the
+before/after table; --check exits with status 1 when a budget is exceeded.
+
+Usage (from the repository root):
+    python benchmarks/import_time.py [--repeat N] [--top N] [--save FILE] [--compare FILE] [--check]
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+# Import-time budget (seconds) per entry point. Stage modules only define their pipeline
+# class, so importing one must not load TensorFlow; that happens when the stage runs
+ENTRY_POINTS = {
+    "kidney_disease_classifier": 0.2,
+    "kidney_disease_classifier.config.configuration": 0.5,
+    "kidney_disease_classifier.pipeline.runner": 0.5,
+    "kidney_disease_classifier.pipeline.stage_1_data_ingestion": 0.8,
+    "kidney_disease_classifier.pipeline.stage_1b_data_packing": 0.8,
+    "kidney_disease_classifier.pipeline.stage_2_prepare_base_model": 0.8,
+    "kidney_disease_classifier.pipeline.stage_2b_backbone_benchmark": 0.8,
+    "kidney_disease_classifier.pipeline.stage_3_model_training": 0.8,
+    "kidney_disease_classifier.pipeline.stage_3b_hyperparameter_sweep": 0.8,
+    "kidney_disease_classifier.pipeline.stage_4_model_evaluation": 0.8,
+    "kidney_disease_classifier.pipeline.stage_4b_model_quantization": 0.8,
+    "kidney_disease_classifier.pipeline.stage_5_prediction": 0.8,
+}
+
+# Libraries whose import alone takes seconds
+HEAVY_PACKAGES = ("tensorflow", "keras", "mlflow")
+
+# "import time: self [us] | cumulative | imported package"
+IMPORT_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|( *)(\S+)")
+
+
+def measure(module: str) -> dict:
+    # Import the module in a fresh interpreter and parse the -X importtime report
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr[-2000:]}")
+    total, packages = 0.0, {}
+    for line in process.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        seconds, indent, name = int(match.group(2)) / 1e6, match.group(3), match.group(4)
+        # Nested imports are indented; top-level entries add up to the total import time
+        if len(indent) <= 1:
+            total += seconds
+        # Third-party and standard library packages, wherever they were first imported
+        if "." not in name and name not in ("site", "encodings", "kidney_disease_classifier"):
+            packages[name] = max(packages.get(name, 0.0), seconds)
+    return {
+        "seconds": total,
+        "heavy": sorted(package for package in HEAVY_PACKAGES if package in packages),
+        "top": sorted(((seconds, name) for name, seconds in packages.items()), reverse=True)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per entry point (the fastest counts)")
+    parser.add_argument("--top", type=int, default=3, help="Heaviest packages shown per entry point")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 when a budget is exceeded")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results, over_budget = {}, []
+    for module, budget in ENTRY_POINTS.items():
+        runs = [measure(module) for _ in range(args.repeat)]
+        result = min(runs, key=lambda run: run["seconds"])
+        results[module] = {"seconds": result["seconds"], "heavy": result["heavy"]}
+        status = "ok" if result["seconds"] <= budget else "OVER"
+        if status == "OVER":
+            over_budget.append(module)
+
+        before = baseline.get(module)
+        comparison = f" | before {before['seconds']:6.2f}s ({before['seconds'] / max(result['seconds'], 1e-9):5.1f}x)" \
+            if before else ""
+        print(f"{module.replace('kidney_disease_classifier', 'kdc'):<42} {result['seconds']:6.2f}s "
+              f"(budget {budget:.1f}s, {status:>4}){comparison} | heavy: {', '.join(result['heavy']) or '-'}")
+        for seconds, name in result["top"][:args.top]:
+            print(f"    {seconds:6.2f}s  {name}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if over_budget:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Throughput benchmark for the training input pipelines.
+
+Runs the training subset through the ImageDataGenerator backend and through the
+tf.data backend (first epoch and a second, cached epoch) and reports images/sec.
+Both backends apply the AUGMENTATION / AUGMENTATION_PARAMS settings from
+params.yaml, so the numbers show the per-epoch cost of augmentation as well.
+
+Usage (from the repository root):
+    python benchmarks/input_pipeline_throughput.py [--epochs N] [--cache memory|PATH|""]
+"""
+import argparse
+import time
+from dataclasses import replace
+
+from kidney_disease_classifier.config.configuration import ConfigurationManager
+from kidney_disease_classifier.components.model_trainer import Training
+
+
+def _time_epoch(data, num_batches=None):
+    # Pull every batch of one epoch and return (images, seconds)
+    images = 0
+    start = time.perf_counter()
+    if num_batches is not None:
+        for index in range(num_batches):
+            images += len(data[index][0])
+    else:
+        for batch, _ in data:
+            images += int(batch.shape[0])
+    return images, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--epochs", type=int, default=2, help="Epochs to time per backend")
+    parser.add_argument("--cache", default=None, help="Override DATA_CACHE for the tf_data backend")
+    args = parser.parse_args()
+
+    base_config = ConfigurationManager().get_training_config()
+    cache = base_config.params_data_cache if args.cache is None else args.cache
+
+    for backend in ("generator", "tf_data"):
+        training = Training(config=replace(base_config, params_input_pipeline=backend, params_data_cache=cache))
+        training.train_valid_generator()
+
+        for epoch in range(1, args.epochs + 1):
+            if backend == "generator":
+                images, seconds = _time_epoch(training.train_generator, len(training.train_generator))
+            else:
+                images, seconds = _time_epoch(training.train_generator)
+            print(f"{backend:>9} epoch {epoch}: {images} images in {seconds:.2f}s "
+                  f"-> {images / seconds:.1f} images/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Parity check and throughput benchmark for the shared preprocessing module.
+
+Builds the same validation generator the Training and Evaluation components use
+and verifies that `preprocess_batch` produces bit-identical tensors for the same
+files, then measures how many images per second the serving path can preprocess.
+
+Usage (from the repository root):
+    python benchmarks/preprocessing_parity.py [--data-dir DIR] [--batches N]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+from kidney_disease_classifier.config.configuration import ConfigurationManager
+from kidney_disease_classifier.utils.preprocessing import (RESCALE_FACTOR, INTERPOLATION,
+                                                           preprocess_batch, decode_batch,
+                                                           normalize_batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default=None, help="Image directory (defaults to the training data)")
+    parser.add_argument("--batches", type=int, default=5, help="Number of batches to compare")
+    parser.add_argument("--workers", type=int, default=8, help="Decoding threads for the serving path")
+    args = parser.parse_args()
+
+    training_config = ConfigurationManager().get_training_config()
+    data_dir = args.data_dir or training_config.training_data
+    image_size = training_config.params_image_size
+    batch_size = training_config.params_batch_size
+
+    # Train/eval path: the generator configuration used by Training and Evaluation
+    generator = tf.keras.preprocessing.image.ImageDataGenerator(
+        rescale=RESCALE_FACTOR, validation_split=0.20
+    ).flow_from_directory(
+        directory=data_dir,
+        subset="validation",
+        shuffle=False,
+        class_mode="sparse",
+        target_size=image_size[:-1],
+        batch_size=batch_size,
+        interpolation=INTERPOLATION
+    )
+
+    # Compare each generator batch with the serving path on the same files
+    max_diff = 0.0
+    num_batches = min(args.batches, len(generator))
+    for index in range(num_batches):
+        train_batch, _ = generator[index]
+        files = generator.filepaths[index * batch_size:(index + 1) * batch_size]
+        serve_batch = preprocess_batch(files, image_size, num_workers=args.workers)
+        max_diff = max(max_diff, float(np.abs(train_batch - serve_batch).max()))
+    print(f"Compared {num_batches} batches, max abs difference train vs serve: {max_diff}")
+
+    # Throughput of the serving path split into decode and normalize
+    files = generator.filepaths
+    start = time.perf_counter()
+    raw = decode_batch(files, image_size, num_workers=args.workers)
+    decode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    normalize_batch(raw)
+    normalize_time = time.perf_counter() - start
+    print(f"decode+resize: {len(files) / decode_time:.1f} images/sec "
+          f"({args.workers} workers), normalize: {len(files) / normalize_time:.1f} images/sec")
+
+    if max_diff != 0.0:
+        print("FAIL: train-time and serve-time tensors differ")
+        sys.exit(1)
+    print("OK: train-time and serve-time tensors are identical")
+
+
+if __name__ == "__main__":
+    main()
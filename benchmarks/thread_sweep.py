@@ -0,0 +1,112 @@
+"""
+Find the TensorFlow thread settings that give the best throughput on this machine.
+
+Every combination of intra-op threads, inter-op threads and oneDNN on/off runs in
+a fresh process (TensorFlow's thread pools are fixed once it starts), builds the
+configured backbone and head like PrepareBaseModel, and times training steps and
+batched inference on synthetic BATCH_SIZE batches. The script prints images/sec
+for every combination and the runtime section to put in config/config.yaml.
+
+Usage (from the repository root):
+    python benchmarks/thread_sweep.py [--intra 1 2 4 8] [--inter 1 2] [--onednn on off] [--steps N]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+
+def _default_intra_threads():
+    # Powers of two up to the number of usable cores, plus the core count itself
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    counts = [2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores]
+    return sorted(set(counts + [cores]))
+
+
+def _measure(intra, inter, onednn, steps, results):
+    # Runs in a fresh process. Thread counts exported in the environment take precedence
+    # over the runtime section of config.yaml, and oneDNN is read when TensorFlow is imported
+    os.environ.update(TF_NUM_INTRAOP_THREADS=str(intra), TF_NUM_INTEROP_THREADS=str(inter),
+                      OMP_NUM_THREADS=str(intra))
+    from kidney_disease_classifier.config.configuration import ConfigurationManager
+    os.environ["TF_ENABLE_ONEDNN_OPTS"] = "1" if onednn else "0"
+
+    import tensorflow as tf
+    from kidney_disease_classifier.components.prepare_base_models import PrepareBaseModel, build_backbone, resolve_head
+
+    config = ConfigurationManager().get_prepare_base_model_config()
+    model = PrepareBaseModel._prepare_full_model(
+        model=build_backbone(config.params_backbone, config.params_image_size, None),
+        classes=config.params_classes,
+        freeze_all=True,
+        freeze_till=None,
+        learning_rate=config.params_learning_rate,
+        head=resolve_head(config.params_backbone, config.params_head),
+        dense_units=config.params_head_dense_units,
+        dropout=config.params_head_dropout
+    )
+
+    batch_size = ConfigurationManager().params.BATCH_SIZE
+    images = tf.random.uniform((batch_size, *config.params_image_size))
+    labels = tf.random.uniform((batch_size,), maxval=config.params_classes, dtype=tf.int32)
+
+    def images_per_sec(step):
+        # One warm-up call, then the median over the timed calls
+        step()
+        times = []
+        for _ in range(steps):
+            start = time.perf_counter()
+            step()
+            times.append(time.perf_counter() - start)
+        return batch_size / float(np.median(times))
+
+    results.update({
+        "train_images_per_sec": images_per_sec(lambda: model.train_on_batch(images, labels)),
+        "inference_images_per_sec": images_per_sec(lambda: model.predict_on_batch(images))
+    })
+
+
+def _run_in_subprocess(*args):
+    # Run one measurement in a fresh interpreter and collect its results
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        results = manager.dict()
+        process = context.Process(target=_measure, args=(*args, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"Measurement with {args[:3]} failed with exit code {process.exitcode}")
+        return dict(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--intra", type=int, nargs="+", default=_default_intra_threads(), help="Intra-op thread counts")
+    parser.add_argument("--inter", type=int, nargs="+", default=[1, 2], help="Inter-op thread counts")
+    parser.add_argument("--onednn", nargs="+", default=["on"], choices=["on", "off"], help="oneDNN settings")
+    parser.add_argument("--steps", type=int, default=10, help="Timed calls per measurement")
+    args = parser.parse_args()
+
+    results = []
+    for onednn in args.onednn:
+        for intra in args.intra:
+            for inter in args.inter:
+                result = _run_in_subprocess(intra, inter, onednn == "on", args.steps)
+                runtime = {"intra_op_threads": intra, "inter_op_threads": inter, "onednn": onednn == "on"}
+                results.append((runtime, result))
+                print(f"intra {intra:>3} | inter {inter:>2} | oneDNN {onednn:>3} | "
+                      f"train {result['train_images_per_sec']:8.1f} img/s | "
+                      f"inference {result['inference_images_per_sec']:8.1f} img/s", flush=True)
+
+    for workload in ("train", "inference"):
+        runtime, result = max(results, key=lambda item: item[1][f"{workload}_images_per_sec"])
+        print(f"\nBest for {workload} ({result[f'{workload}_images_per_sec']:.1f} images/sec), config/config.yaml:")
+        print("runtime:")
+        for key, value in runtime.items():
+            print(f"  {key}: {str(value).lower()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,9 @@
-
-# complete pipeline 
+# complete pipeline
 import os
+import argparse
 from kidney_disease_classifier import logger
-from kidney_disease_classifier.pipeline.stage_1_data_ingestion import DataIngestionTrainingPipeline
-from kidney_disease_classifier.pipeline.stage_2_prepare_base_model import PrepareBaseModelTrainingPipeline
-from kidney_disease_classifier.pipeline.stage_3_model_training import ModelTrainingPipeline
-from kidney_disease_classifier.pipeline.stage_4_model_evaluation import EvaluationPipeline
+from kidney_disease_classifier.pipeline.runner import PipelineRunner
+from kidney_disease_classifier.config.configuration import set_overrides, configure_process
 
 
 from dotenv import load_dotenv
@@ -18,81 +16,57 @@ MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI")
 MLFLOW_TRACKING_USERNAME = os.getenv("MLFLOW_TRACKING_USERNAME")
 MLFLOW_TRACKING_PASSWORD = os.getenv("MLFLOW_TRACKING_PASSWORD")
 
-
-# Define the name of the current stage in the data processing pipeline
-STAGE_NAME = "Data Ingestion stage"
-
-try:
-        # Log the start of the data ingestion stage
-        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-        # Create an instance of the DataIngestionTrainingPipeline
-        obj = DataIngestionTrainingPipeline()
-        # Execute the main process of the data ingestion pipeline
-        obj.main()
-        # Log the successful completion of the data ingestion stage
-        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e:
-        # Log any exceptions that occur during the execution
-        logger.exception(e)
-        raise e  # Reraise the exception for further handling if necessary
-
-
-# Define the name of the current stage in the data processing pipeline
-STAGE_NAME = "Prepare Base Model stage"
-
-try:
-        # Log the start of the stage
-        logger.info(f"*******************")
-        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-        
-        # Create an instance of the training pipeline and run the main method
-        prepare_base_model = PrepareBaseModelTrainingPipeline()
-        prepare_base_model.main()
-        
-        # Log the completion of the stage
-        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e:
+# Stages run by default (the backbone benchmark and the hyperparameter sweep are run on request,
+# e.g. python main.py hyperparameter_sweep)
+DEFAULT_STAGES = ["data_ingestion", "data_packing", "prepare_base_model", "training", "evaluation",
+                  "model_quantization"]
+
+# Stages that use every core or measure latency, so nothing runs next to them
+EXCLUSIVE_STAGES = ("backbone_benchmark", "training", "hyperparameter_sweep", "model_quantization")
+
+
+def train(results):
+    # Stage modules are imported when their stage runs, so a run that skips them does not load TensorFlow
+    from kidney_disease_classifier.pipeline.stage_3_model_training import ModelTrainingPipeline
+    return ModelTrainingPipeline().main()
+
+
+def evaluate(results):
+    from kidney_disease_classifier.pipeline.stage_4_model_evaluation import EvaluationPipeline
+    # Evaluate the in-memory model on the validation batches training already built, instead of
+    # reloading the model and decoding the validation images again; when training was up to date
+    # and skipped, the evaluation loads the saved model
+    training = results.get("training")
+    if training is None:
+        return EvaluationPipeline().main()
+    return EvaluationPipeline().main(model=training.trained_model, valid_data=training.validation_data())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pipeline stages of dvc.yaml, skipping up-to-date ones")
+    parser.add_argument("stages", nargs="*", default=DEFAULT_STAGES, help="Stages to run (with their upstream stages)")
+    parser.add_argument("--force", action="store_true", help="Run the stages even when they are up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages would run")
+    parser.add_argument("--jobs", type=int, default=2, help="Maximum number of stages running concurrently")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a params.yaml key (e.g. EPOCHS=2) or a config.yaml key (config.training.root_dir=...)")
+    args = parser.parse_args()
+
+    # Overrides apply to every ConfigurationManager of this run without editing the YAML files
+    set_overrides(args.set)
+
+    # Logging and the oneDNN/OpenMP environment, read with the overrides applied
+    configure_process()
+
+    try:
+        # Read the stage graph from dvc.yaml; independent stages (e.g. data ingestion and base
+        # model preparation) run concurrently
+        runner = PipelineRunner(max_workers=args.jobs, exclusive=EXCLUSIVE_STAGES)
+        # Hand the trained model from the training stage to the evaluation stage
+        runner.register("training", train)
+        runner.register("evaluation", evaluate)
+        runner.run(args.stages, force=args.force, dry_run=args.dry_run)
+    except Exception as e:
         # Log any exceptions that occur during the execution
         logger.exception(e)
         raise e  # Reraise the exception for further handling
-
-
-# Define the name of the current stage in the data processing pipeline
-STAGE_NAME = "Model Training stage"
-
-try:
-        # Log the start of the stage
-        logger.info(f"*******************")
-        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-        
-        # Create an instance of the training pipeline and run the main method
-        model_trainer = ModelTrainingPipeline()
-        model_trainer.main()
-        
-        # Log the completion of the stage
-        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e:
-        # Log any exceptions that occur during the execution
-        logger.exception(e)
-        raise e  # Reraise the exception for further handling
-
-
-# Define the name of the current stage in the data processing pipeline
-STAGE_NAME = "Model Evaluation stage"
-
-try:
-        # Log the start of the evaluation stage
-        logger.info(f"*******************")
-        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-        
-        # Create an instance of the EvaluationPipeline class and run the main method
-        model_evaluater = EvaluationPipeline()
-        model_evaluater.main()
-        
-        # Log the completion of the evaluation stage
-        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e:
-        # Log any exceptions that occur during the execution
-        logger.exception(e)
-        # Raise the exception to propagate it further
-        raise e
\ No newline at end of file
@@ -14,18 +14,41 @@ log_dir = "logs"
 # Create the full path for the log file
 log_filepath = os.path.join(log_dir, "running_logs.log")
 
-# Create the log directory if it does not exist
-os.makedirs(log_dir, exist_ok=True)
-
-# Configure the logging settings
-logging.basicConfig(
-    level=logging.INFO,  # Set the logging level to INFO
-    format=logging_str,  # Use the defined format for log messages
-    handlers=[
-        logging.FileHandler(log_filepath),  # Log messages to a file
-        logging.StreamHandler(sys.stdout)    # Also output log messages to the console
-    ]
-)
+
+class _LazyFileHandler(logging.FileHandler):
+    """
+    File handler that creates the log directory and opens the file on the first
+    record, so importing the package does not touch the file system.
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename, delay=True)
+
+    def emit(self, record):
+        if self.stream is None:
+            # Create the log directory if it does not exist
+            os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        super().emit(record)
+
+
+def setup_logging():
+    """
+    Send log records to logs/running_logs.log and the console.
+
+    Called by the entry points (main.py, the stage scripts, app.py, streamlit.py and
+    the sweep workers) rather than on import, so importing the package leaves the
+    logging of the host application alone. Later calls are no-ops.
+    """
+    # Configure the logging settings
+    logging.basicConfig(
+        level=logging.INFO,  # Set the logging level to INFO
+        format=logging_str,  # Use the defined format for log messages
+        handlers=[
+            _LazyFileHandler(log_filepath),  # Log messages to a file (opened on the first message)
+            logging.StreamHandler(sys.stdout)    # Also output log messages to the console
+        ]
+    )
+
 
 # Create a logger object with a specific name
 logger = logging.getLogger("kidney_disease_classifier_logger")  # This logger can be used throughout the application
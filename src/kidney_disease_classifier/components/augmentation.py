@@ -0,0 +1,91 @@
+
+# import required libraries
+from __future__ import annotations
+import math
+from kidney_disease_classifier.utils.lazy import LazyModule
+
+# TensorFlow is imported on first use, so importing this module stays cheap
+tf = LazyModule("tensorflow")
+
+
+def _uniform(batch_size, limit):
+    # Sample one value per image uniformly from [-limit, limit]
+    return tf.random.uniform((batch_size,), -limit, limit)
+
+
+def build_batch_augmentation(augmentation_params: dict):
+    """
+    Build a function that augments a whole batch of images in one graph op.
+
+    Reproduces the random affine transforms of `ImageDataGenerator.random_transform`
+    (rotation in degrees, width/height shifts as a fraction of the image size, shear
+    angle in degrees, independent x/y zoom and horizontal flip). The per-image
+    rotation, shift, shear and zoom matrices are composed into a single projective
+    transform, so every image in the batch is resampled exactly once with bilinear
+    interpolation and nearest fill, like the generator.
+
+    :param augmentation_params: Mapping with ROTATION_RANGE, WIDTH_SHIFT_RANGE,
+                                HEIGHT_SHIFT_RANGE, SHEAR_RANGE, ZOOM_RANGE and
+                                HORIZONTAL_FLIP keys (see params.yaml).
+    :return: Callable mapping a float32 (batch, height, width, channels) tensor to an
+             augmented tensor of the same shape.
+    """
+    rotation_range = float(augmentation_params["ROTATION_RANGE"])
+    width_shift_range = float(augmentation_params["WIDTH_SHIFT_RANGE"])
+    height_shift_range = float(augmentation_params["HEIGHT_SHIFT_RANGE"])
+    shear_range = float(augmentation_params["SHEAR_RANGE"])
+    zoom_range = float(augmentation_params["ZOOM_RANGE"])
+    horizontal_flip = bool(augmentation_params["HORIZONTAL_FLIP"])
+
+    def augment(images):
+        shape = tf.shape(images)
+        batch_size = shape[0]
+        height = tf.cast(shape[1], tf.float32)
+        width = tf.cast(shape[2], tf.float32)
+
+        # Random parameters for every image in the batch
+        theta = _uniform(batch_size, rotation_range) * (math.pi / 180.0)
+        shift_rows = _uniform(batch_size, height_shift_range) * height
+        shift_cols = _uniform(batch_size, width_shift_range) * width
+        shear = _uniform(batch_size, shear_range) * (math.pi / 180.0)
+        zoom_rows = tf.random.uniform((batch_size,), 1.0 - zoom_range, 1.0 + zoom_range)
+        zoom_cols = tf.random.uniform((batch_size,), 1.0 - zoom_range, 1.0 + zoom_range)
+
+        # Compose rotation @ shift @ shear @ zoom in (row, col) coordinates, which maps
+        # every output pixel to the input pixel it samples from
+        cos, sin = tf.cos(theta), tf.sin(theta)
+        cos_shear, sin_shear = tf.cos(shear), tf.sin(shear)
+        m00 = cos * zoom_rows
+        m01 = (-cos * sin_shear - sin * cos_shear) * zoom_cols
+        m02 = cos * shift_rows - sin * shift_cols
+        m10 = sin * zoom_rows
+        m11 = (-sin * sin_shear + cos * cos_shear) * zoom_cols
+        m12 = sin * shift_rows + cos * shift_cols
+
+        # Move the origin to the image centre before applying the transform
+        center_rows = height / 2.0 - 0.5
+        center_cols = width / 2.0 - 0.5
+        m02 = m02 + center_rows - m00 * center_rows - m01 * center_cols
+        m12 = m12 + center_cols - m10 * center_rows - m11 * center_cols
+
+        # ImageProjectiveTransform works in (x=col, y=row) order
+        zeros = tf.zeros_like(m00)
+        transforms = tf.stack([m11, m10, m12, m01, m00, m02, zeros, zeros], axis=1)
+
+        images = tf.raw_ops.ImageProjectiveTransformV3(
+            images=images,
+            transforms=transforms,
+            output_shape=shape[1:3],
+            fill_value=0.0,
+            interpolation="BILINEAR",
+            fill_mode="NEAREST"
+        )
+
+        # Flip half of the images horizontally
+        if horizontal_flip:
+            flip = tf.random.uniform((batch_size, 1, 1, 1)) < 0.5
+            images = tf.where(flip, tf.reverse(images, axis=[2]), images)
+
+        return images
+
+    return augment
@@ -0,0 +1,126 @@
+
+# import required libraries
+from __future__ import annotations
+import time
+import numpy as np
+from pathlib import Path
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.utils.common_functions import save_json
+from kidney_disease_classifier.components.data_pipeline import list_image_files
+from kidney_disease_classifier.components.feature_cache import FeatureCache, build_head_model, split_backbone_and_head
+from kidney_disease_classifier.components.prepare_base_models import PrepareBaseModel, build_backbone, resolve_head
+from kidney_disease_classifier.entity.config_entity import BackboneBenchmarkConfig
+from kidney_disease_classifier.utils.lazy import LazyModule
+
+# TensorFlow is imported on first use, so importing this module stays cheap
+tf = LazyModule("tensorflow")
+
+# Number of timed single-image forward passes per backbone
+LATENCY_RUNS = 20
+
+
+def count_flops(model: tf.keras.Model) -> int:
+    """
+    Count the floating point operations of one forward pass (one image).
+
+    Convolutions (regular and depthwise) and dense layers dominate the cost, so the
+    count is the multiply-adds of every layer with a kernel, times two.
+
+    :param model: Keras model with a flat list of layers.
+    :return: Number of FLOPs per image.
+    """
+    macs = 0
+    for layer in model.layers:
+        if getattr(layer, "kernel", None) is None:
+            continue
+        # Every output position applies the whole kernel once
+        output_positions = int(np.prod(layer.output.shape[1:-1]))
+        macs += int(np.prod(layer.kernel.shape)) * output_positions
+    return 2 * macs
+
+
+class BackboneBenchmark:
+    """
+    Compares the candidate backbones on parameters, FLOPs, CPU latency and
+    validation accuracy of a classification head trained on cached features.
+    """
+
+    def __init__(self, config: BackboneBenchmarkConfig):
+        # Store the configuration object passed during initialization
+        self.config = config
+
+    def _measure_latency(self, model: tf.keras.Model) -> dict:
+        # Time single-image forward passes of the full model after one warm-up call
+        forward = tf.function(lambda batch: model(batch, training=False))
+        batch = tf.random.uniform((1, *self.config.params_image_size))
+        forward(batch)
+
+        latencies = []
+        for _ in range(LATENCY_RUNS):
+            start = time.perf_counter()
+            forward(batch).numpy()
+            latencies.append(time.perf_counter() - start)
+        return {
+            "latency_ms_median": float(np.median(latencies) * 1000),
+            "latency_ms_p95": float(np.percentile(latencies, 95) * 1000)
+        }
+
+    def _validation_accuracy(self, model: tf.keras.Model) -> float:
+        # Train the head on cached backbone features like TRAINING_MODE: feature_cache
+        backbone, head_layers = split_backbone_and_head(model)
+        feature_cache = FeatureCache(self.config.feature_cache_dir, backbone, self.config.params_image_size)
+
+        features = {}
+        for subset in ("training", "validation"):
+            filepaths, labels, _ = list_image_files(self.config.training_data, 0.20, subset)
+            features[subset] = (
+                feature_cache.get_features(filepaths, batch_size=self.config.params_batch_size),
+                np.asarray(labels, dtype=np.int32)
+            )
+
+        head_model = build_head_model(feature_cache.feature_shape, head_layers)
+        head_model.compile(
+            optimizer=tf.keras.optimizers.Adam(learning_rate=self.config.params_learning_rate),  # Same optimizer as training
+            loss='sparse_categorical_crossentropy',  # Loss function for integer labels
+            metrics=["accuracy"]  # Track accuracy as a performance metric
+        )
+        head_model.fit(
+            *features["training"],
+            batch_size=self.config.params_batch_size,
+            epochs=self.config.params_epochs,
+            shuffle=True,
+            verbose=0
+        )
+        _, accuracy = head_model.evaluate(*features["validation"], verbose=0)
+        return float(accuracy)
+
+    def benchmark(self):
+        """
+        Build every configured backbone with its classification head, measure it and
+        write the comparison to the report. Function returns None.
+        """
+        report = {}
+        for name in self.config.params_backbones:
+            logger.info(f"Benchmarking backbone {name}")
+            model = PrepareBaseModel._prepare_full_model(
+                model=build_backbone(name, self.config.params_image_size, self.config.params_weights),
+                classes=self.config.params_classes,
+                freeze_all=True,
+                freeze_till=None,
+                learning_rate=self.config.params_learning_rate,
+                head=resolve_head(name, self.config.params_head),
+                dense_units=self.config.params_head_dense_units,
+                dropout=self.config.params_head_dropout
+            )
+
+            result = {
+                "params": int(model.count_params()),
+                "gflops": count_flops(model) / 1e9,
+                **self._measure_latency(model),
+                "val_accuracy": self._validation_accuracy(model)
+            }
+            report[name] = result
+            logger.info(f"{name}: {result['params']:,} params, {result['gflops']:.2f} GFLOPs, "
+                        f"{result['latency_ms_median']:.1f} ms/image, val accuracy {result['val_accuracy']:.4f}")
+
+        save_json(path=Path(self.config.report_path), data=report)
@@ -0,0 +1,304 @@
+
+# import required libraries
+import os
+import json
+import time
+import collections
+import numpy as np
+import tensorflow as tf
+from pathlib import Path
+from kidney_disease_classifier import logger
+
+try:
+    import resource  # Peak RSS; not available on Windows
+except ImportError:
+    resource = None
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """
+    Logs the wall time and training throughput (images/sec) of every epoch.
+
+    The values are also added to the epoch logs as `epoch_time` and
+    `images_per_sec`, so they end up in the History object next to the loss.
+    """
+
+    def __init__(self, images_per_epoch: int):
+        super().__init__()
+        self.images_per_epoch = images_per_epoch
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        epoch_time = time.perf_counter() - self._epoch_start
+        images_per_sec = self.images_per_epoch / epoch_time
+        logger.info(f"Epoch {epoch + 1}: {epoch_time:.2f}s wall time, {images_per_sec:.1f} images/sec "
+                    f"({self.images_per_epoch} images, validation included in the wall time)")
+        if logs is not None:
+            logs["epoch_time"] = epoch_time
+            logs["images_per_sec"] = images_per_sec
+
+
+class BestWeightsCheckpoint(tf.keras.callbacks.ModelCheckpoint):
+    """
+    Keeps the weights of the best epoch and remembers how good that epoch was.
+
+    The best monitored value is written to `best_value_path` next to the weights
+    every time they are replaced. A resumed run starts from that value instead of
+    from scratch, so its first epoch cannot overwrite better weights saved before
+    the interruption.
+
+    :param filepath: Weights file (".weights.h5") overwritten whenever the metric improves.
+    :param best_value_path: JSON file holding the monitored metric and its best value.
+    :param monitor: Validation metric that selects the best epoch.
+    """
+
+    def __init__(self, filepath: Path, best_value_path: Path, monitor: str):
+        self.best_value_path = Path(best_value_path)
+        initial_value = None
+        if self.best_value_path.exists():
+            with open(self.best_value_path) as f:
+                saved = json.load(f)
+            # A value recorded for another metric cannot be compared with this one
+            if saved["monitor"] == monitor:
+                initial_value = saved["value"]
+                logger.info(f"Resuming with the best {monitor} of {initial_value:.5f} from {self.best_value_path}")
+        super().__init__(
+            filepath=str(filepath),
+            monitor=monitor,
+            save_best_only=True,  # Only save improvements
+            save_weights_only=True,  # Weights only; BackupAndRestore keeps the optimizer state
+            initial_value_threshold=initial_value
+        )
+
+    def on_epoch_end(self, epoch, logs=None):
+        previous = self.best
+        super().on_epoch_end(epoch, logs)
+        if self.best != previous:
+            # Write to a temporary file first so an interruption never leaves a truncated file
+            temporary = self.best_value_path.with_suffix(".tmp")
+            with open(temporary, "w") as f:
+                json.dump({"monitor": self.monitor, "value": float(self.best), "epoch": epoch + 1}, f)
+            os.replace(temporary, self.best_value_path)
+
+
+# Fraction of the training step time spent waiting for input above which an epoch counts as input-bound
+INPUT_BOUND_FRACTION = 0.2
+
+
+def memory_usage_mb() -> tuple:
+    """
+    Resident set size of this process.
+
+    :return: Tuple of (current RSS in MB or None where /proc is unavailable, peak RSS in MB or None).
+    """
+    peak = None
+    if resource is not None:
+        # ru_maxrss is in KB on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        current = None
+    return current, peak
+
+
+class TrainingTelemetry(tf.keras.callbacks.Callback):
+    """
+    Records where training time goes, to a local JSONL file and to MLflow.
+
+    Every training step is timed and split into input wait (the time the step
+    waited for its batch) and compute. Input wait is only measured for tf.data
+    pipelines passed through `instrument()`; for other inputs it is reported as
+    None. Every `step_interval` steps a step record is written, and at the end of
+    every epoch a record with the epoch's loss/accuracy, step time statistics,
+    training images/sec, input wait fraction, learning rate and memory RSS (the
+    first step of the run, which also compiles the train function, is left out).
+
+    :param path: JSONL file the records are appended to (one JSON object per line).
+    :param batch_size: Images per step, used when the batch size is not measured.
+    :param step_interval: Write a step record every N steps (0: epoch records only).
+    :param mlflow_logger: Optional AsyncMlflowLogger the records are also logged to;
+        it is closed at the end of training.
+    :param params: Run parameters written to the first record and logged to MLflow.
+    """
+
+    def __init__(self, path: Path, batch_size: int, step_interval: int = 10, mlflow_logger=None,
+                 params: dict = None):
+        super().__init__()
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.step_interval = step_interval
+        self.mlflow_logger = mlflow_logger
+        self.run_params = params or {}
+        self.instrumented = False
+        # (time, images) of every batch handed to the model by an instrumented dataset
+        self._ready = collections.deque()
+        self._global_step = 0
+
+    def instrument(self, dataset: tf.data.Dataset) -> tf.data.Dataset:
+        """
+        Add a final, sequential map to a dataset of (images, labels) batches that
+        records when every batch is handed to the model. As it runs only when the
+        training step asks for the next batch, the time from the start of the step
+        to that moment is the time the step waited for input.
+        """
+        self.instrumented = True
+
+        def mark_ready(images, labels):
+            marker = tf.py_function(self._mark_ready, [tf.shape(images)[0]], tf.int32)
+            # The identity makes the batch depend on the marker, so it cannot be pruned
+            with tf.control_dependencies([marker]):
+                return tf.identity(images), labels
+
+        return dataset.map(mark_ready)
+
+    def _mark_ready(self, images):
+        self._ready.append((time.perf_counter(), int(images)))
+        return 0
+
+    def _write(self, record: dict):
+        record = {"run": self._run, "time": time.time(), **record}
+        self._file.write(json.dumps(record) + "\n")
+
+    def on_train_begin(self, logs=None):
+        # Append, so resumed runs and earlier runs stay in the same file for comparison
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a")
+        self._run = time.strftime("%Y%m%dT%H%M%S")
+        self._write({"type": "train_begin", "params": self.run_params, "input_wait_measured": self.instrumented})
+        self._file.flush()
+        if self.mlflow_logger is not None:
+            self.mlflow_logger.log_params(self.run_params)
+            self.mlflow_logger.set_tags({"telemetry_run": self._run})
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch = epoch
+        self._ready.clear()
+        self._step_times, self._input_waits, self._images = [], [], 0
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._step_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        step_end = time.perf_counter()
+        step_time = step_end - self._step_start
+
+        # Batches handed over during this step; earlier ones were prefetched, so no wait
+        input_wait, images = None, self.batch_size
+        if self.instrumented:
+            ready = []
+            while self._ready and self._ready[0][0] <= step_end:
+                ready.append(self._ready.popleft())
+            input_wait = max(0.0, ready[0][0] - self._step_start) if ready else 0.0
+            images = sum(count for _, count in ready) or images
+        self._global_step += 1
+        # The first step of the run also traces and compiles the train function; it would
+        # show up as input wait, so it is left out of the epoch statistics
+        if self._global_step > 1:
+            self._step_times.append(step_time)
+            self._images += images
+            if input_wait is not None:
+                self._input_waits.append(input_wait)
+
+        if self.step_interval and self._global_step % self.step_interval == 0:
+            record = {
+                "step_time_ms": step_time * 1000,
+                "input_wait_ms": None if input_wait is None else input_wait * 1000,
+                "images_per_sec": images / step_time
+            }
+            if logs and "loss" in logs:
+                record["loss"] = float(logs["loss"])
+            self._write({"type": "step", "epoch": self._epoch + 1, "step": self._global_step, **record})
+            if self.mlflow_logger is not None:
+                self.mlflow_logger.log_metrics(
+                    {key if key.startswith("step_") else f"step_{key}": value
+                     for key, value in record.items() if value is not None},
+                    step=self._global_step
+                )
+
+    def on_epoch_end(self, epoch, logs=None):
+        record = {key: float(value) for key, value in (logs or {}).items()}
+        if self._step_times:
+            step_times = np.array(self._step_times)
+            train_time = float(step_times.sum())
+            record.update({
+                "steps": len(step_times),
+                "step_time_ms_mean": float(step_times.mean()) * 1000,
+                "step_time_ms_p50": float(np.percentile(step_times, 50)) * 1000,
+                "step_time_ms_p95": float(np.percentile(step_times, 95)) * 1000,
+                # Training steps only, without validation and callback overhead
+                "train_images_per_sec": self._images / train_time
+            })
+            if self._input_waits:
+                input_wait = float(np.sum(self._input_waits))
+                record.update({
+                    "input_wait_ms_mean": input_wait / len(step_times) * 1000,
+                    "compute_ms_mean": (train_time - input_wait) / len(step_times) * 1000,
+                    "input_wait_fraction": input_wait / train_time
+                })
+
+        learning_rate = getattr(getattr(self.model, "optimizer", None), "learning_rate", None)
+        if learning_rate is not None:
+            record["learning_rate"] = float(np.array(learning_rate))
+        rss, peak_rss = memory_usage_mb()
+        record.update({key: value for key, value in (("rss_mb", rss), ("peak_rss_mb", peak_rss))
+                       if value is not None})
+
+        bottleneck = None
+        if "input_wait_fraction" in record:
+            bottleneck = "input" if record["input_wait_fraction"] >= INPUT_BOUND_FRACTION else "compute"
+            logger.info(f"Epoch {epoch + 1} telemetry: {record['step_time_ms_mean']:.1f} ms/step, "
+                        f"input wait {record['input_wait_fraction']:.1%} ({bottleneck} bound), "
+                        f"{record['train_images_per_sec']:.1f} images/sec, RSS {record.get('rss_mb', 0):.0f} MB")
+
+        self._write({"type": "epoch", "epoch": epoch + 1, "bottleneck": bottleneck, **record})
+        self._file.flush()
+        if self.mlflow_logger is not None:
+            self.mlflow_logger.log_metrics(record, step=epoch + 1)
+
+    def on_train_end(self, logs=None):
+        self._file.close()
+        if self.mlflow_logger is not None:
+            # Upload the local record file too and end the run (bounded by the logger's flush timeout)
+            self.mlflow_logger.log_artifact(self.path, "telemetry")
+            self.mlflow_logger.close()
+
+
+class TrialPruning(tf.keras.callbacks.Callback):
+    """
+    Reports the validation accuracy of every epoch of a sweep trial to the sweep's
+    pruner and stops training when the pruner drops the trial.
+
+    The epoch metrics are kept in `history`, including those of a pruned trial, so
+    the sweep can report and log every trial the same way.
+
+    :param pruner: Object with a `report(trial, epoch, value) -> bool` method that
+        returns False when the trial should stop (e.g. an AshaPruner).
+    :param trial: Index of the trial in the sweep.
+    :param epochs: Number of epochs the trial trains for; the last one is not judged.
+    :param monitor: Validation metric reported to the pruner (higher is better).
+    """
+
+    def __init__(self, pruner, trial: int, epochs: int, monitor: str = "val_accuracy"):
+        super().__init__()
+        self.pruner = pruner
+        self.trial = trial
+        self.epochs = epochs
+        self.monitor = monitor
+        self.history = []
+        self.pruned_at = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        self.history.append({"epoch": epoch + 1, **{key: float(value) for key, value in logs.items()
+                                                    if np.ndim(value) == 0}})
+        value = logs.get(self.monitor)
+        if value is None or epoch + 1 >= self.epochs:
+            return
+        if not self.pruner.report(self.trial, epoch + 1, float(value)):
+            logger.info(f"Trial {self.trial} pruned after epoch {epoch + 1} ({self.monitor} {float(value):.4f})")
+            self.pruned_at = epoch + 1
+            self.model.stop_training = True
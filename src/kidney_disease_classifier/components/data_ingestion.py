@@ -5,10 +5,18 @@ from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
 import os  # Import the os module for operating system functionalities
+import json  # Import json to write the packed dataset index
+import time  # Import time to back off between download attempts
+import shutil  # Import shutil to copy archive members and replace the packed dataset atomically
+import hashlib  # Import hashlib to verify the downloaded archive
 import zipfile  # Import the zipfile module to handle ZIP file extraction
-import gdown  # Import gdown for downloading files from Google Drive
+from concurrent.futures import ThreadPoolExecutor  # Import a thread pool for parallel extraction
+from pathlib import Path  # Import Path for file size reporting
+import numpy as np  # Import numpy to write the packed image arrays
 from kidney_disease_classifier import logger  # Import the logger for logging events
 from kidney_disease_classifier.utils.common_functions import get_size  # Import utility function to get file size
+from kidney_disease_classifier.utils.preprocessing import decode_batch  # Import the shared image decoder
+from kidney_disease_classifier.components.data_pipeline import list_image_files  # Import the dataset file listing
 from kidney_disease_classifier.entity.config_entity import DataIngestionConfig  # Import the DataIngestionConfig class
 
 
@@ -17,50 +25,213 @@ class DataIngestion:
     def __init__(self, config: DataIngestionConfig):
         self.config = config  # Store the configuration object passed during initialization
 
-    def download_file(self) -> str:
+    @staticmethod
+    def _resolve_download_url(source_url: str) -> str:
+        # Turn a Google Drive sharing link into a direct download link; other URLs are used as-is
+        if "drive.google.com/file/d/" in source_url:
+            file_id = source_url.split("/")[-2]
+            return f"https://drive.usercontent.google.com/download?id={file_id}&export=download&confirm=t"
+        return source_url
+
+    @staticmethod
+    def _sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+        # Hash the file in chunks so large archives are never held in memory
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _is_valid_archive(self, path: str) -> bool:
+        # An archive is valid if it matches the configured checksum (or, without one, is a readable zip)
+        if not os.path.exists(path):
+            return False
+        if self.config.sha256:
+            return self._sha256(path) == self.config.sha256.lower()
+        return zipfile.is_zipfile(path)
+
+    def _stream_to_part_file(self, session: requests.Session, url: str, part_path: str):
+        # Continue an interrupted download from the bytes already on disk
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with session.get(url, stream=True, headers=headers, timeout=(10, 60)) as response:
+            if response.status_code == 416:
+                # The requested range starts at the end of the file: nothing left to fetch
+                return
+            response.raise_for_status()
+            if "text/html" in response.headers.get("Content-Type", ""):
+                raise ValueError(f"Expected an archive from {url} but the server returned an HTML page")
+
+            # 206 means the server honoured the range; a plain 200 restarts from scratch
+            mode = "ab" if response.status_code == 206 else "wb"
+            if offset and mode == "wb":
+                logger.info("Server does not support resuming, restarting the download")
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=self.config.chunk_size):
+                    f.write(chunk)
+
+    def download_file(self, max_attempts: int = 5) -> str:
         '''
         Fetch data from the URL specified in the configuration.
+        Streams the archive into a .part file, resumes it with HTTP Range requests
+        after interruptions, verifies the configured checksum and skips the download
+        entirely when a valid archive is already present.
         Returns the path to the downloaded file.
         '''
-        try:
-            dataset_url = self.config.source_URL  # Get the data source URL from the config
-            zip_download_dir = self.config.local_data_file  # Path where the downloaded file will be saved
-            
-            # Create the directory for data ingestion if it doesn't exist
-            os.makedirs("artifacts/data_ingestion", exist_ok=True)
-            logger.info(f"Downloading data from {dataset_url} into file {zip_download_dir}")  # Log the download start
-
-            # Extract the file ID from the Google Drive URL
-            file_id = dataset_url.split("/")[-2]
-            # Construct the download link for gdown
-            prefix = 'https://drive.google.com/uc?/export=download&id='
-            
-            # Set up a requests session with retries and timeout
-            session = requests.Session()
-            retries = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-            adapter = HTTPAdapter(max_retries=retries)
-            session.mount("https://", adapter)
-            
-            with session:
-                # Use gdown with session to download the file
-                gdown.download(prefix + file_id, zip_download_dir, quiet=False)
-
-            logger.info(f"Downloaded data from {dataset_url} into file {zip_download_dir}")  # Log successful download
-
-        except requests.exceptions.ConnectTimeout:
-            logger.error("Connection timed out. Please check your internet connection or try again later.")
-        except Exception as e:
-            logger.error(f"An error occurred during download: {e}")
-            raise e  # Raise any other exceptions encountered during the download    
-
-    def extract_zip_file(self):
+        zip_download_dir = self.config.local_data_file  # Path where the downloaded file will be saved
+
+        # Nothing to do if a valid archive is already on disk
+        if self._is_valid_archive(zip_download_dir):
+            logger.info(f"Valid archive already present at {zip_download_dir} ({get_size(Path(zip_download_dir))}), skipping download")
+            return zip_download_dir
+
+        # Create the directory for data ingestion if it doesn't exist
+        os.makedirs(os.path.dirname(zip_download_dir) or ".", exist_ok=True)
+        dataset_url = self._resolve_download_url(self.config.source_URL)
+        part_path = f"{zip_download_dir}.part"
+        logger.info(f"Downloading data from {dataset_url} into file {zip_download_dir}")  # Log the download start
+
+        # Set up a requests session with retries for transient HTTP errors
+        session = requests.Session()
+        retries = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(max_retries=retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        with session:
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    self._stream_to_part_file(session, dataset_url, part_path)
+                    break
+                except (requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as e:
+                    # Keep the partial file so the next attempt resumes where this one stopped
+                    logger.warning(f"Download attempt {attempt}/{max_attempts} interrupted: {e}")
+                    if attempt == max_attempts:
+                        logger.error("Download failed. Please check your internet connection or try again later.")
+                        raise e
+                    time.sleep(min(2 ** attempt, 30))
+
+        # Verify the archive before putting it in place
+        if self.config.sha256:
+            checksum = self._sha256(part_path)
+            if checksum != self.config.sha256.lower():
+                os.remove(part_path)
+                raise ValueError(f"Checksum mismatch for {dataset_url}: expected {self.config.sha256}, got {checksum}")
+        elif not zipfile.is_zipfile(part_path):
+            os.remove(part_path)
+            raise ValueError(f"Downloaded file from {dataset_url} is not a valid zip archive")
+
+        os.replace(part_path, zip_download_dir)
+        logger.info(f"Downloaded data from {dataset_url} into file {zip_download_dir}")  # Log successful download
+        return zip_download_dir
+
+    def _member_path(self, name: str) -> str:
+        # Destination of an archive member; members must not escape the extraction directory
+        root = os.path.realpath(self.config.unzip_dir)
+        target = os.path.realpath(os.path.join(root, name))
+        if os.path.commonpath([root, target]) != root:
+            raise ValueError(f"Archive member {name} points outside {self.config.unzip_dir}")
+        return target
+
+    def _extract_members(self, names: list):
+        # Each worker opens its own handle so members decompress in parallel (zlib releases the GIL);
+        # the directories already exist, so the workers only write files
+        with zipfile.ZipFile(self.config.local_data_file, 'r') as zip_ref:
+            for name in names:
+                with zip_ref.open(name) as source, open(self._member_path(name), "wb") as target:
+                    shutil.copyfileobj(source, target, self.config.chunk_size)
+
+    def extract_zip_file(self, max_workers: int = None):
         """
         Extracts the zip file into the data directory specified in the configuration.
+        Compares the archive's central directory (names, sizes, CRCs) with a manifest
+        of what was extracted before and only extracts missing or changed members,
+        spread over a thread pool. Files dropped from the archive are removed.
         Function returns None.
         """
         unzip_path = self.config.unzip_dir  # Get the directory where the zip file will be extracted
         os.makedirs(unzip_path, exist_ok=True)  # Create the extraction directory if it doesn't exist
-        
-        # Open the zip file and extract its contents
+        manifest_path = os.path.join(unzip_path, ".extract_manifest.json")
+
+        # Read the central directory without decompressing anything
         with zipfile.ZipFile(self.config.local_data_file, 'r') as zip_ref:
-            zip_ref.extractall(unzip_path)  # Extract all files to the specified directory
\ No newline at end of file
+            members = {info.filename: [info.file_size, info.CRC] for info in zip_ref.infolist() if not info.is_dir()}
+
+        previous = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                previous = json.load(f)
+
+        # A member is up to date if it was extracted with the same size and CRC and is still on disk
+        def _is_current(name, entry):
+            target = os.path.join(unzip_path, name)
+            return previous.get(name) == entry and os.path.isfile(target) and os.path.getsize(target) == entry[0]
+
+        pending = [name for name, entry in members.items() if not _is_current(name, entry)]
+
+        # Remove files that were extracted before but are no longer in the archive
+        for name in set(previous) - set(members):
+            target = os.path.join(unzip_path, name)
+            if os.path.isfile(target):
+                os.remove(target)
+
+        if pending:
+            logger.info(f"Extracting {len(pending)} of {len(members)} archive members into {unzip_path}")
+            # Create every directory before the pool starts: workers creating the same class
+            # directory concurrently race in os.makedirs
+            for directory in sorted({os.path.dirname(self._member_path(name)) for name in pending}):
+                os.makedirs(directory, exist_ok=True)
+            workers = max_workers or min(32, os.cpu_count() or 1)
+            chunks = [pending[i::workers] for i in range(workers) if pending[i::workers]]
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                list(executor.map(self._extract_members, chunks))
+        else:
+            logger.info(f"All {len(members)} archive members already extracted in {unzip_path}, skipping extraction")
+
+        # Record what is now on disk for the next run
+        with open(manifest_path, "w") as f:
+            json.dump(members, f)
+
+    def pack_dataset(self, chunk_size: int = 256):
+        """
+        Decodes and resizes every extracted image once and stores the dataset as
+        memory-mappable uint8 arrays (images.npy, labels.npy) plus an index.json
+        with class names and file names, so training and evaluation can slice
+        images without decoding JPEGs.
+        Function returns None.
+        """
+        image_size = self.config.params_image_size
+        height, width = image_size[:2]
+
+        # List files in flow_from_directory order so the 80/20 split stays the same
+        filepaths, labels, class_names = list_image_files(self.config.data_dir)
+        logger.info(f"Packing {len(filepaths)} images from {self.config.data_dir} at {height}x{width}")
+
+        # Write into a temporary directory and swap it in once complete
+        tmp_dir = f"{self.config.packed_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        images = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, "images.npy"), mode="w+", dtype=np.uint8,
+            shape=(len(filepaths), height, width, 3)
+        )
+        for start in range(0, len(filepaths), chunk_size):
+            images[start:start + chunk_size] = decode_batch(filepaths[start:start + chunk_size], image_size)
+        images.flush()
+        del images
+
+        np.save(os.path.join(tmp_dir, "labels.npy"), np.asarray(labels, dtype=np.int32))
+        with open(os.path.join(tmp_dir, "index.json"), "w") as f:
+            json.dump({
+                "class_names": class_names,
+                "image_size": list(image_size),
+                "files": [os.path.relpath(path, self.config.data_dir) for path in filepaths]
+            }, f)
+
+        shutil.rmtree(self.config.packed_dir, ignore_errors=True)
+        os.replace(tmp_dir, self.config.packed_dir)
+        logger.info(f"Packed dataset written to {self.config.packed_dir}")
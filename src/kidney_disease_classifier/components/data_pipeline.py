@@ -0,0 +1,255 @@
+
+# import required libraries
+from __future__ import annotations
+import os
+import json
+import numpy as np
+from pathlib import Path
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.utils.preprocessing import decode_image, tf_normalize
+from kidney_disease_classifier.utils.runtime import data_parallel_calls
+from kidney_disease_classifier.utils.lazy import LazyModule
+
+# TensorFlow is imported on first use, so importing this module stays cheap
+tf = LazyModule("tensorflow")
+
+# Image extensions picked up from the class directories (same list as flow_from_directory)
+WHITE_LIST_FORMATS = ("png", "jpg", "jpeg", "bmp", "ppm", "tif", "tiff")
+
+
+def _subset_range(num_files: int, validation_split: float, subset: str):
+    # Range of one class's sorted files that belongs to the requested subset
+    if subset == "validation":
+        return 0, int(validation_split * num_files)
+    if subset == "training":
+        return int(validation_split * num_files), num_files
+    return 0, num_files
+
+
+def list_class_names(directory: Path) -> list:
+    """
+    Class names of a directory with one sub-folder per class, in label order (sorted,
+    as `flow_from_directory` numbers them). Only the top level is listed.
+
+    :param directory: Root directory containing one sub-directory per class.
+    :return: Sorted list of class names.
+    """
+    return sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+
+
+def packed_class_names(packed_dir: Path) -> list:
+    """
+    Class names of a packed dataset in label order, as recorded in its index.json.
+
+    :param packed_dir: Directory holding the packed dataset.
+    :return: List of class names.
+    """
+    with open(os.path.join(packed_dir, "index.json")) as f:
+        return json.load(f)["class_names"]
+
+
+def list_image_files(directory: Path, validation_split: float = 0.20, subset: str = None):
+    """
+    List image files and integer labels from a directory with one sub-folder per class.
+
+    Files are ordered and split exactly like `ImageDataGenerator.flow_from_directory`
+    with `validation_split`: the first `validation_split` fraction of every class
+    (in sorted order) is the validation subset and the rest is the training subset.
+
+    :param directory: Root directory containing one sub-directory per class.
+    :param validation_split: Fraction of each class reserved for validation.
+    :param subset: "training", "validation" or None for all files.
+    :return: Tuple of (filepaths, labels, class_names).
+    """
+    class_names = list_class_names(directory)
+
+    filepaths, labels = [], []
+    for label, class_name in enumerate(class_names):
+        class_dir = os.path.join(directory, class_name)
+        class_files = [
+            os.path.join(root, fname)
+            for root, _, files in sorted(os.walk(class_dir), key=lambda x: x[0])
+            for fname in sorted(files)
+            if fname.lower().endswith(WHITE_LIST_FORMATS)
+        ]
+
+        # Select the requested subset of this class
+        start, stop = _subset_range(len(class_files), validation_split, subset)
+        class_files = class_files[start:stop]
+
+        filepaths.extend(class_files)
+        labels.extend([label] * len(class_files))
+
+    return filepaths, labels, class_names
+
+
+def build_image_dataset(filepaths: list, labels: list, image_size: list, batch_size: int,
+                        shuffle: bool = False, cache: str = "", augment=None) -> tf.data.Dataset:
+    """
+    Build a batched tf.data pipeline that decodes and resizes images in parallel.
+
+    Decoding goes through the shared `decode_image` so the tensors are identical to
+    the generator backend and to serving.
+
+    :param filepaths: Image file paths.
+    :param labels: Integer class label for every file.
+    :param image_size: Model input size as [height, width, channels].
+    :param batch_size: Number of images per batch.
+    :param shuffle: Reshuffle the examples every epoch.
+    :param cache: "" for no cache, "memory" for an in-memory cache, otherwise a file
+                  path prefix for an on-disk cache of the decoded images.
+    :param augment: Optional batch augmentation function applied after normalization.
+    :return: Dataset yielding (float32 images in [0, 1], int32 labels) batches.
+    """
+    height, width = image_size[:2]
+    dataset = tf.data.Dataset.from_tensor_slices((list(map(str, filepaths)), labels))
+
+    # Without a cache, shuffle the (cheap) file names before decoding
+    if shuffle and not cache:
+        dataset = dataset.shuffle(len(filepaths), reshuffle_each_iteration=True)
+
+    def _load(path, label):
+        # Decode outside the graph with PIL; PIL releases the GIL so calls run in parallel
+        image = tf.numpy_function(
+            lambda p: decode_image(p.decode(), image_size), [path], tf.uint8
+        )
+        image.set_shape((height, width, 3))
+        return image, tf.cast(label, tf.int32)
+
+    dataset = dataset.map(_load, num_parallel_calls=data_parallel_calls(), deterministic=not shuffle)
+
+    # Cache the decoded uint8 images so later epochs skip JPEG decoding entirely
+    if cache == "memory":
+        dataset = dataset.cache()
+    elif cache:
+        os.makedirs(os.path.dirname(cache) or ".", exist_ok=True)
+        dataset = dataset.cache(cache)
+
+    if shuffle and cache:
+        dataset = dataset.shuffle(len(filepaths), reshuffle_each_iteration=True)
+
+    # Batch first so normalization runs vectorized over the whole batch
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(lambda images, y: (tf_normalize(images), y), num_parallel_calls=data_parallel_calls())
+
+    # Augment whole batches inside the input graph instead of image by image
+    if augment is not None:
+        dataset = dataset.map(lambda images, y: (augment(images), y), num_parallel_calls=data_parallel_calls())
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def train_valid_datasets(directory: Path, image_size: list, batch_size: int,
+                         validation_split: float = 0.20, cache: str = "", augment=None):
+    """
+    Build the training and validation tf.data pipelines with the 80/20 split.
+
+    :param directory: Root directory containing one sub-directory per class.
+    :param image_size: Model input size as [height, width, channels].
+    :param batch_size: Number of images per batch.
+    :param validation_split: Fraction of each class reserved for validation.
+    :param cache: Cache setting passed to `build_image_dataset`; on-disk caches get
+                  a per-subset suffix.
+    :param augment: Optional batch augmentation function for the training subset.
+    :return: Tuple of (train_dataset, valid_dataset, class_names).
+    """
+    datasets = {}
+    for subset in ("training", "validation"):
+        filepaths, labels, class_names = list_image_files(directory, validation_split, subset)
+        logger.info(f"Found {len(filepaths)} {subset} images belonging to {len(class_names)} classes")
+
+        subset_cache = cache if cache in ("", "memory") else f"{cache}_{subset}"
+        datasets[subset] = build_image_dataset(
+            filepaths, labels, image_size, batch_size,
+            shuffle=(subset == "training"),  # Shuffle training data only
+            cache=subset_cache,
+            augment=augment if subset == "training" else None  # Never augment validation data
+        )
+
+    return datasets["training"], datasets["validation"], class_names
+
+
+def load_packed_dataset(packed_dir: Path, validation_split: float = 0.20, subset: str = None):
+    """
+    Open a packed dataset written by `DataIngestion.pack_dataset` without copying it.
+
+    :param packed_dir: Directory holding images.npy, labels.npy and index.json.
+    :param validation_split: Fraction of each class reserved for validation.
+    :param subset: "training", "validation" or None for all images.
+    :return: Tuple of (memory-mapped uint8 images, labels, selected row indices, class_names).
+    """
+    images = np.load(os.path.join(packed_dir, "images.npy"), mmap_mode="r")
+    labels = np.load(os.path.join(packed_dir, "labels.npy"))
+    class_names = packed_class_names(packed_dir)
+
+    # Images are stored class by class in flow_from_directory order, so every class
+    # is a contiguous block and the split is a slice of each block
+    indices = []
+    for label in range(len(class_names)):
+        class_rows = np.flatnonzero(labels == label)
+        start, stop = _subset_range(len(class_rows), validation_split, subset)
+        indices.append(class_rows[start:stop])
+
+    return images, labels, np.concatenate(indices), class_names
+
+
+def build_packed_dataset(packed_dir: Path, image_size: list, batch_size: int, validation_split: float = 0.20,
+                         subset: str = None, shuffle: bool = False, augment=None) -> tf.data.Dataset:
+    """
+    Build a batched tf.data pipeline that slices pre-decoded images out of the packed
+    memory-mapped array, so no JPEG is decoded during training or evaluation.
+
+    :param packed_dir: Directory holding the packed dataset.
+    :param image_size: Model input size as [height, width, channels]; must match the packed images.
+    :param batch_size: Number of images per batch.
+    :param validation_split: Fraction of each class reserved for validation.
+    :param subset: "training", "validation" or None for all images.
+    :param shuffle: Reshuffle the examples every epoch.
+    :param augment: Optional batch augmentation function applied after normalization.
+    :return: Dataset yielding (float32 images in [0, 1], int32 labels) batches.
+    """
+    images, labels, indices, class_names = load_packed_dataset(packed_dir, validation_split, subset)
+    if list(images.shape[1:3]) != list(image_size[:2]):
+        raise ValueError(f"Packed images in {packed_dir} are {images.shape[1:3]}, expected {image_size[:2]}; "
+                         f"re-run the data packing stage")
+    logger.info(f"Found {len(indices)} packed {subset or 'all'} images belonging to {len(class_names)} classes")
+
+    def _gather(batch_indices):
+        # One sorted fancy-index read per batch straight from the page cache
+        batch_indices = np.sort(batch_indices)
+        return images[batch_indices], labels[batch_indices].astype(np.int32)
+
+    def _load(batch_indices):
+        batch_images, batch_labels = tf.numpy_function(_gather, [batch_indices], (tf.uint8, tf.int32))
+        batch_images.set_shape((None, *images.shape[1:]))
+        batch_labels.set_shape((None,))
+        return tf_normalize(batch_images), batch_labels
+
+    dataset = tf.data.Dataset.from_tensor_slices(indices)
+    if shuffle:
+        dataset = dataset.shuffle(len(indices), reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(_load, num_parallel_calls=data_parallel_calls(),
+                                            deterministic=not shuffle)
+
+    # Augment whole batches inside the input graph instead of image by image
+    if augment is not None:
+        dataset = dataset.map(lambda batch, y: (augment(batch), y), num_parallel_calls=data_parallel_calls())
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def packed_train_valid_datasets(packed_dir: Path, image_size: list, batch_size: int,
+                                validation_split: float = 0.20, augment=None):
+    """
+    Build the training and validation pipelines over the packed dataset with the 80/20 split.
+
+    :param packed_dir: Directory holding the packed dataset.
+    :param image_size: Model input size as [height, width, channels].
+    :param batch_size: Number of images per batch.
+    :param validation_split: Fraction of each class reserved for validation.
+    :param augment: Optional batch augmentation function for the training subset.
+    :return: Tuple of (train_dataset, valid_dataset, class_names).
+    """
+    train_dataset = build_packed_dataset(packed_dir, image_size, batch_size, validation_split, "training",
+                                         shuffle=True, augment=augment)
+    valid_dataset = build_packed_dataset(packed_dir, image_size, batch_size, validation_split, "validation")
+    _, _, _, class_names = load_packed_dataset(packed_dir, validation_split)
+    return train_dataset, valid_dataset, class_names
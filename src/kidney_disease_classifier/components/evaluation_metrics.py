@@ -0,0 +1,182 @@
+
+# import required libraries
+import numpy as np
+
+# Number of equal-width probability bins of the calibration curve
+CALIBRATION_BINS = 10
+
+
+def confusion_matrix(labels: np.ndarray, predictions: np.ndarray, num_classes: int) -> np.ndarray:
+    """
+    Count every (true class, predicted class) pair with one bincount.
+
+    :param labels: True class index of every image.
+    :param predictions: Predicted class index of every image.
+    :param num_classes: Number of classes.
+    :return: [num_classes, num_classes] matrix, rows are true classes.
+    """
+    return np.bincount(labels * num_classes + predictions, minlength=num_classes ** 2).reshape(num_classes, -1)
+
+
+def _safe_divide(numerator, denominator):
+    # Elementwise division that gives 0 where the denominator is 0 (e.g. a class never predicted)
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def roc_curve(is_positive: np.ndarray, scores: np.ndarray) -> tuple:
+    """
+    ROC curve of one class over all distinct score thresholds.
+
+    :param is_positive: Boolean array, True where the image belongs to the class.
+    :param scores: Predicted probability of the class for every image.
+    :return: Tuple of (false positive rates, true positive rates, thresholds), starting at (0, 0).
+    """
+    # Sort by descending score; a threshold sits at the last image of every run of equal scores
+    order = np.argsort(-scores, kind="stable")
+    scores, is_positive = scores[order], is_positive[order]
+    threshold_ends = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+
+    true_positives = np.cumsum(is_positive)[threshold_ends]
+    false_positives = (threshold_ends + 1) - true_positives
+    tpr = np.r_[0.0, _safe_divide(true_positives, true_positives[-1])]
+    fpr = np.r_[0.0, _safe_divide(false_positives, false_positives[-1])]
+    return fpr, tpr, np.r_[np.inf, scores[threshold_ends]]
+
+
+def roc_auc(is_positive: np.ndarray, scores: np.ndarray) -> float:
+    """
+    Area under the ROC curve (trapezoidal rule, ties handled as one threshold).
+    Returns None when the class has no positive or no negative images.
+    """
+    if is_positive.all() or not is_positive.any():
+        return None
+    fpr, tpr, _ = roc_curve(is_positive, scores)
+    return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+
+def average_precision(is_positive: np.ndarray, scores: np.ndarray) -> float:
+    """
+    Area under the precision-recall curve as average precision: the precision at
+    every threshold weighted by the recall it adds. None when there are no positives.
+    """
+    if not is_positive.any():
+        return None
+    order = np.argsort(-scores, kind="stable")
+    scores, is_positive = scores[order], is_positive[order]
+    threshold_ends = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+
+    true_positives = np.cumsum(is_positive)[threshold_ends]
+    precision = true_positives / (threshold_ends + 1)
+    recall = true_positives / true_positives[-1]
+    return float(np.sum(np.diff(np.r_[0.0, recall]) * precision))
+
+
+def calibration_curve(is_positive: np.ndarray, scores: np.ndarray, bins: int = CALIBRATION_BINS) -> tuple:
+    """
+    Reliability curve of one class: images are grouped into equal-width bins of
+    predicted probability and every bin compares its mean prediction with the
+    observed fraction of positives.
+
+    :return: Tuple of (list of per-bin dicts for non-empty bins, expected calibration error).
+    """
+    # Bin index of every image; a probability of exactly 1.0 falls in the last bin
+    bin_index = np.minimum((scores * bins).astype(np.int64), bins - 1)
+    counts = np.bincount(bin_index, minlength=bins)
+    mean_predicted = _safe_divide(np.bincount(bin_index, weights=scores, minlength=bins), counts)
+    fraction_positive = _safe_divide(np.bincount(bin_index, weights=is_positive, minlength=bins), counts)
+
+    # Expected calibration error: gap between prediction and outcome, weighted by bin size
+    ece = float(np.sum(counts * np.abs(mean_predicted - fraction_positive)) / len(scores))
+    curve = [
+        {
+            "bin_lower": index / bins,
+            "bin_upper": (index + 1) / bins,
+            "mean_predicted": float(mean_predicted[index]),
+            "fraction_positive": float(fraction_positive[index]),
+            "count": int(counts[index])
+        }
+        for index in np.flatnonzero(counts).tolist()
+    ]
+    return curve, ece
+
+
+def classification_report(labels: np.ndarray, probabilities: np.ndarray, class_names: list,
+                          positive_class: int) -> tuple:
+    """
+    Compute every evaluation metric from one matrix of predicted probabilities.
+
+    :param labels: True class index of every image.
+    :param probabilities: [images, classes] predicted probabilities.
+    :param class_names: Class name of every class index.
+    :param positive_class: Index of the class treated as positive (the disease) for
+        sensitivity, specificity, ROC-AUC, PR-AUC and calibration.
+    :return: Tuple of (scores dict with scalar and per-class metrics, calibration curve records).
+    """
+    num_classes = probabilities.shape[1]
+    predictions = np.argmax(probabilities, axis=1)
+    matrix = confusion_matrix(labels, predictions, num_classes)
+
+    # Per-class one-vs-rest counts, straight from the confusion matrix
+    true_positives = np.diag(matrix)
+    predicted = matrix.sum(axis=0)
+    support = matrix.sum(axis=1)
+    precision = _safe_divide(true_positives, predicted)
+    recall = _safe_divide(true_positives, support)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+
+    # One boolean column per class: does the image belong to it
+    one_hot = labels[:, None] == np.arange(num_classes)[None, :]
+    per_class = {
+        name: {
+            "precision": float(precision[index]),
+            "recall": float(recall[index]),
+            "f1": float(f1[index]),
+            "support": int(support[index]),
+            "roc_auc": roc_auc(one_hot[:, index], probabilities[:, index]),
+            "pr_auc": average_precision(one_hot[:, index], probabilities[:, index])
+        }
+        for index, name in enumerate(class_names)
+    }
+
+    # Sensitivity and specificity of the positive (disease) class against all others
+    is_positive = one_hot[:, positive_class]
+    negatives = len(labels) - support[positive_class]
+    false_positives = predicted[positive_class] - true_positives[positive_class]
+    calibration, ece = calibration_curve(is_positive, probabilities[:, positive_class])
+
+    scores = {
+        "accuracy": float(np.mean(predictions == labels)),
+        "positive_class": class_names[positive_class],
+        "sensitivity": float(recall[positive_class]),
+        "specificity": float(_safe_divide(negatives - false_positives, negatives)),
+        "roc_auc": per_class[class_names[positive_class]]["roc_auc"],
+        "pr_auc": per_class[class_names[positive_class]]["pr_auc"],
+        "expected_calibration_error": ece,
+        "macro_precision": float(np.mean(precision)),
+        "macro_recall": float(np.mean(recall)),
+        "macro_f1": float(np.mean(f1)),
+        "per_class": per_class,
+        # Rows are true classes, columns predicted classes
+        "confusion_matrix": {
+            true_name: {predicted_name: int(matrix[row, column]) for column, predicted_name in enumerate(class_names)}
+            for row, true_name in enumerate(class_names)
+        }
+    }
+    return scores, calibration
+
+
+def flatten_metrics(scores: dict, prefix: str = "") -> dict:
+    """
+    Flatten the nested numeric metrics into "per_class.Tumor.f1"-style keys for
+    MLflow, skipping strings and undefined (None) values.
+    """
+    flat = {}
+    for key, value in scores.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, prefix=f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
@@ -0,0 +1,165 @@
+
+# import required libraries
+from __future__ import annotations
+import os
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.utils.preprocessing import RESCALE_FACTOR, preprocess_batch
+from kidney_disease_classifier.utils.lazy import LazyModule
+
+# TensorFlow is imported on first use, so importing this module stays cheap
+tf = LazyModule("tensorflow")
+
+# Prefix given to the classification head layers by PrepareBaseModel
+HEAD_LAYER_PREFIX = "head_"
+
+
+def split_backbone_and_head(model: tf.keras.Model):
+    """
+    Split a full classification model into its frozen backbone and its head layers.
+
+    Head layers are recognised by the `head_` name prefix set in PrepareBaseModel.
+    Models prepared before the prefix existed end with `Flatten -> Dense`, so the
+    last two layers are treated as the head for them.
+
+    :param model: Full model (backbone followed by a sequential head).
+    :return: Tuple of (backbone model, list of head layers).
+    """
+    head_start = next(
+        (index for index, layer in enumerate(model.layers) if layer.name.startswith(HEAD_LAYER_PREFIX)),
+        len(model.layers) - 2
+    )
+    backbone = tf.keras.Model(inputs=model.input, outputs=model.layers[head_start - 1].output)
+    return backbone, model.layers[head_start:]
+
+
+def build_head_model(feature_shape: tuple, head_layers: list) -> tf.keras.Model:
+    """
+    Build a model that runs only the head layers on flattened cached features.
+
+    The head layers are shared with the full model, so training this model trains
+    the full model's classifier in place.
+
+    :param feature_shape: Shape of one backbone output (without the batch axis).
+    :param head_layers: Head layers of the full model, in order.
+    :return: Keras model taking (batch, prod(feature_shape)) features.
+    """
+    inputs = tf.keras.Input(shape=(int(np.prod(feature_shape)),))
+    outputs = tf.keras.layers.Reshape(feature_shape)(inputs)
+    for layer in head_layers:
+        outputs = layer(outputs)
+    return tf.keras.Model(inputs=inputs, outputs=outputs)
+
+
+class FeatureCache:
+    """
+    On-disk store of flattened backbone features keyed by image content hash.
+
+    Every backbone gets its own directory named after a fingerprint of its weights
+    and the input preprocessing, holding a raw float32 memory-mapped `features.dat`
+    and an `index.json` mapping file hashes to rows. Features are only computed for
+    images that are not in the store yet.
+    """
+
+    def __init__(self, cache_dir: Path, backbone: tf.keras.Model, image_size: list):
+        self.backbone = backbone
+        self.image_size = list(image_size)
+        self.feature_shape = tuple(int(dim) for dim in backbone.output.shape[1:])
+        self.feature_dim = int(np.prod(self.feature_shape))
+
+        # Each backbone/preprocessing combination gets its own store
+        self.cache_dir = Path(cache_dir) / self.model_fingerprint(backbone, self.image_size)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.features_path = self.cache_dir / "features.dat"
+        self.index_path = self.cache_dir / "index.json"
+
+        self.index = {}
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                self.index = json.load(f)["rows"]
+
+    @staticmethod
+    def model_fingerprint(backbone: tf.keras.Model, image_size: list) -> str:
+        """
+        Hash the backbone weights together with the input size, rescale factor and
+        the dtype the backbone computes in (features differ under mixed precision).
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([list(image_size), RESCALE_FACTOR, backbone.layers[-1].compute_dtype]).encode())
+        for weight in backbone.get_weights():
+            digest.update(np.ascontiguousarray(weight).tobytes())
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def file_hash(path) -> str:
+        """
+        Hash the raw bytes of an image file.
+        """
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def _save_index(self):
+        # Write to a temporary file first so an interrupted run never leaves a truncated index
+        temporary = self.index_path.with_suffix(".tmp")
+        with open(temporary, "w") as f:
+            json.dump({"feature_shape": list(self.feature_shape), "rows": self.index}, f)
+        os.replace(temporary, self.index_path)
+
+    def _discard_orphan_rows(self):
+        # Rows appended by a run that stopped before saving the index belong to no entry;
+        # new rows must start right after the indexed ones or they would map to stale features
+        if not self.features_path.exists():
+            return
+        indexed_bytes = len(self.index) * self.feature_dim * np.dtype(np.float32).itemsize
+        stored_bytes = self.features_path.stat().st_size
+        if stored_bytes > indexed_bytes:
+            logger.warning(f"Discarding {stored_bytes - indexed_bytes} bytes of unindexed features "
+                           f"in {self.features_path}")
+            os.truncate(self.features_path, indexed_bytes)
+        elif stored_bytes < indexed_bytes:
+            logger.warning(f"{self.features_path} is shorter than its index, rebuilding the feature store")
+            self.index = {}
+            os.truncate(self.features_path, 0)
+
+    def _extract(self, filepaths: list, batch_size: int):
+        # Run the frozen backbone once over the images missing from the store
+        with open(self.features_path, "ab") as store:
+            for start in range(0, len(filepaths), batch_size):
+                batch_paths = filepaths[start:start + batch_size]
+                images = preprocess_batch(batch_paths, self.image_size)
+                features = self.backbone.predict_on_batch(images).reshape(len(batch_paths), -1)
+                store.write(np.ascontiguousarray(features, dtype=np.float32).tobytes())
+
+    def get_features(self, filepaths: list, batch_size: int = 32) -> np.ndarray:
+        """
+        Return the flattened backbone features for the given images, computing and
+        storing any that are not cached yet.
+
+        :param filepaths: Image file paths.
+        :param batch_size: Batch size used for feature extraction.
+        :return: float32 array of shape (len(filepaths), feature_dim).
+        """
+        hashes = [self.file_hash(path) for path in filepaths]
+
+        # Append features for new images to the end of the store
+        missing = {}
+        for path, file_hash in zip(filepaths, hashes):
+            if file_hash not in self.index and file_hash not in missing:
+                missing[file_hash] = path
+        if missing:
+            logger.info(f"Extracting backbone features for {len(missing)} images into {self.cache_dir}")
+            self._discard_orphan_rows()
+            first_row = len(self.index)
+            self._extract(list(missing.values()), batch_size)
+            for offset, file_hash in enumerate(missing):
+                self.index[file_hash] = first_row + offset
+            self._save_index()
+        else:
+            logger.info(f"All {len(filepaths)} feature vectors found in {self.cache_dir}")
+
+        features = np.memmap(self.features_path, dtype=np.float32, mode="r",
+                             shape=(len(self.index), self.feature_dim))
+        return features[[self.index[file_hash] for file_hash in hashes]]
@@ -0,0 +1,355 @@
+
+# import required libraries
+import os
+import json
+import math
+import time
+import random
+import itertools
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.constants import OVERRIDES_ENV_VAR
+from kidney_disease_classifier.entity.config_entity import HyperparameterSweepConfig
+from kidney_disease_classifier.utils.common_functions import save_json
+from kidney_disease_classifier.utils.mlflow_logger import AsyncMlflowLogger
+
+# Validation metric trials are pruned and ranked on (higher is better)
+SWEEP_METRIC = "val_accuracy"
+
+# Sampled configurations are redrawn at most this many times per trial to avoid duplicates
+MAX_SAMPLING_ATTEMPTS = 100
+
+
+def _sample_value(key: str, spec, rng: random.Random):
+    # A list is a choice; a mapping names the distribution: choice, uniform or log_uniform
+    if isinstance(spec, list):
+        spec = {"choice": spec}
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise ValueError(f"Search space entry '{key}' must be a list or one of choice/uniform/log_uniform")
+    (kind, values), = spec.items()
+    if kind == "choice":
+        return rng.choice(list(values))
+    low, high = values
+    if kind == "uniform":
+        return float(f"{rng.uniform(low, high):.4g}")
+    if kind == "log_uniform":
+        return float(f"{math.exp(rng.uniform(math.log(low), math.log(high))):.3g}")
+    raise ValueError(f"Unknown distribution '{kind}' for search space entry '{key}'")
+
+
+def sample_search_space(search_space: dict, trials: int, seed: int = None) -> list:
+    """
+    Draw the configurations of a sweep.
+
+    When every entry is a choice and the grid has at most `trials` points, the whole
+    grid is returned; otherwise `trials` distinct random configurations are drawn.
+
+    :param search_space: Mapping of params.yaml key to a list of values or to
+        {"choice": [...]}, {"uniform": [low, high]} or {"log_uniform": [low, high]}.
+    :param trials: Number of configurations.
+    :param seed: Seed of the random draws.
+    :return: List of {key: value} dicts.
+    """
+    choices = {key: spec if isinstance(spec, list) else spec.get("choice")
+               for key, spec in search_space.items() if isinstance(spec, (list, dict))}
+    if all(values is not None for values in choices.values()) and len(choices) == len(search_space):
+        grid = [dict(zip(choices, values)) for values in itertools.product(*choices.values())]
+        if len(grid) <= trials:
+            return grid
+
+    rng = random.Random(seed)
+    configurations = []
+    for _ in range(trials):
+        for _ in range(MAX_SAMPLING_ATTEMPTS):
+            configuration = {key: _sample_value(key, spec, rng) for key, spec in search_space.items()}
+            if configuration not in configurations:
+                break
+        configurations.append(configuration)
+    return configurations
+
+
+def asha_promotable(values: list, value: float, reduction_factor: int) -> bool:
+    """
+    Asynchronous successive halving rule: a trial continues past a rung when its
+    value is among the top 1/reduction_factor of all values recorded at that rung
+    so far (its own included). The first trials to reach a rung always continue.
+    """
+    ranked = sorted(values, reverse=True)
+    keep = max(len(ranked) // reduction_factor, 1)
+    return value >= ranked[keep - 1]
+
+
+class AshaPruner:
+    """
+    Asynchronous successive halving (ASHA) shared by the trial processes of a sweep.
+
+    Rungs are at MIN_EPOCHS x REDUCTION_FACTOR^k epochs. A trial reaching a rung
+    records its validation accuracy there and stops unless it is among the top
+    1/REDUCTION_FACTOR of the trials that reached the rung before it, so poor
+    configurations use a few epochs instead of all of them. Decisions never wait
+    for other trials, which keeps every worker busy.
+
+    :param rungs: Shared dict (a multiprocessing Manager dict) of rung epoch to recorded values.
+    :param lock: Shared lock serializing the updates of `rungs`.
+    :param min_epochs: Epochs before the first rung.
+    :param reduction_factor: Keep the top 1/reduction_factor of trials at every rung.
+    """
+
+    def __init__(self, rungs, lock, min_epochs: int, reduction_factor: int):
+        self.rungs = rungs
+        self.lock = lock
+        self.min_epochs = min_epochs
+        self.reduction_factor = reduction_factor
+
+    def is_rung(self, epoch: int) -> bool:
+        rung = self.min_epochs
+        while rung < epoch:
+            rung *= self.reduction_factor
+        return rung == epoch
+
+    def report(self, trial: int, epoch: int, value: float) -> bool:
+        """
+        Record a trial's value after `epoch`; returns False when the trial should stop.
+        """
+        if not self.is_rung(epoch):
+            return True
+        # Manager dicts return copies, so the updated list is stored back
+        with self.lock:
+            values = list(self.rungs.get(epoch, [])) + [value]
+            self.rungs[epoch] = values
+        return asha_promotable(values, value, self.reduction_factor)
+
+
+def core_slots(workers: int, cores_per_trial: int = None) -> list:
+    """
+    Split the cores this process may run on into one set per parallel trial.
+
+    :param workers: Number of trials running at the same time.
+    :param cores_per_trial: Cores per trial (None: an even share; 0: no pinning).
+    :return: List of core lists, or of None (no pinning) per worker.
+    """
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if cores_per_trial == 0 or not available:
+        return [None] * workers
+    per_trial = cores_per_trial or max(len(available) // workers, 1)
+    if per_trial * workers > len(available):
+        logger.warning(f"{workers} trials x {per_trial} cores exceed the {len(available)} available cores, "
+                       "trials are not pinned")
+        return [None] * workers
+    return [available[index * per_trial:(index + 1) * per_trial] for index in range(workers)]
+
+
+def _run_trial(trial: int, params: dict, overrides: list, slots, pruner: AshaPruner, epochs: int) -> dict:
+    # Runs in a fresh worker process: take a free (cores, threads) slot, pin to it and train one configuration
+    cores, threads = slots.get()
+    start = time.perf_counter()
+    try:
+        if cores:
+            os.sched_setaffinity(0, cores)
+            overrides = overrides + [f"config.runtime.cpu_affinity={json.dumps(cores)}"]
+        # Like the local worker launcher, export the thread counts TensorFlow reads when it is imported
+        os.environ.update(TF_NUM_INTRAOP_THREADS=str(threads), TF_NUM_INTEROP_THREADS="2",
+                          OMP_NUM_THREADS=str(threads))
+        os.environ[OVERRIDES_ENV_VAR] = ";".join(
+            [item for item in os.environ.get(OVERRIDES_ENV_VAR, "").split(";") if item] + overrides)
+
+        # Imported here so the overrides and thread settings above are in place first
+        from kidney_disease_classifier.config.configuration import ConfigurationManager, configure_process
+        configure_process()
+        from kidney_disease_classifier.components.model_trainer import Training
+        from kidney_disease_classifier.components.callbacks import TrialPruning
+
+        training_config = ConfigurationManager().get_training_config()
+        training = Training(config=training_config)
+        training.get_base_model()
+        training.train_valid_generator()
+        pruning = TrialPruning(pruner, trial, epochs, monitor=SWEEP_METRIC)
+        training.train(extra_callbacks=[pruning])
+
+        scores = [epoch[SWEEP_METRIC] for epoch in pruning.history if SWEEP_METRIC in epoch]
+        return {
+            "trial": trial,
+            "params": params,
+            "status": "pruned" if pruning.pruned_at else "completed",
+            "epochs": len(pruning.history),
+            SWEEP_METRIC: max(scores) if scores else None,
+            "history": pruning.history,
+            "model_path": str(training_config.trained_model_path),
+            "cores": cores,
+            "seconds": time.perf_counter() - start
+        }
+    finally:
+        slots.put((cores, threads))
+
+
+class HyperparameterSweep:
+    """
+    Searches params.yaml values with parallel, early-pruned training trials.
+
+    Every trial trains the prepared base model on the ingested data with one sampled
+    configuration, applied as configuration overrides, in its own spawned process
+    pinned to its own cores. Trials report their validation accuracy every epoch to
+    a shared ASHA pruner, which stops the poor ones early. Each trial is logged as
+    a nested MLflow run under the sweep's run, and the report ranks all trials.
+    """
+
+    def __init__(self, config: HyperparameterSweepConfig):
+        # Store the configuration object passed during initialization
+        self.config = config
+
+    def _trial_overrides(self, trial: int, params: dict) -> list:
+        # Sampled values, plus private artifact paths so trials never touch the pipeline's model
+        trial_dir = self.config.root_dir / f"trial_{trial:03d}"
+        return [f"{key}={json.dumps(value)}" for key, value in params.items()] + [
+            f"config.training.root_dir={trial_dir}",
+            f"config.training.trained_model_path={trial_dir / 'model.h5'}",
+            f"config.training.checkpoint_dir={trial_dir / 'checkpoints'}",
+            f"config.training.telemetry_path={trial_dir / 'telemetry.jsonl'}",
+            # A checkpoint left by an earlier sweep belongs to another configuration
+            "CHECKPOINTING.RESUME=false",
+            # The sweep logs every trial as a nested run instead
+            "TELEMETRY.MLFLOW=false"
+        ]
+
+    def _start_parent_run(self, trials: int):
+        # Parent run of the sweep; None when MLflow logging is disabled
+        if not self.config.params_mlflow:
+            return None
+        parent = AsyncMlflowLogger(
+            tracking_uri=self.config.mlflow_uri,
+            experiment_name="Kidney Disease Classification Hyperparameter Sweep",
+            run_name="Kidney Disease Classification Sweep",
+            flush_timeout=self.config.mlflow_flush_timeout
+        )
+        parent.log_params({
+            "search_space": self.config.params_search_space,
+            "trials": trials,
+            "workers": self.config.params_workers,
+            "max_epochs": self.config.params_epochs,
+            "min_epochs": self.config.params_min_epochs,
+            "reduction_factor": self.config.params_reduction_factor
+        })
+        # The children need the parent's run id, which exists once the first operation is logged
+        parent.flush()
+        return parent
+
+    def _log_trial(self, parent, result: dict):
+        # Child run nested under the sweep's run, in the same store the parent ended up in
+        if parent is None:
+            return
+        child = AsyncMlflowLogger(
+            tracking_uri=parent.fallback_uri if parent.fell_back else parent.tracking_uri,
+            experiment_name=parent.experiment_name,
+            run_name=f"trial_{result['trial']:03d}",
+            flush_timeout=self.config.mlflow_flush_timeout
+        )
+        child.log_params(result["params"])
+        tags = {"trial_status": result["status"]}
+        if parent.run_id:
+            tags["mlflow.parentRunId"] = parent.run_id
+        child.set_tags(tags)
+        for epoch in result.get("history", []):
+            child.log_metrics({key: value for key, value in epoch.items() if key != "epoch"}, step=epoch["epoch"])
+        if result.get(SWEEP_METRIC) is not None:
+            child.log_metrics({f"best_{SWEEP_METRIC}": result[SWEEP_METRIC], "trial_seconds": result["seconds"]})
+        child.close()
+
+    def sweep(self) -> dict:
+        """
+        Run the sweep and write the report.
+
+        :return: Report dict with the best trial and every trial's params, status,
+            epochs, best validation accuracy and per-epoch history.
+        """
+        configurations = sample_search_space(self.config.params_search_space, self.config.params_trials,
+                                             self.config.params_seed)
+        workers = min(self.config.params_workers, len(configurations))
+        slots = core_slots(workers, self.config.params_cores_per_trial)
+        logger.info(f"Sweeping {len(configurations)} configurations with {workers} parallel trials, "
+                    f"cores per trial: {slots}")
+
+        parent = self._start_parent_run(len(configurations))
+        start = time.perf_counter()
+        results = []
+
+        # Spawned processes start without TensorFlow state; a fresh process per trial gets its own
+        # thread pools and affinity, which TensorFlow fixes once per process
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            free_slots = manager.Queue()
+            for cores in slots:
+                # Unpinned trials still split the cores' threads between them
+                free_slots.put((cores, len(cores) if cores else max((os.cpu_count() or 1) // workers, 1)))
+            pruner = AshaPruner(manager.dict(), manager.Lock(), self.config.params_min_epochs,
+                                self.config.params_reduction_factor)
+
+            # A single-use executor per trial gives every trial a fresh process
+            # (max_tasks_per_child=1 would need Python 3.11)
+            pending = list(enumerate(configurations))
+            running = {}
+            try:
+                while pending or running:
+                    # Cached features are written by the first trial; the others wait and read them
+                    limit = 1 if self.config.params_training_mode == "feature_cache" and not results else workers
+                    while pending and len(running) < limit:
+                        trial, params = pending.pop(0)
+                        executor = ProcessPoolExecutor(max_workers=1, mp_context=context)
+                        future = executor.submit(_run_trial, trial, params, self._trial_overrides(trial, params),
+                                                 free_slots, pruner, params.get("EPOCHS", self.config.params_epochs))
+                        running[future] = (trial, params, executor)
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        trial, params, executor = running.pop(future)
+                        # The trial's process exits once its only task is done
+                        executor.shutdown()
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            logger.exception(f"Trial {trial} failed: {e}")
+                            result = {"trial": trial, "params": params, "status": "failed", "epochs": 0,
+                                      SWEEP_METRIC: None, "history": [], "seconds": 0.0}
+                        results.append(result)
+                        logger.info(f"Trial {trial} {result['status']} after {result['epochs']} epochs: "
+                                    f"{params}, {SWEEP_METRIC} {result[SWEEP_METRIC]}")
+                        self._log_trial(parent, result)
+            finally:
+                # Interrupted sweeps wait for the trials still running before the manager goes away
+                for _, _, executor in running.values():
+                    executor.shutdown()
+
+        results.sort(key=lambda result: result["trial"])
+        scored = [result for result in results if result[SWEEP_METRIC] is not None]
+        best = max(scored, key=lambda result: result[SWEEP_METRIC]) if scored else None
+        report = {
+            "best": best and {key: best[key] for key in ("trial", "params", SWEEP_METRIC, "model_path")},
+            "seconds": time.perf_counter() - start,
+            # Time the same trials take one after another, and the epochs pruning saved
+            "trial_seconds": sum(result["seconds"] for result in results),
+            "epochs_trained": sum(result["epochs"] for result in results),
+            "epochs_budget": sum(result["params"].get("EPOCHS", self.config.params_epochs) for result in results),
+            "trials": results
+        }
+        save_json(path=Path(self.config.report_path), data=report)
+
+        logger.info("Sweep summary:\n" + "\n".join(
+            f"  trial {result['trial']:3d} {result['status']:<10} {result['epochs']:3d} epochs "
+            f"{SWEEP_METRIC} {result[SWEEP_METRIC] if result[SWEEP_METRIC] is not None else float('nan'):.4f}  "
+            f"{result['params']}" for result in results
+        ) + f"\n  {report['epochs_trained']}/{report['epochs_budget']} epochs trained in {report['seconds']:.1f}s "
+            f"({report['trial_seconds']:.1f}s of training in total)")
+        if best is not None:
+            overrides = " ".join(f"--set {key}={json.dumps(value)}" for key, value in best["params"].items())
+            logger.info(f"Best trial {best['trial']}: {SWEEP_METRIC} {best[SWEEP_METRIC]:.4f}; "
+                        f"train with it via `python main.py {overrides}` or copy the values to params.yaml")
+
+        if parent is not None:
+            if best is not None:
+                parent.log_params({f"best_{key}": value for key, value in best["params"].items()})
+                parent.log_metrics({f"best_{SWEEP_METRIC}": best[SWEEP_METRIC]})
+            parent.log_metrics({"sweep_seconds": report["seconds"], "epochs_trained": report["epochs_trained"]})
+            parent.log_artifact(self.config.report_path)
+            parent.close()
+        return report
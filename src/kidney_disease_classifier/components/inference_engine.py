@@ -0,0 +1,228 @@
+
+# import required libraries
+from __future__ import annotations
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.entity.config_entity import PredictionConfig
+from kidney_disease_classifier.utils.preprocessing import decode_image, normalize_batch
+from kidney_disease_classifier.utils.lazy import LazyModule
+
+# TensorFlow is imported on first use, so importing this module stays cheap
+tf = LazyModule("tensorflow")
+
+
+def _interpreter_class():
+    # Prefer the standalone LiteRT runtime when installed; tf.lite ships the same interpreter
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """
+    Callable wrapper around a TFLite interpreter that maps a normalized float32
+    batch to class probabilities, like calling the Keras model.
+
+    The input tensor is resized only when the batch size changes, and models with
+    integer input/output tensors are quantized/dequantized with their own scales.
+    """
+
+    def __init__(self, model_path, num_threads: int = None):
+        self.interpreter = _interpreter_class()(model_path=str(model_path), num_threads=num_threads)
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self._batch_size = None
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.asarray(batch, dtype=np.float32)
+        if len(batch) != self._batch_size:
+            self.interpreter.resize_tensor_input(self.input_details["index"], list(batch.shape))
+            self.interpreter.allocate_tensors()
+            self._batch_size = len(batch)
+
+        # Quantize the input for models exported with integer input tensors
+        input_dtype = self.input_details["dtype"]
+        if input_dtype != np.float32:
+            scale, zero_point = self.input_details["quantization"]
+            info = np.iinfo(input_dtype)
+            batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(input_dtype)
+
+        self.interpreter.set_tensor(self.input_details["index"], batch)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_details["index"])
+
+        # Dequantize integer outputs back to probabilities
+        if self.output_details["dtype"] != np.float32:
+            scale, zero_point = self.output_details["quantization"]
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class InferenceEngine:
+    """
+    Long-lived inference engine that loads the model once per process and
+    serves requests by grouping them into micro-batches.
+
+    Callers submit images from any thread; a single worker thread collects up to
+    ``params_max_batch_size`` pending images (or whatever arrived within
+    ``params_max_wait_ms``) and runs them through the model in one forward pass.
+    """
+
+    def __init__(self, config: PredictionConfig):
+        # Store the configuration object passed during initialization
+        self.config = config
+        self.image_size = tuple(config.params_image_size)
+
+        # Queue of (image array, future) pairs waiting to be batched
+        self._requests = queue.Queue()
+        self._worker = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Load the model, warm it up and start the batching worker thread.
+        Calling start on an already running engine is a no-op.
+        """
+        with self._lock:
+            if self._running:
+                return self
+
+            logger.info(f"Loading model for inference from {self.config.model_path}")
+            if str(self.config.model_path).endswith(".tflite"):
+                # Quantized export: run it in a multi-threaded TFLite interpreter
+                self.model = TFLiteModel(self.config.model_path, self.config.params_num_threads)
+                self._forward = self.model
+            else:
+                self.model = tf.keras.models.load_model(self.config.model_path)
+
+                # Trace the forward pass once for a variable batch dimension so that
+                # every batch size reuses the same graph instead of running eagerly
+                forward = tf.function(
+                    lambda batch: self.model(batch, training=False),
+                    input_signature=[tf.TensorSpec(shape=(None, *self.image_size), dtype=tf.float32)]
+                )
+                self._forward = lambda batch: forward(batch).numpy()
+            self._warmup()
+
+            # Start the background worker that drains the request queue
+            self._running = True
+            self._worker = threading.Thread(target=self._serve_forever, name="inference-engine", daemon=True)
+            self._worker.start()
+            logger.info("Inference engine started")
+        return self
+
+    def _warmup(self):
+        # Run a dummy batch so the first real request does not pay for graph tracing
+        start = time.perf_counter()
+        self._forward(np.zeros((1, *self.image_size), dtype=np.float32))
+        logger.info(f"Inference engine warmed up in {time.perf_counter() - start:.3f}s")
+
+    def close(self):
+        """
+        Stop the worker thread once all pending requests have been served.
+        """
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            # Wake the worker up so it notices the shutdown flag
+            self._requests.put(None)
+        self._worker.join()
+
+    def submit(self, image) -> Future:
+        """
+        Queue a single image for prediction.
+
+        :param image: File path, encoded bytes, PIL image or numpy array (raw 0-255 pixel values).
+        :return: Future resolving to the class probabilities for this image.
+        """
+        if not self._running:
+            self.start()
+
+        future = Future()
+        # Decode in the caller's thread so decoding runs in parallel across requests
+        self._requests.put((decode_image(image, self.image_size), future))
+        return future
+
+    def predict(self, images) -> np.ndarray:
+        """
+        Predict class probabilities for a list of images.
+
+        :param images: List of file paths, encoded bytes, PIL images or numpy arrays.
+        :return: Array of shape (len(images), classes) with per-image probabilities.
+        """
+        futures = [self.submit(image) for image in images]
+        return np.stack([future.result() for future in futures])
+
+    def _collect_batch(self):
+        # Block until the first request arrives, then keep collecting until the
+        # batch is full or the wait budget is spent
+        first = self._requests.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = time.perf_counter() + self.config.params_max_wait_ms / 1000.0
+        while len(batch) < self.config.params_max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the shutdown marker back so the loop exits after this batch
+                self._requests.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _serve_forever(self):
+        while self._running or not self._requests.empty():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            arrays, futures = zip(*batch)
+            try:
+                # Normalize the whole batch at once right before the forward pass
+                probabilities = self._forward(normalize_batch(np.stack(arrays)))
+            except Exception as e:
+                logger.exception(f"Inference failed for a batch of {len(batch)} images: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, probs in zip(futures, probabilities):
+                future.set_result(probs)
+
+
+# Process-wide registry so every caller shares one loaded model per model path
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_inference_engine(config: PredictionConfig) -> InferenceEngine:
+    """
+    Return the running inference engine for the configured model, creating and
+    starting it on first use.
+
+    :param config: Prediction configuration.
+    :return: Started InferenceEngine instance shared by the whole process.
+    """
+    key = str(config.model_path)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = InferenceEngine(config)
+            _engines[key] = engine
+    return engine.start()
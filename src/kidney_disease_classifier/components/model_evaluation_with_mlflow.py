@@ -1,29 +1,63 @@
 # Import necessary libraries
-import mlflow
-import mlflow.keras
-import tensorflow as tf
+from __future__ import annotations
+import numpy as np
 from pathlib import Path
-from urllib.parse import urlparse
 from kidney_disease_classifier.constants import *
 from kidney_disease_classifier.utils.common_functions import read_yaml, create_directories, save_json
 from kidney_disease_classifier.entity.config_entity import EvaluationConfig
+from kidney_disease_classifier.utils.preprocessing import RESCALE_FACTOR, INTERPOLATION
+from kidney_disease_classifier.components.data_pipeline import (list_image_files, list_class_names,
+                                                                packed_class_names, build_image_dataset,
+                                                                build_packed_dataset)
+from kidney_disease_classifier.components.evaluation_metrics import classification_report, flatten_metrics
+from kidney_disease_classifier.utils.mlflow_logger import AsyncMlflowLogger
+from kidney_disease_classifier.utils.lazy import LazyModule
+
+# TensorFlow is imported on first use, so importing this module stays cheap
+tf = LazyModule("tensorflow")
 
 class Evaluation:
-    def __init__(self, config: EvaluationConfig):
+    def __init__(self, config: EvaluationConfig, model: tf.keras.Model = None, valid_data=None):
         """
         Initialize the Evaluation class with the provided configuration.
 
         :param config: Configuration object containing evaluation settings.
+        :param model: Trained model already in memory (loaded from path_of_model when None).
+        :param valid_data: Unshuffled validation batches already built by training, as a
+            tf.data.Dataset or ImageDataGenerator iterator (rebuilt from disk when None).
         """
         self.config = config
+        self.model = model
+        self.valid_generator = valid_data
 
     def _valid_generator(self):
         """
         Create a validation data generator to preprocess images for evaluation.
         """
+        # Read pre-decoded images from the packed dataset when selected in params.yaml
+        if self.config.params_input_pipeline == "packed":
+            self.valid_generator = build_packed_dataset(
+                packed_dir=self.config.packed_data,  # Directory containing the packed dataset
+                image_size=self.config.params_image_size,  # Expected size of the packed images
+                batch_size=self.config.params_batch_size,  # Batch size
+                validation_split=0.20,
+                subset="validation"
+            )
+            return
+
+        # Decode the validation images with tf.data when selected in params.yaml
+        if self.config.params_input_pipeline == "tf_data":
+            filepaths, labels, _ = list_image_files(self.config.training_data, 0.20, "validation")
+            self.valid_generator = build_image_dataset(
+                filepaths, labels,
+                image_size=self.config.params_image_size,  # Target size of the images
+                batch_size=self.config.params_batch_size  # Batch size
+            )
+            return
+
         # Arguments for data normalization
         datagenerator_kwargs = dict(
-            rescale=1.0 / 255,  # Normalize pixel values to [0, 1]
+            rescale=RESCALE_FACTOR,  # Normalize pixel values to [0, 1]
             validation_split=0.20,
         )
 
@@ -31,7 +65,7 @@ class Evaluation:
         dataflow_kwargs = dict(
             target_size=self.config.params_image_size[:-1],  # Target size excluding channels
             batch_size=self.config.params_batch_size,  # Batch size
-            interpolation="bilinear"  # Bilinear interpolation for resizing
+            interpolation=INTERPOLATION  # Bilinear interpolation for resizing
         )
 
         # Create a Keras ImageDataGenerator for validation data
@@ -46,6 +80,17 @@ class Evaluation:
             **dataflow_kwargs
         )
 
+    def class_names(self) -> list:
+        """
+        Class names in the label order of the validation data: from the packed
+        dataset's index for the packed pipeline, otherwise the sorted class folders.
+
+        :return: List of class names.
+        """
+        if self.config.params_input_pipeline == "packed":
+            return packed_class_names(self.config.packed_data)
+        return list_class_names(self.config.training_data)
+
     @staticmethod
     def load_model(path: Path) -> tf.keras.Model:
         """
@@ -54,27 +99,60 @@ class Evaluation:
         :param path: Path to the model file.
         :return: Loaded Keras model.
         """
-        return tf.keras.models.load_model(path)
+        # Evaluation only runs forward passes, so skip restoring the optimizer
+        return tf.keras.models.load_model(path, compile=False)
 
-    def evaluation(self):
+    def predict(self, data) -> tuple:
         """
-        Evaluate the model on the validation data and compute metrics.
+        Run the model once over every validation batch.
+
+        :param data: tf.data.Dataset or ImageDataGenerator iterator of (images, labels) batches.
+        :return: Tuple of (int labels, class probabilities) for every validation image, in order.
         """
-        # Load the trained model
-        self.model = self.load_model(self.config.path_of_model)
+        # One traced forward pass for every batch size
+        forward = tf.function(lambda batch: self.model(batch, training=False), reduce_retracing=True)
 
-        # Compile the model with updated metrics
-        self.model.compile(
-            optimizer="adam",  # Adam optimizer
-            loss="sparse_categorical_crossentropy",  # Loss for multi-class classification
-            metrics=["accuracy"]  # Updated metrics
-        )
+        # ImageDataGenerator iterators repeat forever, so read exactly one pass of their batches
+        batches = data if isinstance(data, tf.data.Dataset) else (data[i] for i in range(len(data)))
 
-        # Prepare the validation data generator
-        self._valid_generator()
+        labels, probabilities = [], []
+        for images, batch_labels in batches:
+            probabilities.append(forward(images).numpy())
+            labels.append(np.asarray(batch_labels).astype(np.int64))
+        return np.concatenate(labels), np.concatenate(probabilities)
 
-        # Evaluate the model on the validation data
-        self.score = self.model.evaluate(self.valid_generator)
+    def evaluation(self):
+        """
+        Evaluate the model on the validation data and compute metrics from a single
+        batched pass that keeps every label, prediction and probability.
+        """
+        # Reuse the model handed over by training, otherwise load the trained model
+        if self.model is None:
+            self.model = self.load_model(self.config.path_of_model)
+
+        # Reuse the validation batches handed over by training, otherwise build them
+        if self.valid_generator is None:
+            self._valid_generator()
+
+        # Predict the whole validation split once
+        self.labels, self.probabilities = self.predict(self.valid_generator)
+        self.predictions = np.argmax(self.probabilities, axis=1)
+
+        # Sparse categorical cross-entropy and accuracy, as model.evaluate would report them
+        true_class_probabilities = self.probabilities[np.arange(len(self.labels)), self.labels]
+        loss = float(np.mean(-np.log(np.clip(true_class_probabilities, 1e-7, 1.0))))
+        accuracy = float(np.mean(self.predictions == self.labels))
+        self.score = [loss, accuracy]
+
+        # Every other metric comes from the same probability matrix, with no further inference
+        class_names = self.class_names()
+        metrics, self.calibration = classification_report(
+            labels=self.labels,
+            probabilities=self.probabilities,
+            class_names=class_names,
+            positive_class=class_names.index(self.config.params_positive_class)
+        )
+        self.scores = {"loss": loss, **metrics}
 
         # Save evaluation scores
         self.save_score()
@@ -85,46 +163,39 @@ class Evaluation:
 
         :return: None
         """
-        # Map evaluation metrics to their respective names
-        scores = {
-            "loss": self.score[0],
-            "accuracy": self.score[1],
-        }
-        # Save scores to a JSON file
-        save_json(path=Path("scores.json"), data=scores)
+        # Save loss, accuracy and the clinical metrics to a JSON file (DVC metrics)
+        save_json(path=Path("scores.json"), data=self.scores)
+
+        # Save the reliability curve of the positive class (DVC plot)
+        save_json(path=Path("calibration.json"), data={"calibration": self.calibration})
 
     def log_into_mlflow(self):
         """
         Log evaluation metrics and model to MLflow for tracking and versioning.
+
+        Logging runs in the background; when the tracking server is unreachable or
+        slow the run is written to the local ./mlruns store for a later sync.
         """
-        # Set the MLflow tracking URI
-        mlflow.set_registry_uri(self.config.mlflow_uri)
-
-        # Determine the type of storage used for MLflow tracking
-        tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
-
-        # Set the experiment name
-        experiment_name = "Kidney Disease Classification Model Evaluation"
-        mlflow.set_experiment(experiment_name)
-
-        # Start a new MLflow run
-        with mlflow.start_run(run_name="Kidney Disease Classification"):
-            # Log all hyperparameters from the configuration
-            mlflow.log_params(self.config.all_params)
-
-            # Log evaluation metrics
-            mlflow.log_metrics({
-                "loss": self.score[0],
-                "accuracy": self.score[1],
-            })
-
-            # Log the model depending on the tracking URL type
-            if tracking_url_type_store != "file":
-                # Register the model with MLflow if not using file-based tracking
-                mlflow.keras.log_model(self.model, "model", registered_model_name="VGG16Model")
-            else:
-                # Log the model without registration for file-based tracking
-                mlflow.keras.log_model(self.model, "model")
-
-            # End the MLflow run
-            mlflow.end_run()
\ No newline at end of file
+        # Start a new MLflow run on the configured tracking server
+        mlflow_logger = AsyncMlflowLogger(
+            tracking_uri=self.config.mlflow_uri,
+            experiment_name="Kidney Disease Classification Model Evaluation",
+            run_name="Kidney Disease Classification",
+            flush_timeout=self.config.mlflow_flush_timeout
+        )
+
+        # Log all hyperparameters from the configuration
+        mlflow_logger.log_params(self.config.all_params)
+
+        # Log every numeric evaluation metric, and the curve and confusion matrix as artifacts
+        mlflow_logger.log_metrics(flatten_metrics(self.scores))
+        mlflow_logger.log_dict({"calibration": self.calibration}, "calibration.json")
+        mlflow_logger.log_dict(self.scores["confusion_matrix"], "confusion_matrix.json")
+
+        # Upload the saved model file as is instead of serializing the model again,
+        # and register it when the tracking server has a model registry
+        mlflow_logger.log_artifact(self.config.path_of_model, "model")
+        mlflow_logger.register_model("model", "VGG16Model")
+
+        # End the MLflow run, waiting at most the logger's flush timeout
+        mlflow_logger.close()
\ No newline at end of file
@@ -0,0 +1,120 @@
+
+# import required libraries
+from __future__ import annotations
+import os
+import time
+import numpy as np
+from pathlib import Path
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.utils.common_functions import save_json
+from kidney_disease_classifier.utils.preprocessing import normalize_batch
+from kidney_disease_classifier.components.data_pipeline import load_packed_dataset
+from kidney_disease_classifier.components.inference_engine import TFLiteModel
+from kidney_disease_classifier.entity.config_entity import ModelQuantizationConfig
+from kidney_disease_classifier.utils.lazy import LazyModule
+
+# TensorFlow is imported on first use, so importing this module stays cheap
+tf = LazyModule("tensorflow")
+
+# Number of validation images timed one by one to measure per-image latency
+LATENCY_SAMPLES = 50
+
+
+class ModelQuantization:
+    """
+    Exports the trained Keras model to TFLite with post-training quantization and
+    validates every variant against the float32 Keras model.
+    """
+
+    def __init__(self, config: ModelQuantizationConfig):
+        # Store the configuration object passed during initialization
+        self.config = config
+
+    def _representative_dataset(self):
+        # Yield a random sample of training images, preprocessed exactly like training,
+        # so the converter can calibrate the INT8 activation ranges
+        images, _, indices, _ = load_packed_dataset(self.config.packed_data, subset="training")
+        rng = np.random.default_rng(0)
+        sample = rng.choice(indices, size=min(self.config.params_calibration_samples, len(indices)), replace=False)
+        for index in np.sort(sample):
+            yield [normalize_batch(images[index:index + 1])]
+
+    def convert(self, model: tf.keras.Model, mode: str) -> Path:
+        """
+        Convert the Keras model to a quantized TFLite model.
+
+        :param model: Trained Keras model.
+        :param mode: "dynamic" (int8 weights, float activations), "float16" (float16
+            weights) or "int8" (int8 weights and activations with float input/output).
+        :return: Path of the written .tflite file.
+        """
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        if mode == "float16":
+            converter.target_spec.supported_types = [tf.float16]
+        elif mode == "int8":
+            converter.representative_dataset = self._representative_dataset
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        elif mode != "dynamic":
+            raise ValueError(f"Unknown quantization mode '{mode}', expected dynamic, float16 or int8")
+
+        tflite_path = Path(self.config.root_dir) / f"model_{mode}.tflite"
+        tflite_path.write_bytes(converter.convert())
+        logger.info(f"Exported {mode} TFLite model to {tflite_path}")
+        return tflite_path
+
+    def _validate(self, predict, images, labels, indices) -> dict:
+        # Accuracy over the whole validation split, batched like evaluation
+        batch_size = self.config.params_batch_size
+        correct = 0
+        for start in range(0, len(indices), batch_size):
+            rows = indices[start:start + batch_size]
+            probabilities = predict(normalize_batch(images[rows]))
+            correct += int(np.sum(np.argmax(probabilities, axis=1) == labels[rows]))
+
+        # Per-image latency at batch size 1, after one warm-up call
+        timed = indices[:LATENCY_SAMPLES]
+        predict(normalize_batch(images[timed[:1]]))
+        latencies = []
+        for index in timed:
+            batch = normalize_batch(images[index:index + 1])
+            start = time.perf_counter()
+            predict(batch)
+            latencies.append(time.perf_counter() - start)
+
+        return {
+            "accuracy": correct / len(indices),
+            "latency_ms_mean": float(np.mean(latencies) * 1000),
+            "latency_ms_p95": float(np.percentile(latencies, 95) * 1000)
+        }
+
+    def quantize(self):
+        """
+        Export every configured TFLite variant, re-run the validation split on each
+        of them and write accuracy delta, model size and per-image latency to the
+        report. Function returns None.
+        """
+        model = tf.keras.models.load_model(self.config.trained_model_path, compile=False)
+        images, labels, indices, _ = load_packed_dataset(self.config.packed_data, subset="validation")
+        logger.info(f"Validating quantized variants on {len(indices)} images")
+
+        # Reference: the float32 Keras model, traced once for a variable batch size
+        forward = tf.function(lambda batch: model(batch, training=False))
+        baseline = self._validate(lambda batch: forward(batch).numpy(), images, labels, indices)
+        baseline["size_mb"] = os.path.getsize(self.config.trained_model_path) / 2 ** 20
+        report = {"keras_float32": baseline}
+
+        for mode in self.config.params_quantization_modes:
+            tflite_path = self.convert(model, mode)
+            interpreter = TFLiteModel(tflite_path, self.config.params_num_threads)
+            result = self._validate(interpreter, images, labels, indices)
+            result["size_mb"] = os.path.getsize(tflite_path) / 2 ** 20
+            result["accuracy_delta"] = result["accuracy"] - baseline["accuracy"]
+            result["speedup"] = baseline["latency_ms_mean"] / result["latency_ms_mean"]
+            result["path"] = str(tflite_path)
+            report[mode] = result
+            logger.info(f"{mode}: accuracy {result['accuracy']:.4f} ({result['accuracy_delta']:+.4f}), "
+                        f"{result['size_mb']:.1f} MB, {result['latency_ms_mean']:.2f} ms/image")
+
+        save_json(path=Path(self.config.report_path), data=report)
@@ -1,43 +1,154 @@
 
 # import libraries
+from __future__ import annotations
 import os
+import json
 import time
-import tensorflow as tf
+import shutil
+import hashlib
+import dataclasses
 from pathlib import Path
-from zipfile import ZipFile
-import urllib.request as request
+from kidney_disease_classifier import logger
 from kidney_disease_classifier.entity.config_entity import TrainingConfig
+from kidney_disease_classifier.components.data_pipeline import (train_valid_datasets, list_image_files,
+                                                                packed_train_valid_datasets)
+from kidney_disease_classifier.components.feature_cache import (FeatureCache, build_head_model,
+                                                                split_backbone_and_head)
+from kidney_disease_classifier.components.augmentation import build_batch_augmentation
+from kidney_disease_classifier.utils.preprocessing import RESCALE_FACTOR, INTERPOLATION
+from kidney_disease_classifier.utils.distributed import build_strategy, is_chief
+from kidney_disease_classifier.utils.mlflow_logger import AsyncMlflowLogger
+from kidney_disease_classifier.utils.lazy import LazyModule
+
+# TensorFlow is imported on first use, so importing this module stays cheap
+tf = LazyModule("tensorflow")
+
+# CPU flags that provide native arithmetic for each mixed precision policy
+MIXED_PRECISION_CPU_FLAGS = {
+    "mixed_bfloat16": ("avx512_bf16", "amx_bf16"),
+    "mixed_float16": ("avx512_fp16", "amx_fp16"),
+}
+
+
+def mixed_precision_supported(policy: str) -> bool:
+    """
+    Check whether the policy runs natively here: on any GPU, or on a CPU that has
+    the bf16/fp16 instructions (without them the casts make training slower).
+    """
+    if tf.config.list_physical_devices("GPU"):
+        return True
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read().split()
+    except OSError:
+        return False
+    return any(flag in flags for flag in MIXED_PRECISION_CPU_FLAGS[policy])
+
+
+def apply_dtype_policy(model: tf.keras.Model, policy: str) -> tf.keras.Model:
+    """
+    Rebuild a model with every layer under the given dtype policy and copy its weights.
+
+    The output layer always stays float32 so the softmax and the loss are computed
+    in full precision. Variables are float32 under every policy, so the weights
+    carry over unchanged in both directions.
+
+    :param model: Functional Keras model.
+    :param policy: "float32", "mixed_float16" or "mixed_bfloat16".
+    :return: New model with the same weights.
+    """
+    config = model.get_config()
+    output_layer = model.layers[-1].name
+    for layer in config["layers"]:
+        if layer["class_name"] != "InputLayer" and layer["config"]["name"] != output_layer:
+            layer["config"]["dtype"] = policy
+
+    # The model's own policy (which decides loss scaling) follows the global policy
+    previous_policy = tf.keras.mixed_precision.global_policy()
+    tf.keras.mixed_precision.set_global_policy(policy)
+    try:
+        rebuilt = tf.keras.Model.from_config(config)
+    finally:
+        tf.keras.mixed_precision.set_global_policy(previous_policy)
+    rebuilt.set_weights(model.get_weights())
+    return rebuilt
 
-# For binary classification
 
 class Training:
     def __init__(self, config: TrainingConfig):
         # Initialize the Training class with a TrainingConfig object
         self.config = config
 
+        # Create the distribution strategy first: multi-worker training must set up
+        # its collectives before any other TensorFlow op runs
+        self.strategy = build_strategy(self.config.params_distribution)
+        self.num_replicas = self.strategy.num_replicas_in_sync
+
+        # BATCH_SIZE is per replica; every step consumes one global batch split across the replicas
+        self.batch_size = self.config.params_batch_size * self.num_replicas
+        if self.num_replicas > 1:
+            logger.info(f"Training on {self.num_replicas} replicas with a global batch size of {self.batch_size}")
+
     def get_base_model(self):
+        # Build and compile the model under the strategy scope so its variables are mirrored
+        with self.strategy.scope():
+            self._load_and_compile()
+
+    def _load_and_compile(self):
         # Load the base model from the specified path in the configuration
         self.model = tf.keras.models.load_model(self.config.updated_base_model_path)
 
+        # Switch to a mixed precision policy when requested and supported by the hardware
+        self.mixed_precision = self.config.params_performance["MIXED_PRECISION"]
+        if self.mixed_precision and not mixed_precision_supported(self.mixed_precision):
+            logger.warning(f"{self.mixed_precision} is not natively supported on this machine, training in float32")
+            self.mixed_precision = None
+        if self.mixed_precision:
+            logger.info(f"Training with the {self.mixed_precision} policy")
+            self.model = apply_dtype_policy(self.model, self.mixed_precision)
+
         # Compile the model with an optimizer and loss function suitable for the task
         self.model.compile(
-            optimizer=tf.keras.optimizers.Adam(),  # Using Adam optimizer for training
+            optimizer=tf.keras.optimizers.Adam(learning_rate=self.config.params_learning_rate),  # Adam with LEARNING_RATE
             loss='sparse_categorical_crossentropy',  # Loss function for multi-class classification with integer labels
-            metrics = ["accuracy"]  # Track accuracy as a performance metric
+            metrics = ["accuracy"],  # Track accuracy as a performance metric
+            **self._compile_kwargs()  # XLA and steps_per_execution settings
+        )
+
+    def _compile_kwargs(self) -> dict:
+        # Graph compilation options from the PERFORMANCE params
+        performance = self.config.params_performance
+        return dict(
+            jit_compile=performance["JIT_COMPILE"],  # Compile the train step with XLA
+            steps_per_execution=performance["STEPS_PER_EXECUTION"]  # Train steps per compiled call
         )
 
     def train_valid_generator(self):
+        # Train only the head on cached backbone features when selected in params.yaml
+        if self.config.params_training_mode == "feature_cache":
+            return self.train_valid_features()
+
+        # Use a tf.data input pipeline instead of ImageDataGenerator when selected in params.yaml
+        if self.config.params_input_pipeline in ("tf_data", "packed"):
+            return self.train_valid_dataset()
+
+        # Distributed training shards tf.data datasets across replicas; the tf_data pipeline
+        # decodes and resizes exactly like ImageDataGenerator
+        if self.config.params_distribution["STRATEGY"]:
+            logger.warning("ImageDataGenerator cannot be distributed, using the tf_data input pipeline")
+            return self.train_valid_dataset()
+
         # Set up data generator arguments for preprocessing the images
         datagenerator_kwargs = dict(
-            rescale=1.0 / 255,  # Normalize the pixel values to the range [0, 1]
+            rescale=RESCALE_FACTOR,  # Normalize the pixel values to the range [0, 1]
             validation_split=0.20  # Use 20% of the data for validation
         )
 
         # Set up data flow arguments for resizing images and defining batch size
         dataflow_kwargs = dict(
             target_size=self.config.params_image_size[:-1],  # Resize images to specified dimensions (excluding channels)
-            batch_size=self.config.params_batch_size,  # Set the batch size for training and validation
-            interpolation="bilinear"  # Set the interpolation method for resizing images
+            batch_size=self.batch_size,  # Set the batch size for training and validation
+            interpolation=INTERPOLATION  # Set the interpolation method for resizing images
         )
 
         # Create a validation data generator
@@ -55,13 +166,14 @@ class Training:
         # Create a training data generator with or without augmentation
         if self.config.params_is_augmentation:
             # If augmentation is enabled, configure the data generator with augmentation techniques
+            augmentation = self.config.params_augmentation
             train_datagenerator = tf.keras.preprocessing.image.ImageDataGenerator(
-                rotation_range=40,  # Randomly rotate images within a range
-                horizontal_flip=True,  # Randomly flip images horizontally
-                width_shift_range=0.2,  # Randomly shift images horizontally
-                height_shift_range=0.2,  # Randomly shift images vertically
-                shear_range=0.2,  # Apply random shearing transformations
-                zoom_range=0.2,  # Randomly zoom into images
+                rotation_range=augmentation["ROTATION_RANGE"],  # Randomly rotate images within a range
+                horizontal_flip=augmentation["HORIZONTAL_FLIP"],  # Randomly flip images horizontally
+                width_shift_range=augmentation["WIDTH_SHIFT_RANGE"],  # Randomly shift images horizontally
+                height_shift_range=augmentation["HEIGHT_SHIFT_RANGE"],  # Randomly shift images vertically
+                shear_range=augmentation["SHEAR_RANGE"],  # Apply random shearing transformations
+                zoom_range=augmentation["ZOOM_RANGE"],  # Randomly zoom into images
                 **datagenerator_kwargs  # Include normalization and validation split
             )
         else:
@@ -77,28 +189,387 @@ class Training:
             **dataflow_kwargs  # Include data flow arguments for resizing and batch size
         )
 
+        # Calculate the number of steps per epoch based on training data
+        self.steps_per_epoch = self.train_generator.samples // self.train_generator.batch_size
+        # Calculate the number of validation steps based on validation data
+        self.validation_steps = self.valid_generator.samples // self.valid_generator.batch_size
+
+    def train_valid_dataset(self):
+        # Build tf.data pipelines that decode images in parallel, cache them and prefetch batches
+        augment = None
+        if self.config.params_is_augmentation:
+            # Augment whole training batches with one vectorized affine transform
+            augment = build_batch_augmentation(self.config.params_augmentation)
+
+        if self.config.params_input_pipeline == "packed":
+            # Slice pre-decoded images out of the packed dataset instead of decoding JPEGs
+            self.train_generator, self.valid_generator, self.class_names = packed_train_valid_datasets(
+                packed_dir=self.config.packed_data,  # Directory containing the packed dataset
+                image_size=self.config.params_image_size,  # Expected size of the packed images
+                batch_size=self.batch_size,  # Set the global batch size for training and validation
+                validation_split=0.20,  # Use 20% of the data for validation
+                augment=augment  # Batch augmentation for the training subset
+            )
+        else:
+            self.train_generator, self.valid_generator, self.class_names = train_valid_datasets(
+                directory=self.config.training_data,  # Directory containing training and validation data
+                image_size=self.config.params_image_size,  # Resize images to the model input size
+                batch_size=self.batch_size,  # Set the global batch size for training and validation
+                validation_split=0.20,  # Use 20% of the data for validation
+                cache=self.config.params_data_cache,  # Cache decoded images between epochs
+                augment=augment  # Batch augmentation for the training subset
+            )
+
+        if self.num_replicas > 1:
+            # Every worker reads the same files, so shard the batches rather than the (single) input source
+            options = tf.data.Options()
+            options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.DATA
+            self.train_generator = self.train_generator.with_options(options)
+            self.valid_generator = self.valid_generator.with_options(options)
+
+        # The datasets are finite, so every epoch runs through all of their batches
+        self.steps_per_epoch = None
+        self.validation_steps = None
+
+    def train_valid_features(self):
+        # Run the frozen backbone once per image and reuse the stored features on later runs
+        if self.config.params_is_augmentation:
+            logger.warning("Augmentation is not applied when training the head on cached features")
+
+        backbone, head_layers = split_backbone_and_head(self.model)
+        if any(layer.trainable and layer.weights for layer in backbone.layers):
+            logger.warning("Backbone has trainable layers; cached features will not follow their updates")
+        feature_cache = FeatureCache(
+            cache_dir=self._worker_dir(self.config.feature_cache_dir),  # Directory holding the feature stores
+            backbone=backbone,  # Frozen convolutional backbone
+            image_size=self.config.params_image_size  # Input size used for feature extraction
+        )
+
+        # Look up (or extract) features for the same 80/20 split as the image pipelines
+        self.features = {}
+        for subset in ("training", "validation"):
+            filepaths, labels, self.class_names = list_image_files(self.config.training_data, 0.20, subset)
+            self.features[subset] = (
+                feature_cache.get_features(filepaths, batch_size=self.config.params_batch_size),
+                tf.constant(labels, dtype=tf.int32)
+            )
+
+        # Model that trains the full model's head layers directly on the features
+        with self.strategy.scope():
+            self.head_model = build_head_model(feature_cache.feature_shape, head_layers)
+            self.head_model.compile(
+                optimizer=tf.keras.optimizers.Adam(learning_rate=self.config.params_learning_rate),  # Same optimizer as full-model training
+                loss='sparse_categorical_crossentropy',  # Loss function for integer labels
+                metrics=["accuracy"],  # Track accuracy as a performance metric
+                **self._compile_kwargs()  # XLA and steps_per_execution settings
+            )
+
     @staticmethod
     def save_model(path: Path, model: tf.keras.Model):
         # Static method to save the trained model to the specified path
         model.save(path)
 
-    def train(self):
-        # Calculate the number of steps per epoch based on training data
-        self.steps_per_epoch = self.train_generator.samples // self.train_generator.batch_size
-        # Calculate the number of validation steps based on validation data
-        self.validation_steps = self.valid_generator.samples // self.valid_generator.batch_size
+    def validation_data(self):
+        """
+        Returns the unshuffled validation image batches built for training, for
+        evaluation in the same process, or None when training used cached features.
+        """
+        if self.config.params_training_mode == "feature_cache":
+            return None
+        return self.valid_generator
+
+    def _images_per_epoch(self) -> int:
+        # Number of training images one epoch runs through, for throughput logging
+        if self.config.params_training_mode == "feature_cache":
+            return len(self.features["training"][0])
+        if self.steps_per_epoch is not None:
+            return self.steps_per_epoch * self.batch_size
+        # tf_data and packed split the files exactly like list_image_files
+        return len(list_image_files(self.config.training_data, 0.20, "training")[0])
+
+    def _is_multi_worker(self) -> bool:
+        # Strategies created from TF_CONFIG carry a cluster resolver with this process's task
+        resolver = getattr(self.strategy, "cluster_resolver", None)
+        return resolver is not None and resolver.task_type is not None
+
+    def _worker_dir(self, path: Path) -> Path:
+        # Multi-worker processes may share a filesystem, so each worker writes to its own subdirectory
+        if not self._is_multi_worker():
+            return Path(path)
+        resolver = self.strategy.cluster_resolver
+        return Path(path) / f"{resolver.task_type}_{resolver.task_id}"
+
+    def _best_weights_path(self) -> Path:
+        # Weights of the epoch with the best monitored validation metric
+        return self._worker_dir(self.config.checkpoint_dir) / "best.weights.h5"
+
+    def _checkpoint_fingerprint(self) -> str:
+        # Checkpoints only carry over between runs of the same configuration and base model;
+        # EPOCHS may change, so a finished run can be extended, and telemetry does not matter
+        settings = {key: value for key, value in dataclasses.asdict(self.config).items()
+                    if key not in ("params_epochs", "params_telemetry", "mlflow_uri", "mlflow_flush_timeout",
+                                   "telemetry_path")}
+        base_model = os.stat(self.config.updated_base_model_path)
+        settings["base_model"] = [base_model.st_size, base_model.st_mtime_ns]
+        settings["num_replicas"] = self.num_replicas
+        return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _prepare_checkpoint_dir(self) -> Path:
+        """
+        Returns the checkpoint directory of this run. Checkpoints and best weights left
+        by an earlier run are deleted unless RESUME is set and that run had the same
+        configuration, so they never leak into an unrelated model.
+        """
+        checkpoint_dir = self._worker_dir(self.config.checkpoint_dir)
+        run_path = checkpoint_dir / "run.json"
+        fingerprint = self._checkpoint_fingerprint()
+        previous = None
+        if run_path.exists():
+            with open(run_path) as f:
+                previous = json.load(f).get("fingerprint")
 
-        # Start the training process
-        self.model.fit(
-            self.train_generator,  # Training data generator
-            epochs=self.config.params_epochs,  # Number of epochs specified in the configuration
-            steps_per_epoch=self.steps_per_epoch,  # Steps per epoch
-            validation_steps=self.validation_steps,  # Steps for validation
-            validation_data=self.valid_generator  # Validation data generator
+        resume = self.config.params_checkpointing["RESUME"] and previous == fingerprint
+        if not resume and checkpoint_dir.exists() and any(checkpoint_dir.iterdir()):
+            reason = "resuming is disabled" if not self.config.params_checkpointing["RESUME"] else \
+                "they belong to a different configuration"
+            logger.info(f"Clearing the checkpoints in {checkpoint_dir}: {reason}")
+            shutil.rmtree(checkpoint_dir)
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        with open(run_path, "w") as f:
+            json.dump({"fingerprint": fingerprint}, f)
+        return checkpoint_dir
+
+    def _build_telemetry(self):
+        # Step/epoch telemetry of the chief (every worker runs the same steps); None when disabled
+        from kidney_disease_classifier.components.callbacks import TrainingTelemetry
+        telemetry = self.config.params_telemetry
+        if not telemetry["ENABLED"] or not is_chief(self.strategy):
+            return None
+        mlflow_logger = None
+        if telemetry["MLFLOW"]:
+            mlflow_logger = AsyncMlflowLogger(
+                tracking_uri=self.config.mlflow_uri,
+                experiment_name="Kidney Disease Classification Model Training",
+                run_name="Kidney Disease Classification Training",
+                flush_timeout=self.config.mlflow_flush_timeout
+            )
+        return TrainingTelemetry(
+            path=self.config.telemetry_path,
+            batch_size=self.batch_size,
+            step_interval=telemetry["STEP_INTERVAL"],
+            mlflow_logger=mlflow_logger,
+            params={
+                "epochs": self.config.params_epochs,
+                "batch_size": self.batch_size,
+                "replicas": self.num_replicas,
+                "training_mode": self.config.params_training_mode,
+                "input_pipeline": self.config.params_input_pipeline,
+                **{key.lower(): value for key, value in self.config.params_performance.items()}
+            }
         )
 
+    def _build_callbacks(self) -> list:
+        # The callbacks subclass Keras classes, so their module is imported with TensorFlow loaded
+        from kidney_disease_classifier.components.callbacks import ThroughputLogger, BestWeightsCheckpoint
+
+        # Log per-epoch wall time and images/sec
+        callbacks = [ThroughputLogger(self._images_per_epoch())]
+
+        # Telemetry comes after ThroughputLogger so its epoch records include the wall time
+        self.telemetry = self._build_telemetry()
+        if self.telemetry is not None:
+            callbacks.append(self.telemetry)
+
+        checkpointing = self.config.params_checkpointing
+        monitor = checkpointing["MONITOR"]
+        checkpoint_dir = self._prepare_checkpoint_dir()
+        if checkpointing["RESUME"]:
+            # Save weights, optimizer state and epoch every epoch; a restarted run continues
+            # from there and the backup is deleted once training finishes
+            callbacks.append(tf.keras.callbacks.BackupAndRestore(backup_dir=str(checkpoint_dir / "backup")))
+
+        # Keep the weights of the best epoch so they, not the last epoch's, become the model artifact;
+        # a resumed run starts from the best value reached before the interruption
+        callbacks.append(BestWeightsCheckpoint(
+            filepath=self._best_weights_path(),  # Overwritten whenever the metric improves
+            best_value_path=checkpoint_dir / "best.json",  # Best value of the monitored metric
+            monitor=monitor  # Validation metric that selects the best epoch
+        ))
+
+        early_stopping = self.config.params_early_stopping
+        if early_stopping["PATIENCE"] is not None:
+            # Stop once the metric has not improved for PATIENCE epochs
+            callbacks.append(tf.keras.callbacks.EarlyStopping(
+                monitor=monitor,
+                patience=early_stopping["PATIENCE"],
+                min_delta=early_stopping["MIN_DELTA"],
+                verbose=1
+            ))
+
+        reduce_lr = self.config.params_reduce_lr
+        if reduce_lr["PATIENCE"] is not None:
+            # Lower the learning rate when the metric plateaus
+            callbacks.append(tf.keras.callbacks.ReduceLROnPlateau(
+                monitor=monitor,
+                patience=reduce_lr["PATIENCE"],
+                factor=reduce_lr["FACTOR"],
+                min_lr=reduce_lr["MIN_LR"],
+                verbose=1
+            ))
+        return callbacks
+
+    def _fit_multi_worker(self, model: tf.keras.Model, train_data: tf.data.Dataset,
+                          valid_data: tf.data.Dataset, callbacks: list):
+        """
+        Custom training loop for MultiWorkerMirroredStrategy.
+
+        Keras 3 `fit` cannot reduce the per-replica results of a multi-worker
+        strategy, so every replica computes its gradients on its shard of the global
+        batch inside `strategy.run` and the optimizer all-reduces them across the
+        workers before applying them. Callbacks receive the same epoch logs as `fit`.
+
+        :param model: Compiled model, built under the strategy scope.
+        :param train_data: Training dataset of global batches.
+        :param valid_data: Validation dataset of global batches.
+        :param callbacks: Keras callbacks.
+        :return: History object of the run.
+        """
+        strategy = self.strategy
+        loss_fn = tf.keras.losses.SparseCategoricalCrossentropy(reduction=None)
+        optimizer = model.optimizer
+        with strategy.scope():
+            optimizer.build(model.trainable_variables)
+
+        def replica_train_step(images, labels):
+            with tf.GradientTape() as tape:
+                probabilities = model(images, training=True)
+                per_example_loss = loss_fn(labels, probabilities)
+                # Average over the global batch so summing the replicas' gradients gives the mean
+                loss = tf.nn.compute_average_loss(per_example_loss, global_batch_size=self.batch_size)
+            gradients = tape.gradient(optimizer.scale_loss(loss), model.trainable_variables)
+            optimizer.apply_gradients(zip(gradients, model.trainable_variables))
+            return self._batch_sums(labels, probabilities, per_example_loss)
+
+        def replica_eval_step(images, labels):
+            probabilities = model(images, training=False)
+            return self._batch_sums(labels, probabilities, loss_fn(labels, probabilities))
+
+        def distributed(step):
+            # Run the step on every replica and sum loss, correct predictions and example counts
+            @tf.function(reduce_retracing=True)
+            def run(batch):
+                results = strategy.run(step, args=batch)
+                return [strategy.reduce("SUM", value, axis=None) for value in results]
+            return run
+
+        def run_epoch(step, dataset, batch_callbacks=None):
+            totals = [0.0, 0.0, 0.0]
+            for index, batch in enumerate(dataset):
+                if batch_callbacks:
+                    batch_callbacks.on_train_batch_begin(index)
+                sums = [float(value) for value in step(batch)]
+                totals = [total + value for total, value in zip(totals, sums)]
+                if batch_callbacks:
+                    batch_callbacks.on_train_batch_end(index, {"loss": sums[0] / sums[2]})
+            loss, correct, count = totals
+            return loss / count, correct / count
+
+        train_step, eval_step = distributed(replica_train_step), distributed(replica_eval_step)
+        train_dist = strategy.experimental_distribute_dataset(train_data)
+        valid_dist = strategy.experimental_distribute_dataset(valid_data)
+
+        callback_list = tf.keras.callbacks.CallbackList(callbacks, add_history=True, model=model,
+                                                        epochs=self.config.params_epochs)
+        callback_list.on_train_begin()
+        # BackupAndRestore sets the epoch to resume from; EarlyStopping sets stop_training
+        model.stop_training = False
+        for epoch in range(getattr(model, "_initial_epoch", None) or 0, self.config.params_epochs):
+            if model.stop_training:
+                break
+            callback_list.on_epoch_begin(epoch)
+            loss, accuracy = run_epoch(train_step, train_dist, callback_list)
+            val_loss, val_accuracy = run_epoch(eval_step, valid_dist)
+            logs = {"loss": loss, "accuracy": accuracy, "val_loss": val_loss, "val_accuracy": val_accuracy}
+            logger.info(f"Epoch {epoch + 1}/{self.config.params_epochs}: "
+                        + ", ".join(f"{name} {value:.4f}" for name, value in logs.items()))
+            callback_list.on_epoch_end(epoch, logs)
+        callback_list.on_train_end()
+        return model.history
+
+    @staticmethod
+    def _batch_sums(labels, probabilities, per_example_loss):
+        # Per-replica sums that are added up across replicas and batches for the epoch metrics
+        predictions = tf.cast(tf.argmax(probabilities, axis=-1), labels.dtype)
+        correct = tf.reduce_sum(tf.cast(tf.equal(predictions, labels), tf.float32))
+        count = tf.cast(tf.shape(labels)[0], tf.float32)
+        return tf.reduce_sum(per_example_loss), correct, count
+
+    def train(self, extra_callbacks: list = None):
+        # Throughput logging, telemetry, checkpointing, early stopping and learning-rate schedule,
+        # followed by the caller's callbacks (e.g. the pruning callback of a sweep trial)
+        callbacks = self._build_callbacks() + list(extra_callbacks or [])
+
+        # Let the telemetry time how long every step waits for its batch (tf.data pipelines only)
+        if (self.telemetry is not None and self.config.params_training_mode != "feature_cache"
+                and isinstance(self.train_generator, tf.data.Dataset)):
+            self.train_generator = self.telemetry.instrument(self.train_generator)
+
+        if self._is_multi_worker():
+            if self.config.params_training_mode == "feature_cache":
+                # Batch the cached features like the image datasets so they can be sharded
+                train_data, valid_data = (
+                    tf.data.Dataset.from_tensor_slices(self.features[subset])
+                    for subset in ("training", "validation")
+                )
+                options = tf.data.Options()
+                options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.DATA
+                train_data = train_data.shuffle(len(self.features["training"][0])).batch(self.batch_size)
+                train_data = train_data.with_options(options)
+                valid_data = valid_data.batch(self.batch_size).with_options(options)
+                self.history = self._fit_multi_worker(self.head_model, train_data, valid_data, callbacks)
+            else:
+                self.history = self._fit_multi_worker(self.model, self.train_generator, self.valid_generator,
+                                                      callbacks)
+        elif self.config.params_training_mode == "feature_cache":
+            # Train the head on cached features; the full model shares its head weights
+            train_features, train_labels = self.features["training"]
+            self.history = self.head_model.fit(
+                train_features,  # Flattened backbone features of the training images
+                train_labels,  # Integer labels of the training images
+                batch_size=self.batch_size,  # Global batch size (BATCH_SIZE per replica)
+                epochs=self.config.params_epochs,  # Number of epochs specified in the configuration
+                shuffle=True,  # Shuffle training features every epoch
+                validation_data=self.features["validation"],  # Cached validation features
+                callbacks=callbacks  # Logging, checkpoints, early stopping and LR schedule
+            )
+        else:
+            # Start the training process
+            self.history = self.model.fit(
+                self.train_generator,  # Training data generator
+                epochs=self.config.params_epochs,  # Number of epochs specified in the configuration
+                steps_per_epoch=self.steps_per_epoch,  # Steps per epoch
+                validation_steps=self.validation_steps,  # Steps for validation
+                validation_data=self.valid_generator,  # Validation data generator
+                callbacks=callbacks  # Logging, checkpoints, early stopping and LR schedule
+            )
+
+        # Export the best epoch rather than the last one; in feature_cache mode the head
+        # model shares its layers with the full model, so loading it updates both
+        trained_model = self.head_model if self.config.params_training_mode == "feature_cache" else self.model
+        if self._best_weights_path().exists():
+            logger.info(f"Restoring the weights of the best epoch from {self._best_weights_path()}")
+            trained_model.load_weights(self._best_weights_path())
+
+        # In multi-worker training every worker holds the same weights; only the chief writes them
+        if not is_chief(self.strategy):
+            return
+
+        # Save a float32 model so evaluation and serving do not depend on the training policy
+        model = apply_dtype_policy(self.model, "float32") if self.mixed_precision else self.model
+        self.trained_model = model
+
         # Save the trained model to the specified path
         self.save_model(
             path=self.config.trained_model_path,  # Path where the trained model will be saved
-            model=self.model  # The trained model to save
+            model=model  # The trained model to save
         )
\ No newline at end of file
@@ -1,14 +1,72 @@
 
 # import required libraries
+from __future__ import annotations
 import os
-import tensorflow as tf
 from pathlib import Path
-from zipfile import ZipFile
-import urllib.request as request
 from kidney_disease_classifier.entity.config_entity import (DataIngestionConfig,
                                                               PrepareBaseModelConfig,
                                                               TrainingConfig,
                                                               EvaluationConfig)
+from kidney_disease_classifier.utils.lazy import LazyModule
+
+# TensorFlow is imported on first use, so importing this module stays cheap
+tf = LazyModule("tensorflow")
+
+# Backbones selectable through the BACKBONE parameter. Every entry gives the name of the Keras application,
+# the (scale, offset) that maps the pipeline's [0, 1] pixels to the range the backbone was
+# trained on (None keeps [0, 1]) and the head used when HEAD is not set
+BACKBONES = {
+    # VGG16 keeps the original [0, 1] input and flattened 7x7x512 head
+    "vgg16": ("VGG16", None, "flatten"),
+    # EfficientNet rescales [0, 255] pixels internally
+    "efficientnet_b0": ("EfficientNetB0", (255.0, 0.0), "gap"),
+    # MobileNetV2 and ResNet50V2 expect pixels in [-1, 1]. MobileNetV3 is not offered: its
+    # hard-swish is built from raw tensor ops that Keras cannot reload from an .h5 file
+    "mobilenet_v2": ("MobileNetV2", (2.0, -1.0), "gap"),
+    "resnet50_v2": ("ResNet50V2", (2.0, -1.0), "gap"),
+}
+
+# Classification heads selectable through the HEAD parameter
+HEADS = ("flatten", "gap", "gap_dense")
+
+
+def build_backbone(backbone: str, image_size: list, weights, include_top: bool = False) -> tf.keras.Model:
+    """
+    Build a backbone from the BACKBONES registry that takes the pipeline's [0, 1] images.
+
+    Input rescaling is a parameter-free layer of the backbone itself (not a "head_"
+    layer), so the feature cache and the saved model both include it.
+
+    :param backbone: Key of the BACKBONES registry.
+    :param image_size: Input shape [height, width, channels].
+    :param weights: Pre-trained weights ("imagenet") or None for random initialization.
+    :param include_top: Whether to keep the application's own classifier.
+    :return: Keras model mapping images to features.
+    """
+    if backbone not in BACKBONES:
+        raise ValueError(f"Unknown backbone '{backbone}', expected one of {sorted(BACKBONES)}")
+    application_name, rescaling, _ = BACKBONES[backbone]
+    application = getattr(tf.keras.applications, application_name)
+
+    if rescaling is None:
+        return application(input_shape=image_size, weights=weights, include_top=include_top)
+
+    # Map [0, 1] pixels to the backbone's own input range inside the graph
+    inputs = tf.keras.Input(shape=image_size)
+    scale, offset = rescaling
+    scaled = tf.keras.layers.Rescaling(scale, offset=offset, name="backbone_rescaling")(inputs)
+    return application(input_tensor=scaled, weights=weights, include_top=include_top)
+
+
+def resolve_head(backbone: str, head: str = None) -> str:
+    """
+    Return the configured head, or the backbone's default head when it is not set.
+    """
+    head = head or BACKBONES[backbone][2]
+    if head not in HEADS:
+        raise ValueError(f"Unknown head '{head}', expected one of {list(HEADS)}")
+    return head
+
 
 class PrepareBaseModel:
     def __init__(self, config: PrepareBaseModelConfig):
@@ -16,9 +74,10 @@ class PrepareBaseModel:
         self.config = config
     
     def get_base_model(self):
-        # Create the base model using the VGG16 architecture from Keras
-        self.model = tf.keras.applications.vgg16.VGG16(
-            input_shape=self.config.params_image_size,  # Set the input shape based on the config
+        # Create the base model from the backbone selected in the config
+        self.model = build_backbone(
+            backbone=self.config.params_backbone,  # Backbone architecture from the config
+            image_size=self.config.params_image_size,  # Set the input shape based on the config
             weights=self.config.params_weights,  # Load weights specified in the config
             include_top=self.config.params_include_top  # Include the top layer or not, based on config
         )
@@ -28,8 +87,9 @@ class PrepareBaseModel:
 
     
     @staticmethod
-    def _prepare_full_model(model, classes, freeze_all, freeze_till, learning_rate):
-        # Prepare a full model by adding a classification layer on top of the base model
+    def _prepare_full_model(model, classes, freeze_all, freeze_till, learning_rate,
+                            head="flatten", dense_units=128, dropout=0.3):
+        # Prepare a full model by adding a classification head on top of the base model
         
         # Freeze all layers if freeze_all is True
         if freeze_all:
@@ -40,13 +100,28 @@ class PrepareBaseModel:
             for layer in model.layers[:-freeze_till]:
                 layer.trainable = False
 
-        # Flatten the output from the base model
-        flatten_in = tf.keras.layers.Flatten()(model.output)
+        # Head layers are prefixed with "head_" so training can separate them from the backbone
+        features = model.output
+        if len(features.shape) > 2:
+            if head == "flatten":
+                # Flatten the feature map: one weight per position, tied to the input size
+                features = tf.keras.layers.Flatten(name="head_flatten")(features)
+            else:
+                # Average the feature map over its positions; the pooling has no weights, so it
+                # stays on the backbone side and the feature cache stores the pooled vectors
+                features = tf.keras.layers.GlobalAveragePooling2D(name="global_pool")(features)
+
+        if head == "gap_dense":
+            # Small bottleneck block between the pooled features and the classifier
+            features = tf.keras.layers.Dense(dense_units, activation="relu", name="head_dense")(features)
+            features = tf.keras.layers.Dropout(dropout, name="head_dropout")(features)
+
         # Add a dense layer for predictions with softmax activation
         prediction = tf.keras.layers.Dense(
             units=classes,  # Number of classes for the output
-            activation="softmax"  # Softmax activation for multi-class classification
-        )(flatten_in)
+            activation="softmax",  # Softmax activation for multi-class classification
+            name="head_predictions"
+        )(features)
 
         # Create the full model with the specified inputs and outputs
         full_model = tf.keras.models.Model(
@@ -57,7 +132,7 @@ class PrepareBaseModel:
         # Compile the full model with the specified optimizer and loss function
         full_model.compile(
             optimizer=tf.keras.optimizers.SGD(learning_rate=learning_rate),  # Stochastic Gradient Descent optimizer
-            loss=tf.keras.losses.CategoricalCrossentropy(),  # Loss function for multi-class classification
+            loss=tf.keras.losses.SparseCategoricalCrossentropy(),  # Loss for the integer labels the data pipelines yield
             metrics = ["accuracy"]  # Track accuracy during training with these 3 metrics
         )
 
@@ -73,7 +148,10 @@ class PrepareBaseModel:
             classes=self.config.params_classes,  # Number of classes from the config
             freeze_all=True,  # Freeze all layers during training
             freeze_till=None,  # No layers to unfreeze
-            learning_rate=self.config.params_learning_rate  # Learning rate from the config
+            learning_rate=self.config.params_learning_rate,  # Learning rate from the config
+            head=resolve_head(self.config.params_backbone, self.config.params_head),  # Head type from the config
+            dense_units=self.config.params_head_dense_units,  # Width of the gap_dense bottleneck
+            dropout=self.config.params_head_dropout  # Dropout rate of the gap_dense bottleneck
         )
 
         # Save the updated full model to the specified path
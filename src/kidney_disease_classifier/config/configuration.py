@@ -1,56 +1,214 @@
 
 import os  # Import the os module
+import copy
+import yaml
+import functools
+import threading
+from box import ConfigBox
 # Import necessary modules and classes from the chest_cancer_classifier package
 from kidney_disease_classifier import *  # Import all components from the chest_cancer_classifier module
 from kidney_disease_classifier.entity.config_entity import (DataIngestionConfig,
                                                               PrepareBaseModelConfig,
+                                                              BackboneBenchmarkConfig,
                                                               TrainingConfig,
-                                                              EvaluationConfig)
+                                                              HyperparameterSweepConfig,
+                                                              EvaluationConfig,
+                                                              ModelQuantizationConfig,
+                                                              PredictionConfig)
 
 from kidney_disease_classifier.utils.common_functions import read_yaml, create_directories,save_json  # Import utility functions for reading YAML files and creating directories
 
 from kidney_disease_classifier.constants import *  # Import all constants defined in the constants module
 
+from kidney_disease_classifier.utils.runtime import configure_environment, apply_runtime_config
+
+# Process-wide configuration cache, shared by every ConfigurationManager (stages may run in threads)
+_cache_lock = threading.RLock()
+# Parsed YAML files: path -> ((mtime, size), content)
+_yaml_cache = {}
+# Config and params with the overrides applied: (config path, params path) -> (version, config, params)
+_configurations = {}
+# Config dataclasses already built: (version, getter name) -> dataclass
+_config_objects = {}
+# Directories already created by this process
+_created_directories = set()
+
+
+def _load_yaml(path: Path) -> tuple:
+    # Parse a YAML file only when it is new or its modification time or size changed
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _yaml_cache.get(str(path))
+        if cached is None or cached[0] != key:
+            cached = (key, read_yaml(Path(path)))
+            _yaml_cache[str(path)] = cached
+        return cached
+
+
+def _apply_overrides(config: ConfigBox, params: ConfigBox, overrides: str) -> tuple:
+    """
+    Apply ";"-separated KEY=VALUE overrides to copies of config and params.
+
+    Keys are dotted paths into params.yaml (optionally prefixed "params.") or, with
+    the "config." prefix, into config.yaml. Values are parsed as YAML, so numbers,
+    booleans, null and lists keep their types. Unknown keys raise a KeyError so a
+    typo cannot silently run with the file's value.
+    """
+    config, params = ConfigBox(copy.deepcopy(config.to_dict())), ConfigBox(copy.deepcopy(params.to_dict()))
+    for item in filter(None, (item.strip() for item in overrides.split(";"))):
+        key, separator, value = item.partition("=")
+        if not separator:
+            raise ValueError(f"Override '{item}' is not of the form KEY=VALUE")
+        target, path = (config, key[len("config."):]) if key.startswith("config.") else \
+            (params, key[len("params."):] if key.startswith("params.") else key)
+        *parents, name = path.split(".")
+        node = target
+        for parent in parents:
+            node = node[parent]
+        if name not in node:
+            raise KeyError(f"Override '{key}' does not match any configuration key")
+        node[name] = yaml.safe_load(value)
+    return config, params
+
+
+def load_configuration(config_filepath=CONFIG_FILE_PATH, params_filepath=PARAMS_FILE_PATH) -> tuple:
+    """
+    Returns the current config and params with the overrides applied.
+
+    The files are parsed once and again only after they change on disk; overrides
+    come from the KIDNEY_CONFIG_OVERRIDES environment variable (see `set_overrides`).
+
+    Returns:
+        tuple: (version, config, params), where the version changes whenever the
+        files or the overrides change.
+    """
+    config_key, config = _load_yaml(config_filepath)
+    params_key, params = _load_yaml(params_filepath)
+    overrides = os.environ.get(OVERRIDES_ENV_VAR, "")
+    paths = (str(config_filepath), str(params_filepath))
+    version = (paths, config_key, params_key, overrides)
+
+    with _cache_lock:
+        cached = _configurations.get(paths)
+        if cached is None or cached[0] != version:
+            if overrides:
+                config, params = _apply_overrides(config, params, overrides)
+                logger.info(f"Configuration overrides: {overrides}")
+            cached = (version, config, params)
+            _configurations[paths] = cached
+            # Dataclasses built from the previous version of these files are stale
+            for key in [key for key in _config_objects if key[0][0] == paths]:
+                del _config_objects[key]
+        return cached
+
+
+def set_overrides(overrides: list):
+    """
+    Add KEY=VALUE overrides (e.g. from `--set` on the command line) for this process
+    and the processes it starts, by appending them to KIDNEY_CONFIG_OVERRIDES.
+
+    Args:
+        overrides (list): Items like "EPOCHS=2" or "config.runtime.intra_op_threads=4".
+    """
+    items = [item for item in os.environ.get(OVERRIDES_ENV_VAR, "").split(";") if item] + list(overrides)
+    os.environ[OVERRIDES_ENV_VAR] = ";".join(items)
+
+
+def configure_process():
+    """
+    Set up the process of an entry point: logging, and the oneDNN/OpenMP variables of
+    the runtime section of config.yaml with the overrides applied.
+
+    Call it after the overrides are set (e.g. from `--set`) and before TensorFlow is
+    imported; ConfigurationManager applies the rest of the runtime section.
+    """
+    setup_logging()
+    if CONFIG_FILE_PATH.exists() and PARAMS_FILE_PATH.exists():
+        configure_environment(load_configuration()[1].runtime)
+
+
+def _create_directories_once(paths: list):
+    # create_directories for directories this process has not created yet
+    with _cache_lock:
+        new = [path for path in map(str, paths) if path not in _created_directories]
+        if new:
+            create_directories(new)
+            _created_directories.update(new)
+
+
+def _memoized(getter):
+    # Build each config dataclass once per version of the configuration files and overrides
+    @functools.wraps(getter)
+    def wrapper(self):
+        key = (self.version, getter.__name__)
+        with _cache_lock:
+            if key not in _config_objects:
+                _config_objects[key] = getter(self)
+            return _config_objects[key]
+    return wrapper
+
+
 # ConfigurationManager class to manage configuration settings for the project
 class ConfigurationManager:
+    """
+    Access to config.yaml and params.yaml.
+
+    Instances are cheap: the files are parsed once per process (and again only when
+    they change on disk), overrides are applied on top, and every `get_*_config`
+    dataclass is built on first use and shared by all instances.
+    """
     def __init__(
         self,
         config_filepath=CONFIG_FILE_PATH,  # Path to the main configuration file, defaulting to CONFIG_FILE_PATH
         params_filepath=PARAMS_FILE_PATH):  # Path to the parameters file, defaulting to PARAMS_FILE_PATH
 
-        # Read the configuration and parameters from the specified YAML files
-        self.config = read_yaml(config_filepath)
-        self.params = read_yaml(params_filepath)
+        # Read the (cached) configuration and parameters with the overrides applied
+        self.version, self.config, self.params = load_configuration(config_filepath, params_filepath)
 
         # Create necessary directories as specified in the configuration
-        create_directories([self.config.artifacts_root])
+        _create_directories_once([self.config.artifacts_root])
+
+        # Apply the thread, affinity and tf.data settings before any stage builds a model
+        apply_runtime_config(self.config.runtime)
+
+    def _mlflow_uri(self) -> str:
+        # MLFLOW_TRACKING_URI (e.g. file:./mlruns for a local store) overrides the configured server
+        return os.getenv("MLFLOW_TRACKING_URI", self.config.mlflow_uri)
 
     # Method to retrieve the data ingestion configuration
+    @_memoized
     def get_data_ingestion_config(self) -> DataIngestionConfig:
         # Access the data ingestion configuration from the loaded config
         config = self.config.data_ingestion
 
         # Create the directory for data ingestion as specified in the configuration
-        create_directories([config.root_dir])
+        _create_directories_once([config.root_dir])
 
         # Instantiate the DataIngestionConfig object with the relevant parameters
         data_ingestion_config = DataIngestionConfig(
             root_dir=config.root_dir,  # Set the root directory
             source_URL=config.source_URL,  # Set the source URL for data ingestion
             local_data_file=config.local_data_file,  # Set the local path for the downloaded data file
-            unzip_dir=config.unzip_dir  # Set the directory where the data will be unzipped
+            sha256=config.sha256,  # Set the expected checksum of the archive
+            chunk_size=config.chunk_size,  # Set the download chunk size
+            unzip_dir=config.unzip_dir,  # Set the directory where the data will be unzipped
+            data_dir=config.data_dir,  # Set the directory of the extracted images
+            packed_dir=config.packed_dir,  # Set the directory of the packed dataset
+            params_image_size=self.params.IMAGE_SIZE  # Set the size the packed images are resized to
         )
 
         # Return the configured DataIngestionConfig object
         return data_ingestion_config
     
     
+    @_memoized
     def get_prepare_base_model_config(self) -> PrepareBaseModelConfig:
         # Retrieve the configuration for preparing the base model
         config = self.config.prepare_base_model
         
         # Create necessary directories for the base model
-        create_directories([config.root_dir])
+        _create_directories_once([config.root_dir])
 
         # Initialize the PrepareBaseModelConfig with relevant parameters
         prepare_base_model_config = PrepareBaseModelConfig(
@@ -61,25 +219,58 @@ class ConfigurationManager:
             params_learning_rate=self.params.LEARNING_RATE,
             params_include_top=self.params.INCLUDE_TOP,
             params_weights=self.params.WEIGHTS,
-            params_classes=self.params.CLASSES
+            params_classes=self.params.CLASSES,
+            params_backbone=self.params.BACKBONE,
+            params_head=self.params.HEAD,
+            params_head_dense_units=self.params.HEAD_DENSE_UNITS,
+            params_head_dropout=self.params.HEAD_DROPOUT
         )
 
         # Return the configuration object
         return prepare_base_model_config
 
 
+    @_memoized
+    def get_backbone_benchmark_config(self) -> BackboneBenchmarkConfig:
+        # Retrieve the configuration for comparing backbones
+        config = self.config.backbone_benchmark
+
+        # Initialize the BackboneBenchmarkConfig with relevant parameters
+        backbone_benchmark_config = BackboneBenchmarkConfig(
+            training_data=Path(self.config.data_ingestion.data_dir),
+            feature_cache_dir=Path(self.config.training.feature_cache_dir),
+            report_path=Path(config.report_path),
+            params_backbones=list(self.params.BENCHMARK_BACKBONES),
+            params_head=self.params.HEAD,
+            params_head_dense_units=self.params.HEAD_DENSE_UNITS,
+            params_head_dropout=self.params.HEAD_DROPOUT,
+            params_image_size=self.params.IMAGE_SIZE,
+            params_weights=self.params.WEIGHTS,
+            params_classes=self.params.CLASSES,
+            params_learning_rate=self.params.LEARNING_RATE,
+            params_batch_size=self.params.BATCH_SIZE,
+            params_epochs=self.params.EPOCHS
+        )
+
+        # Return the benchmark configuration object
+        return backbone_benchmark_config
+
+
+    @_memoized
     def get_training_config(self) -> TrainingConfig:
         # Retrieve training and base model configurations
         training = self.config.training
         prepare_base_model = self.config.prepare_base_model
         params = self.params
 
-        # Define the path to the training data
-        training_data = os.path.join(self.config.data_ingestion.unzip_dir, "kidney-ct-scan-image")
+        # Define the paths to the training data and its packed copy
+        training_data = self.config.data_ingestion.data_dir
+        packed_data = self.config.data_ingestion.packed_dir
 
         # Create necessary directories for training
-        create_directories([
-            Path(training.root_dir)
+        _create_directories_once([
+            Path(training.root_dir),
+            Path(training.checkpoint_dir)
         ])
 
         # Initialize the TrainingConfig with relevant parameters
@@ -88,27 +279,135 @@ class ConfigurationManager:
             trained_model_path=Path(training.trained_model_path),
             updated_base_model_path=Path(prepare_base_model.updated_base_model_path),
             training_data=Path(training_data),
+            packed_data=Path(packed_data),
+            feature_cache_dir=Path(training.feature_cache_dir),
+            checkpoint_dir=Path(training.checkpoint_dir),
+            telemetry_path=Path(training.telemetry_path),
+            mlflow_uri=self._mlflow_uri(),
+            mlflow_flush_timeout=self.config.mlflow_flush_timeout,
             params_epochs=params.EPOCHS,
             params_batch_size=params.BATCH_SIZE,
+            params_learning_rate=params.LEARNING_RATE,
             params_is_augmentation=params.AUGMENTATION,
-            params_image_size=params.IMAGE_SIZE
+            params_augmentation=dict(params.AUGMENTATION_PARAMS),
+            params_image_size=params.IMAGE_SIZE,
+            params_training_mode=params.TRAINING_MODE,
+            params_input_pipeline=params.INPUT_PIPELINE,
+            params_data_cache=params.DATA_CACHE,
+            params_performance=dict(params.PERFORMANCE),
+            params_distribution=dict(params.DISTRIBUTION),
+            params_checkpointing=dict(params.CHECKPOINTING),
+            params_early_stopping=dict(params.EARLY_STOPPING),
+            params_reduce_lr=dict(params.REDUCE_LR),
+            params_telemetry=dict(params.TELEMETRY)
         )
 
         # Return the training configuration object
         return training_config
 
 
+    @_memoized
+    def get_hyperparameter_sweep_config(self) -> HyperparameterSweepConfig:
+        # Retrieve the sweep configuration and its search space
+        config = self.config.hyperparameter_sweep
+        sweep = self.params.SWEEP
+
+        # Every trial overrides the searched keys, so a typo must fail before any trial starts
+        for key in sweep.SEARCH_SPACE:
+            *parents, name = key.split(".")
+            node = self.params
+            for parent in parents:
+                node = node.get(parent, {})
+            if name not in node:
+                raise KeyError(f"Search space key '{key}' does not match any params.yaml key")
+
+        # Create the directory for the trial artifacts
+        _create_directories_once([config.root_dir])
+
+        # Initialize the HyperparameterSweepConfig with relevant parameters
+        hyperparameter_sweep_config = HyperparameterSweepConfig(
+            root_dir=Path(config.root_dir),
+            report_path=Path(config.report_path),
+            mlflow_uri=self._mlflow_uri(),
+            mlflow_flush_timeout=self.config.mlflow_flush_timeout,
+            params_search_space=sweep.SEARCH_SPACE.to_dict(),
+            params_trials=sweep.TRIALS,
+            params_workers=sweep.WORKERS,
+            params_cores_per_trial=sweep.CORES_PER_TRIAL,
+            params_min_epochs=sweep.MIN_EPOCHS,
+            params_reduction_factor=sweep.REDUCTION_FACTOR,
+            params_seed=sweep.SEED,
+            params_mlflow=sweep.MLFLOW,
+            params_epochs=self.params.EPOCHS,
+            params_training_mode=self.params.TRAINING_MODE
+        )
+
+        # Return the sweep configuration object
+        return hyperparameter_sweep_config
+
+
+    @_memoized
     def get_evaluation_config(self) -> EvaluationConfig:
+        # Evaluate the trained model on the images (or packed arrays) written by data ingestion
+        config = self.config.evaluation
+        data_ingestion = self.config.data_ingestion
+
         # Initialize the EvaluationConfig with relevant parameters
         eval_config = EvaluationConfig(
-            path_of_model="artifacts/training/model.h5",
-            training_data="artifacts/data_ingestion/kidney-ct-scan-image",
-            mlflow_uri="https://dagshub.com/muhammadadilnaeem/Kidney-Disease-Classification-Using-MLFlow-And-DVC.mlflow",
+            path_of_model=Path(config.path_of_model),
+            training_data=Path(data_ingestion.data_dir),
+            packed_data=Path(data_ingestion.packed_dir),
+            mlflow_uri=self._mlflow_uri(),
+            mlflow_flush_timeout=self.config.mlflow_flush_timeout,
             all_params=self.params,
             params_image_size=self.params.IMAGE_SIZE,
-            params_batch_size=self.params.BATCH_SIZE
+            params_batch_size=self.params.BATCH_SIZE,
+            params_input_pipeline=self.params.INPUT_PIPELINE,
+            params_positive_class=self.params.POSITIVE_CLASS
         )
 
         # Return the evaluation configuration object
         return eval_config
-    
\ No newline at end of file
+
+
+    @_memoized
+    def get_model_quantization_config(self) -> ModelQuantizationConfig:
+        # Retrieve the configuration for quantizing the trained model
+        config = self.config.model_quantization
+
+        # Create the directory for the exported models
+        _create_directories_once([config.root_dir])
+
+        # Initialize the ModelQuantizationConfig with relevant parameters
+        model_quantization_config = ModelQuantizationConfig(
+            root_dir=Path(config.root_dir),
+            trained_model_path=Path(config.trained_model_path),
+            packed_data=Path(config.packed_data),
+            report_path=Path(config.report_path),
+            params_image_size=self.params.IMAGE_SIZE,
+            params_batch_size=self.params.BATCH_SIZE,
+            params_quantization_modes=list(self.params.QUANTIZATION_MODES),
+            params_calibration_samples=self.params.CALIBRATION_SAMPLES,
+            params_num_threads=self.params.TFLITE_NUM_THREADS
+        )
+
+        # Return the quantization configuration object
+        return model_quantization_config
+
+
+    @_memoized
+    def get_prediction_config(self) -> PredictionConfig:
+        # Retrieve the configuration for serving predictions
+        config = self.config.prediction
+
+        # Initialize the PredictionConfig with relevant parameters
+        prediction_config = PredictionConfig(
+            model_path=Path(config.model_path),
+            params_image_size=self.params.IMAGE_SIZE,
+            params_max_batch_size=self.params.INFERENCE_MAX_BATCH_SIZE,
+            params_max_wait_ms=self.params.INFERENCE_MAX_WAIT_MS,
+            params_num_threads=self.params.TFLITE_NUM_THREADS
+        )
+
+        # Return the prediction configuration object
+        return prediction_config
@@ -5,4 +5,11 @@ from pathlib import Path  # Import the Path class from the pathlib module for ha
 CONFIG_FILE_PATH = Path("config/config.yaml")
 
 # Define the path to the parameters file, which is expected to be in the same directory as the script
-PARAMS_FILE_PATH = Path("params.yaml")
\ No newline at end of file
+PARAMS_FILE_PATH = Path("params.yaml")
+
+# Environment variable with overrides applied on top of config.yaml and params.yaml, separated by ";",
+# e.g. "EPOCHS=2;PERFORMANCE.JIT_COMPILE=true;config.runtime.intra_op_threads=4"
+OVERRIDES_ENV_VAR = "KIDNEY_CONFIG_OVERRIDES"
+# Class names in label order: the class folders sorted alphabetically, as flow_from_directory,
+# list_image_files and the packed dataset number them
+CLASS_NAMES = ["Normal", "Tumor"]
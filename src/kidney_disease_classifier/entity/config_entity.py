@@ -9,7 +9,12 @@ class DataIngestionConfig:
     root_dir: Path  # Directory where data ingestion artifacts will be stored
     source_URL: str  # URL to the source dataset
     local_data_file: Path  # Path for the downloaded local data file
+    sha256: str  # Expected SHA-256 of the archive (None to skip the checksum)
+    chunk_size: int  # Size of the chunks streamed to disk while downloading
     unzip_dir: Path  # Directory where the data will be unzipped
+    data_dir: Path  # Directory of the extracted images
+    packed_dir: Path  # Directory of the packed, memory-mappable dataset
+    params_image_size: list  # Image dimensions the packed images are resized to
 
 # Configuration class for preparing the base model settings
 @dataclass(frozen=True)
@@ -22,6 +27,27 @@ class PrepareBaseModelConfig:
     params_include_top: bool  # Flag to include the top layer of the model
     params_weights: str  # Source of pre-trained weights (e.g., 'imagenet')
     params_classes: int  # Number of classes for classification
+    params_backbone: str  # Backbone architecture (key of the BACKBONES registry)
+    params_head: str  # Classification head ("flatten", "gap", "gap_dense" or None for the backbone default)
+    params_head_dense_units: int  # Width of the dense layer in the "gap_dense" head
+    params_head_dropout: float  # Dropout rate of the "gap_dense" head
+
+# Configuration class for comparing backbones
+@dataclass(frozen=True)
+class BackboneBenchmarkConfig:
+    training_data: Path  # Directory of the extracted images
+    feature_cache_dir: Path  # Directory where backbone features are cached
+    report_path: Path  # Path of the JSON comparison report
+    params_backbones: list  # Backbones to compare
+    params_head: str  # Classification head (None uses each backbone's default)
+    params_head_dense_units: int  # Width of the dense layer in the "gap_dense" head
+    params_head_dropout: float  # Dropout rate of the "gap_dense" head
+    params_image_size: list  # Image dimensions for input to the model
+    params_weights: str  # Source of pre-trained weights (e.g., 'imagenet')
+    params_classes: int  # Number of classes for classification
+    params_learning_rate: float  # Learning rate the base model is compiled with
+    params_batch_size: int  # Batch size for feature extraction and head training
+    params_epochs: int  # Number of epochs the classification head is trained for
 
 # Configuration class for training settings
 @dataclass(frozen=True)
@@ -30,17 +56,78 @@ class TrainingConfig:
     trained_model_path: Path  # Path where the trained model will be saved
     updated_base_model_path: Path  # Path to the updated base model
     training_data: Path  # Path to the training dataset
+    packed_data: Path  # Path to the packed dataset
+    feature_cache_dir: Path  # Directory for cached backbone features
+    checkpoint_dir: Path  # Directory for epoch checkpoints and the best weights
+    telemetry_path: Path  # JSONL file of per-step and per-epoch training telemetry
+    mlflow_uri: str  # URI for MLflow tracking server the telemetry is streamed to
+    mlflow_flush_timeout: float  # Seconds to wait for the background MLflow logging at the end
     params_epochs: int  # Number of epochs for training
     params_batch_size: int  # Batch size for training
+    params_learning_rate: float  # Learning rate of the Adam optimizer
     params_is_augmentation: bool  # Flag to indicate if data augmentation is used
+    params_augmentation: dict  # Random transform ranges used when augmentation is enabled
     params_image_size: list  # Image dimensions for input to the model
+    params_training_mode: str  # Training mode: "full" or "feature_cache"
+    params_input_pipeline: str  # Input backend: "generator", "tf_data" or "packed"
+    params_data_cache: str  # Decoded image cache for tf_data: "", "memory" or a path prefix
+    params_performance: dict  # Mixed precision, XLA and steps_per_execution settings
+    params_distribution: dict  # tf.distribute strategy settings
+    params_checkpointing: dict  # Resume and best-epoch selection settings
+    params_early_stopping: dict  # Early stopping settings
+    params_reduce_lr: dict  # Learning-rate reduction on plateau settings
+    params_telemetry: dict  # Training telemetry settings
+
+# Configuration class for hyperparameter sweep settings
+@dataclass(frozen=True)
+class HyperparameterSweepConfig:
+    root_dir: Path  # Directory holding one sub-directory of artifacts per trial
+    report_path: Path  # Path of the JSON sweep report
+    mlflow_uri: str  # URI for MLflow tracking server the trials are logged to
+    mlflow_flush_timeout: float  # Seconds to wait for the background MLflow logging of a run
+    params_search_space: dict  # Values sampled per params.yaml key
+    params_trials: int  # Number of configurations tried
+    params_workers: int  # Trials trained in parallel, one process each
+    params_cores_per_trial: int  # Cores pinned to every trial (None: split evenly, 0: no pinning)
+    params_min_epochs: int  # Epochs before the first pruning decision
+    params_reduction_factor: int  # Fraction 1/factor of trials kept at every rung
+    params_seed: int  # Seed of the search space sampling
+    params_mlflow: bool  # Log the sweep and its trials as nested MLflow runs
+    params_epochs: int  # Maximum number of epochs per trial
+    params_training_mode: str  # Training mode: "full" or "feature_cache"
 
 # Configuration class for evaluation settings
 @dataclass(frozen=True)
 class EvaluationConfig:
     path_of_model: Path  # Path to the model to be evaluated
     training_data: Path  # Path to the training dataset used for evaluation
+    packed_data: Path  # Path to the packed dataset used for evaluation
     all_params: dict  # Dictionary containing all relevant parameters for evaluation
     mlflow_uri: str  # URI for MLflow tracking server
+    mlflow_flush_timeout: float  # Seconds to wait for the background MLflow logging at the end
+    params_image_size: list  # Image dimensions for input to the model
+    params_batch_size: int  # Batch size for evaluation
+    params_input_pipeline: str  # Input backend: "generator", "tf_data" or "packed"
+    params_positive_class: str  # Class treated as positive for sensitivity, specificity and ROC
+
+# Configuration class for post-training quantization settings
+@dataclass(frozen=True)
+class ModelQuantizationConfig:
+    root_dir: Path  # Directory where the TFLite models are written
+    trained_model_path: Path  # Path to the trained Keras model
+    packed_data: Path  # Packed dataset used for calibration and validation
+    report_path: Path  # Path of the JSON quantization report
+    params_image_size: list  # Image dimensions for input to the model
+    params_batch_size: int  # Batch size for validating the variants
+    params_quantization_modes: list  # TFLite variants to export
+    params_calibration_samples: int  # Number of images used for INT8 calibration
+    params_num_threads: int  # CPU threads used by the TFLite interpreter
+
+# Configuration class for serving predictions
+@dataclass(frozen=True)
+class PredictionConfig:
+    model_path: Path  # Path to the trained model used for serving
     params_image_size: list  # Image dimensions for input to the model
-    params_batch_size: int  # Batch size for evaluation
\ No newline at end of file
+    params_max_batch_size: int  # Maximum number of images per forward pass
+    params_max_wait_ms: float  # Maximum time to wait for a batch to fill up
+    params_num_threads: int  # CPU threads used by the TFLite interpreter for .tflite models
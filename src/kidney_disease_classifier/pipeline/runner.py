@@ -0,0 +1,298 @@
+
+# import required libraries
+import os
+import json
+import time
+import shlex
+import hashlib
+import importlib
+import threading
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.utils.common_functions import read_yaml
+from kidney_disease_classifier.constants import CONFIG_FILE_PATH, PARAMS_FILE_PATH, OVERRIDES_ENV_VAR
+from kidney_disease_classifier.config.configuration import load_configuration
+
+# Stage graph, deps, params and outs shared with `dvc repro`
+DVC_FILE_PATH = Path("dvc.yaml")
+
+# Fingerprints of the last successful run of every stage and the stat cache of hashed files
+STATE_FILE_PATH = Path("artifacts/pipeline_state.json")
+
+# Read files in 1 MB chunks when hashing
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def _stage_outputs(stage: dict) -> list:
+    # outs, metrics and plots entries are paths or {path: options} mappings
+    paths = []
+    for key in ("outs", "metrics", "plots"):
+        for entry in stage.get(key, []) or []:
+            paths.extend(entry.keys() if isinstance(entry, dict) else [entry])
+    return [str(path) for path in paths]
+
+
+def _is_within(path: str, directory: str) -> bool:
+    # True when `path` is `directory` itself or lies inside it
+    path, directory = Path(path), Path(directory)
+    return path == directory or directory in path.parents
+
+
+def _lookup(params: dict, key: str):
+    # Dotted keys (e.g. "PERFORMANCE.JIT_COMPILE") select nested values
+    value = params
+    for part in key.split("."):
+        value = value[part]
+    return value
+
+
+class PipelineRunner:
+    """
+    Runs the stages declared in dvc.yaml in this process.
+
+    Every stage is fingerprinted from its command, the content of its deps and the
+    values of its params. A stage whose fingerprint matches its last successful run
+    and whose outputs are unchanged is skipped, as `dvc repro` would. Files are only
+    re-hashed when their size or modification time changed, so checking an
+    unchanged pipeline takes milliseconds. Stages whose upstream stages are done run
+    concurrently on a thread pool, except `exclusive` stages (training, latency
+    measurements), which always run alone.
+
+    Stages run the `main()` of the pipeline class in their stage script, or a
+    function registered with `register()`, which receives the results of the stages
+    that already ran in this process.
+    """
+
+    def __init__(self, dvc_file: Path = DVC_FILE_PATH, params_file: Path = PARAMS_FILE_PATH,
+                 state_file: Path = STATE_FILE_PATH, max_workers: int = 2, exclusive: tuple = ()):
+        self.stages = dict(read_yaml(Path(dvc_file)).stages)
+        self.params_file = Path(params_file)
+        self.state_file = Path(state_file)
+        self.max_workers = max_workers
+        self.exclusive = set(exclusive)
+        self.functions = {}
+        self._params = {}
+
+        # Upstream stages: the stages producing an output that another stage depends on
+        self.upstream = {
+            name: {
+                producer for producer, other in self.stages.items() if producer != name
+                for output in _stage_outputs(other)
+                for dep in stage.get("deps", []) or []
+                if _is_within(str(dep), output) or _is_within(output, str(dep))
+            }
+            for name, stage in self.stages.items()
+        }
+
+        self._state = json.loads(self.state_file.read_text()) if self.state_file.exists() else {}
+        self._state.setdefault("files", {})
+        self._state.setdefault("stages", {})
+        self._lock = threading.Lock()
+
+    def register(self, stage: str, function):
+        """
+        Run `function(results)` for a stage instead of the pipeline class of its script.
+
+        :param stage: Stage name in dvc.yaml.
+        :param function: Callable receiving a dict of the return values of the stages
+            that already ran in this process; its return value is added to that dict.
+        """
+        if stage not in self.stages:
+            raise KeyError(f"Stage '{stage}' is not defined in dvc.yaml")
+        self.functions[stage] = function
+
+    def _hash_file(self, path: Path) -> str:
+        # Re-hash only when size or modification time changed since the last run
+        stat = path.stat()
+        key = str(path)
+        with self._lock:
+            cached = self._state["files"].get(key)
+        if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        with self._lock:
+            self._state["files"][key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def _hash_path(self, path: str):
+        # Files hash their content, directories every file with its relative path, missing paths None
+        path = Path(path)
+        if path.is_file():
+            return self._hash_file(path)
+        if not path.is_dir():
+            return None
+        digest = hashlib.sha256()
+        for file in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(f"{file.relative_to(path).as_posix()}:{self._hash_file(file)}\n".encode())
+        return digest.hexdigest()
+
+    def _stage_params(self, stage: dict) -> dict:
+        # Entries are params.yaml keys or {other_file: [keys]} mappings
+        values = {}
+        for entry in stage.get("params", []) or []:
+            sources = entry.items() if isinstance(entry, dict) else [(self.params_file, [entry])]
+            for params_file, keys in sources:
+                if str(params_file) not in self._params:
+                    # params.yaml values include the configuration overrides of this process
+                    self._params[str(params_file)] = (
+                        load_configuration(CONFIG_FILE_PATH, params_file)[2]
+                        if Path(params_file) == self.params_file else read_yaml(Path(params_file))
+                    )
+                params = self._params[str(params_file)]
+                values.update({f"{params_file}:{key}": _lookup(params, key) for key in keys})
+        return values
+
+    def fingerprint(self, name: str) -> str:
+        """
+        Hash of the stage's command, dependency contents, parameter values and config.yaml overrides.
+        """
+        stage = self.stages[name]
+        inputs = {
+            "cmd": stage["cmd"],
+            "deps": {str(dep): self._hash_path(dep) for dep in stage.get("deps", []) or []},
+            "params": self._stage_params(stage),
+            # config.yaml overrides change what every stage reads from config/config.yaml
+            "config_overrides": [item for item in os.environ.get(OVERRIDES_ENV_VAR, "").split(";")
+                                 if item.strip().startswith("config.")]
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_up_to_date(self, name: str, fingerprint: str) -> bool:
+        """
+        True when the last successful run had the same fingerprint and its outputs are unchanged.
+        """
+        with self._lock:
+            previous = self._state["stages"].get(name)
+        if not previous or previous["fingerprint"] != fingerprint:
+            return False
+        return all(self._hash_path(path) == digest and digest is not None
+                   for path, digest in previous["outputs"].items())
+
+    def _save_state(self):
+        # Write to a temporary file first so an interrupted run never leaves a truncated state
+        with self._lock:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.state_file.with_suffix(".tmp")
+            temporary.write_text(json.dumps(self._state, indent=2))
+            os.replace(temporary, self.state_file)
+
+    def _stage_function(self, name: str):
+        # Registered function, else the pipeline class of a `python <stage script>` command,
+        # else the command itself in a subprocess
+        if name in self.functions:
+            return self.functions[name]
+        command = shlex.split(self.stages[name]["cmd"])
+        if len(command) == 2 and command[0] == "python" and command[1].startswith("src/"):
+            module = importlib.import_module(command[1][len("src/"):-len(".py")].replace("/", "."))
+            pipeline = next(value for value in vars(module).values()
+                            if isinstance(value, type) and value.__module__ == module.__name__
+                            and hasattr(value, "main"))
+            return lambda results: pipeline().main()
+        return lambda results: subprocess.run(self.stages[name]["cmd"], shell=True, check=True)
+
+    def _run_stage(self, name: str, fingerprint: str, results: dict):
+        stage_label = f"stage {name}"
+        logger.info(f">>>>>> {stage_label} started <<<<<<")
+        start = time.perf_counter()
+        result = self._stage_function(name)(results)
+        elapsed = time.perf_counter() - start
+        outputs = {path: self._hash_path(path) for path in _stage_outputs(self.stages[name])}
+        with self._lock:
+            self._state["stages"][name] = {"fingerprint": fingerprint, "outputs": outputs}
+        self._save_state()
+        logger.info(f">>>>>> {stage_label} completed in {elapsed:.1f}s <<<<<<\n\nx==========x")
+        return result, elapsed
+
+    def _with_upstream(self, targets) -> list:
+        # Targets and every stage they depend on, in dvc.yaml order
+        selected, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise KeyError(f"Stage '{name}' is not defined in dvc.yaml")
+            if name not in selected:
+                selected.add(name)
+                pending.extend(self.upstream[name])
+        return [name for name in self.stages if name in selected]
+
+    def run(self, targets: list = None, force: bool = False, dry_run: bool = False) -> dict:
+        """
+        Run the target stages (default: all) and the stages they depend on.
+
+        :param targets: Stage names; their upstream stages are included.
+        :param force: Run every selected stage even when it is up to date.
+        :param dry_run: Only report which stages would run.
+        :return: Dict of stage name to {"status": "ran" | "skipped" | "would run", "seconds": float}.
+        """
+        stages = self._with_upstream(targets or list(self.stages))
+        # Parameter files are read once per run
+        self._params = {}
+        report, results, running = {}, {}, {}
+        failed = None
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(report) < len(stages) and failed is None:
+                for name in stages:
+                    if name in report or name in running.values():
+                        continue
+                    if any(upstream not in report for upstream in self.upstream[name] if upstream in stages):
+                        continue
+                    # Exclusive stages wait for an idle pool and keep it to themselves
+                    if running and (name in self.exclusive or self.exclusive & set(running.values())):
+                        continue
+
+                    check_start = time.perf_counter()
+                    fingerprint = self.fingerprint(name)
+                    # In a dry run, a stage after one that would run would see new inputs too
+                    up_to_date = not force and self.is_up_to_date(name, fingerprint) and not any(
+                        report[upstream]["status"] == "would run" for upstream in self.upstream[name]
+                        if upstream in report)
+                    if up_to_date or dry_run:
+                        report[name] = {"status": "skipped" if up_to_date else "would run",
+                                        "seconds": time.perf_counter() - check_start}
+                        if up_to_date:
+                            logger.info(f"Stage {name} is up to date, skipping")
+                        continue
+                    running[executor.submit(self._run_stage, name, fingerprint, results)] = name
+                    if name in self.exclusive or len(running) >= self.max_workers:
+                        break
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name], seconds = future.result()
+                        report[name] = {"status": "ran", "seconds": seconds}
+                    except Exception as e:
+                        logger.exception(e)
+                        report[name] = {"status": "failed", "seconds": None}
+                        failed = failed or e
+
+            # Let stages already started finish before reporting
+            for future, name in running.items():
+                try:
+                    results[name], seconds = future.result()
+                    report[name] = {"status": "ran", "seconds": seconds}
+                except Exception as e:
+                    logger.exception(e)
+                    report[name] = {"status": "failed", "seconds": None}
+
+        # Keep the file hashes computed for skipped stages for the next run
+        self._save_state()
+        total = time.perf_counter() - start
+        logger.info("Pipeline summary:\n" + "\n".join(
+            f"  {name:<22} {report.get(name, {'status': 'not run'})['status']:<10} "
+            + (f"{report[name]['seconds']:8.2f}s" if report.get(name, {}).get("seconds") is not None else "")
+            for name in stages
+        ) + f"\n  {'total':<22} {'':<10} {total:8.2f}s")
+        if failed is not None:
+            raise failed
+        return report
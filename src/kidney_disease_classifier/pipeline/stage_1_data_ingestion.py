@@ -2,7 +2,7 @@
 # import required libraries
 from kidney_disease_classifier import logger
 from kidney_disease_classifier.components.data_ingestion import DataIngestion
-from kidney_disease_classifier.config.configuration import DataIngestionConfig, ConfigurationManager
+from kidney_disease_classifier.config.configuration import DataIngestionConfig, ConfigurationManager, configure_process
 
 # Define the name of the current stage in the data processing pipeline
 STAGE_NAME = "Data Ingestion stage"
@@ -26,6 +26,8 @@ class DataIngestionTrainingPipeline:
 
 # Entry point for the script
 if __name__ == '__main__':
+    # Logging and the oneDNN/OpenMP environment, before TensorFlow is imported
+    configure_process()
     try:
         # Log the start of the data ingestion stage
         logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
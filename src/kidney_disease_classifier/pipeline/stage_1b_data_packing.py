@@ -0,0 +1,41 @@
+
+# import required libraries
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.components.data_ingestion import DataIngestion
+from kidney_disease_classifier.config.configuration import ConfigurationManager, configure_process
+
+# Define the name of the current stage in the data processing pipeline
+STAGE_NAME = "Data Packing stage"
+
+# Class to manage packing the extracted images into a memory-mappable dataset
+class DataPackingPipeline:
+    def __init__(self):
+        pass  # Constructor does not require any initialization parameters
+
+    def main(self):
+        # Create an instance of the ConfigurationManager to load configurations
+        config = ConfigurationManager()
+        # Retrieve the data ingestion configuration
+        data_ingestion_config = config.get_data_ingestion_config()
+        # Create an instance of DataIngestion with the loaded configuration
+        data_ingestion = DataIngestion(config=data_ingestion_config)
+        # Decode and resize the extracted images once into the packed format
+        data_ingestion.pack_dataset()
+
+# Entry point for the script
+if __name__ == '__main__':
+    # Logging and the oneDNN/OpenMP environment, before TensorFlow is imported
+    configure_process()
+    try:
+        # Log the start of the data packing stage
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+        # Create an instance of the DataPackingPipeline
+        obj = DataPackingPipeline()
+        # Execute the main process of the data packing pipeline
+        obj.main()
+        # Log the successful completion of the data packing stage
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+    except Exception as e:
+        # Log any exceptions that occur during the execution
+        logger.exception(e)
+        raise e  # Reraise the exception for further handling if necessary
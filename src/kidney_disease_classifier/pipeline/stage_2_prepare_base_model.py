@@ -1,6 +1,6 @@
 
 from kidney_disease_classifier import logger
-from kidney_disease_classifier.config.configuration import ConfigurationManager
+from kidney_disease_classifier.config.configuration import ConfigurationManager, configure_process
 from kidney_disease_classifier.components.prepare_base_models import PrepareBaseModel
 
 
@@ -30,6 +30,8 @@ class PrepareBaseModelTrainingPipeline:
 
 # Entry point of the script
 if __name__ == '__main__':
+    # Logging and the oneDNN/OpenMP environment, before TensorFlow is imported
+    configure_process()
     try:
         # Log the start of the stage
         logger.info(f"*******************")
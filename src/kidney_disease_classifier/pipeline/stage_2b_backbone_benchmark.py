@@ -0,0 +1,42 @@
+
+# import required libraries
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.config.configuration import ConfigurationManager, configure_process
+from kidney_disease_classifier.components.backbone_benchmark import BackboneBenchmark
+
+# Define the name of the current stage in the data processing pipeline
+STAGE_NAME = "Backbone Benchmark stage"
+
+# Class to manage comparing the candidate backbones
+class BackboneBenchmarkPipeline:
+    def __init__(self):
+        pass  # Constructor does not require any initialization parameters
+
+    def main(self):
+        # Create an instance of the ConfigurationManager to load configurations
+        config = ConfigurationManager()
+        # Retrieve the backbone benchmark configuration
+        backbone_benchmark_config = config.get_backbone_benchmark_config()
+        # Create an instance of BackboneBenchmark with the loaded configuration
+        backbone_benchmark = BackboneBenchmark(config=backbone_benchmark_config)
+        # Measure every backbone and write the comparison report
+        backbone_benchmark.benchmark()
+
+# Entry point for the script
+if __name__ == '__main__':
+    # Logging and the oneDNN/OpenMP environment, before TensorFlow is imported
+    configure_process()
+    try:
+        # Log the start of the backbone benchmark stage
+        logger.info(f"*******************")
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+        # Create an instance of the BackboneBenchmarkPipeline
+        obj = BackboneBenchmarkPipeline()
+        # Execute the main process of the backbone benchmark pipeline
+        obj.main()
+        # Log the successful completion of the backbone benchmark stage
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+    except Exception as e:
+        # Log any exceptions that occur during the execution
+        logger.exception(e)
+        raise e  # Reraise the exception for further handling if necessary
@@ -3,7 +3,7 @@
 
 # LIBRARIES IMPORT
 from kidney_disease_classifier import logger
-from kidney_disease_classifier.config.configuration import ConfigurationManager
+from kidney_disease_classifier.config.configuration import ConfigurationManager, configure_process
 from kidney_disease_classifier.components.model_trainer import Training
 
 
@@ -31,8 +31,13 @@ class ModelTrainingPipeline:
         # Call the method to train the model
         training.train()
 
+        # Return the trainer so a following in-process stage can reuse its model and data
+        return training
+
 # Entry point of the script
 if __name__ == '__main__':
+    # Logging and the oneDNN/OpenMP environment, before TensorFlow is imported
+    configure_process()
     # Main method
     try:
         # Log the start of the stage
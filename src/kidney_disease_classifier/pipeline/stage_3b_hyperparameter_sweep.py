@@ -0,0 +1,42 @@
+
+# import required libraries
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.config.configuration import ConfigurationManager, configure_process
+from kidney_disease_classifier.components.hyperparameter_sweep import HyperparameterSweep
+
+# Define the name of the current stage in the data processing pipeline
+STAGE_NAME = "Hyperparameter Sweep stage"
+
+# Class to manage searching the training hyperparameters
+class HyperparameterSweepPipeline:
+    def __init__(self):
+        pass  # Constructor does not require any initialization parameters
+
+    def main(self):
+        # Create an instance of the ConfigurationManager to load configurations
+        config = ConfigurationManager()
+        # Retrieve the hyperparameter sweep configuration
+        hyperparameter_sweep_config = config.get_hyperparameter_sweep_config()
+        # Create an instance of HyperparameterSweep with the loaded configuration
+        hyperparameter_sweep = HyperparameterSweep(config=hyperparameter_sweep_config)
+        # Train the sampled configurations in parallel trials and write the sweep report
+        return hyperparameter_sweep.sweep()
+
+# Entry point for the script
+if __name__ == '__main__':
+    # Logging and the oneDNN/OpenMP environment, before TensorFlow is imported
+    configure_process()
+    try:
+        # Log the start of the hyperparameter sweep stage
+        logger.info(f"*******************")
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+        # Create an instance of the HyperparameterSweepPipeline
+        obj = HyperparameterSweepPipeline()
+        # Execute the main process of the hyperparameter sweep pipeline
+        obj.main()
+        # Log the successful completion of the hyperparameter sweep stage
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+    except Exception as e:
+        # Log any exceptions that occur during the execution
+        logger.exception(e)
+        raise e  # Reraise the exception for further handling if necessary
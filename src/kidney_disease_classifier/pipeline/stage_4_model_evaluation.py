@@ -1,5 +1,5 @@
 from kidney_disease_classifier import logger
-from kidney_disease_classifier.config.configuration import ConfigurationManager
+from kidney_disease_classifier.config.configuration import ConfigurationManager, configure_process
 from kidney_disease_classifier.components.model_evaluation_with_mlflow import Evaluation
 
 
@@ -12,23 +12,25 @@ class EvaluationPipeline:
         # Initialize any necessary attributes here (currently none)
         pass
 
-    def main(self):
+    def main(self, model=None, valid_data=None):
+        # model / valid_data: trained model and validation batches handed over when the
+        # training stage ran in the same process (loaded from artifacts otherwise)
         # Load the configuration manager to get evaluation settings
         config = ConfigurationManager()
         # Retrieve evaluation configuration
         eval_config = config.get_evaluation_config()
         
         # Create an instance of the Evaluation class with the retrieved configuration
-        evaluation = Evaluation(eval_config)
-        # Perform the evaluation
+        evaluation = Evaluation(eval_config, model=model, valid_data=valid_data)
+        # Perform the evaluation (also saves the evaluation score)
         evaluation.evaluation()
-        # Save the evaluation score
-        evaluation.save_score()
         # Optionally log the evaluation results into MLflow (commented out)
         evaluation.log_into_mlflow()
 
 # Entry point of the script
 if __name__ == '__main__':
+    # Logging and the oneDNN/OpenMP environment, before TensorFlow is imported
+    configure_process()
     try:
         # Log the start of the evaluation stage
         logger.info(f"*******************")
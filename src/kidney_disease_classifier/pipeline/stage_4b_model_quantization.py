@@ -0,0 +1,42 @@
+
+# import required libraries
+from kidney_disease_classifier import logger
+from kidney_disease_classifier.config.configuration import ConfigurationManager, configure_process
+from kidney_disease_classifier.components.model_quantization import ModelQuantization
+
+# Define the name of the current stage in the data processing pipeline
+STAGE_NAME = "Model Quantization stage"
+
+# Class to manage exporting the trained model to quantized TFLite variants
+class ModelQuantizationPipeline:
+    def __init__(self):
+        pass  # Constructor does not require any initialization parameters
+
+    def main(self):
+        # Create an instance of the ConfigurationManager to load configurations
+        config = ConfigurationManager()
+        # Retrieve the model quantization configuration
+        model_quantization_config = config.get_model_quantization_config()
+        # Create an instance of ModelQuantization with the loaded configuration
+        model_quantization = ModelQuantization(config=model_quantization_config)
+        # Export, validate and report every quantized variant
+        model_quantization.quantize()
+
+# Entry point for the script
+if __name__ == '__main__':
+    # Logging and the oneDNN/OpenMP environment, before TensorFlow is imported
+    configure_process()
+    try:
+        # Log the start of the model quantization stage
+        logger.info(f"*******************")
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+        # Create an instance of the ModelQuantizationPipeline
+        obj = ModelQuantizationPipeline()
+        # Execute the main process of the model quantization pipeline
+        obj.main()
+        # Log the successful completion of the model quantization stage
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+    except Exception as e:
+        # Log any exceptions that occur during the execution
+        logger.exception(e)
+        raise e  # Reraise the exception for further handling if necessary
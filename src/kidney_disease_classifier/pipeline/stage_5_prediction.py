@@ -1,37 +1,49 @@
 
-import os
 import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.utils import load_img, img_to_array
+from kidney_disease_classifier.constants import CLASS_NAMES
+from kidney_disease_classifier.config.configuration import ConfigurationManager
+from kidney_disease_classifier.components.inference_engine import get_inference_engine
 
 class PredictionPipeline:
+    # Prediction configuration shared by every pipeline instance in the process
+    _config = None
+
     def __init__(self, filename):
         # Initialize the pipeline with the image filename
         self.filename = filename
 
+    @classmethod
+    def get_engine(cls):
+        # Read the prediction configuration once and reuse the resident inference engine
+        if cls._config is None:
+            cls._config = ConfigurationManager().get_prediction_config()
+        return get_inference_engine(cls._config)
+
+    @staticmethod
+    def _label(class_index):
+        # Map the predicted class index to its label, in the label order used in training
+        return CLASS_NAMES[class_index]
+
+    @classmethod
+    def predict_images(cls, images):
+        """
+        Predict labels for a batch of images in one call to the inference engine.
+
+        :param images: List of file paths, encoded image bytes, PIL images or numpy arrays.
+        :return: List with one {"image": label, "probabilities": [...]} dict per image.
+        """
+        probabilities = cls.get_engine().predict(images)
+        return [
+            {"image": cls._label(int(np.argmax(probs))), "probabilities": probs.tolist()}
+            for probs in probabilities
+        ]
+
     def predict(self):
-        # Load the pre-trained model from the specified path
-        model = load_model(os.path.join("model", "model.h5"))
-
-        # Load the image and resize it to match the model's input size (224x224)
-        test_image = load_img(self.filename, target_size=(224, 224))
-        
-        # Convert the image to a numpy array
-        test_image = img_to_array(test_image)
-        
-        # Expand dimensions to create a batch of one image
-        test_image = np.expand_dims(test_image, axis=0)
-        
-        # Use the model to predict the class of the image
-        result = np.argmax(model.predict(test_image), axis=1)
-        
+        # Use the already loaded model to predict the class of the image
+        result = np.argmax(self.get_engine().predict([self.filename]), axis=1)
+
         # Output the prediction result
         print(result)
 
-        # Check the predicted class and return the corresponding label
-        if result[0] == 1:
-            prediction = 'Normal'
-            return [{"image": prediction}]
-        else:
-            prediction = 'Tumor'
-            return [{"image": prediction}]
\ No newline at end of file
+        # Return the label of the predicted class
+        return [{"image": self._label(result[0])}]
@@ -2,7 +2,6 @@
 import os
 import json
 import yaml
-import joblib
 import base64
 from typing import Any
 from pathlib import Path
@@ -94,6 +93,8 @@ def save_bin(data: Any, path: Path):
         data (Any): Data to save as binary.
         path (Path): Path where binary file will be saved.
     """
+    import joblib  # Imported here, it is only needed for binary files
+
     joblib.dump(value=data, filename=path)
     logger.info(f"Binary file saved at: {path}")
 
@@ -109,6 +110,8 @@ def load_bin(path: Path) -> Any:
     Returns:
         Any: Object stored in the binary file.
     """
+    import joblib  # Imported here, it is only needed for binary files
+
     data = joblib.load(path)
     logger.info(f"Binary file loaded from: {path}")
     return data
@@ -130,6 +133,21 @@ def get_size(path: Path) -> str:
     return f"~ {size_in_kb} KB"
 
 
+def decodeImageToBytes(imgstring: str) -> bytes:
+    """
+    Decodes a base64 string into the raw image bytes without touching the disk.
+
+    Args:
+        imgstring (str): Base64-encoded image string (an optional data URL prefix is ignored).
+
+    Returns:
+        bytes: Encoded image bytes (e.g. JPEG or PNG).
+    """
+    if "," in imgstring and imgstring.lstrip().startswith("data:"):
+        imgstring = imgstring.split(",", 1)[1]
+    return base64.b64decode(imgstring)
+
+
 def decodeImage(imgstring: str, fileName: str):
     """
     Decodes a base64 string and saves it as an image file.
@@ -138,7 +156,7 @@ def decodeImage(imgstring: str, fileName: str):
         imgstring (str): Base64-encoded image string.
         fileName (str): Path where the decoded image will be saved.
     """
-    imgdata = base64.b64decode(imgstring)
+    imgdata = decodeImageToBytes(imgstring)
     with open(fileName, 'wb') as f:
         f.write(imgdata)
     logger.info(f"Image decoded and saved to '{fileName}'")
@@ -0,0 +1,124 @@
+
+# import required libraries
+import os
+import json
+import socket
+import argparse
+import subprocess
+from kidney_disease_classifier import logger
+
+
+def build_strategy(distribution: dict):
+    """
+    Create the tf.distribute strategy selected by the DISTRIBUTION params.
+
+    Must be called before any other TensorFlow op runs in the process, because
+    MultiWorkerMirroredStrategy configures the collective runtime at creation.
+
+    Args:
+        distribution (dict): DISTRIBUTION params with STRATEGY ("mirrored", "multi_worker"
+            or None) and COMMUNICATION ("auto", "ring" or "nccl").
+
+    Returns:
+        tf.distribute.Strategy: The strategy (the default one-device strategy for None).
+    """
+    import tensorflow as tf
+
+    strategy_name = distribution["STRATEGY"]
+    if not strategy_name:
+        return tf.distribute.get_strategy()
+    if strategy_name == "mirrored":
+        # All local devices (every GPU, or the CPU) in one process
+        return tf.distribute.MirroredStrategy()
+    if strategy_name == "multi_worker":
+        # One replica per worker process; the cluster comes from the TF_CONFIG environment variable
+        implementation = {
+            "auto": tf.distribute.experimental.CommunicationImplementation.AUTO,
+            "ring": tf.distribute.experimental.CommunicationImplementation.RING,
+            "nccl": tf.distribute.experimental.CommunicationImplementation.NCCL,
+        }[distribution["COMMUNICATION"]]
+        return tf.distribute.MultiWorkerMirroredStrategy(
+            communication_options=tf.distribute.experimental.CommunicationOptions(implementation=implementation)
+        )
+    raise ValueError(f"Unknown distribution strategy '{strategy_name}', expected mirrored or multi_worker")
+
+
+def is_chief(strategy) -> bool:
+    """
+    Returns True for the worker that writes artifacts: the "chief" task, worker 0 of
+    a cluster without a chief, or the only process when training is not multi-worker.
+    """
+    resolver = getattr(strategy, "cluster_resolver", None)
+    if resolver is None or resolver.task_type is None:
+        return True
+    if resolver.task_type == "chief":
+        return True
+    return resolver.task_type == "worker" and resolver.task_id == 0 and "chief" not in resolver.cluster_spec().as_dict()
+
+
+def _free_ports(count: int) -> list:
+    # Bind to port 0 so the OS picks unused ports, then release them for the workers
+    sockets = [socket.socket() for _ in range(count)]
+    for sock in sockets:
+        sock.bind(("localhost", 0))
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+def launch_local_workers(num_workers: int, command: list, threads_per_worker: int = None,
+                         capture_output: bool = False) -> list:
+    """
+    Run a training command as a local multi-worker cluster on this machine.
+
+    Every process gets its own TF_CONFIG describing the same localhost cluster and
+    its worker index, and its TensorFlow thread pools are limited so the workers
+    share the cores instead of oversubscribing them.
+
+    Args:
+        num_workers (int): Number of worker processes.
+        command (list): Command to run in every worker, e.g. ["python", "stage_3_model_training.py"].
+        threads_per_worker (int): Intra-op threads per worker (default: cores // num_workers).
+        capture_output (bool): Return the workers' stdout instead of streaming it.
+
+    Returns:
+        list: CompletedProcess objects, in worker order.
+    """
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+    cluster = {"worker": [f"localhost:{port}" for port in _free_ports(num_workers)]}
+
+    processes = []
+    for index in range(num_workers):
+        env = dict(
+            os.environ,
+            TF_CONFIG=json.dumps({"cluster": cluster, "task": {"type": "worker", "index": index}}),
+            TF_NUM_INTRAOP_THREADS=str(threads),
+            TF_NUM_INTEROP_THREADS="2",
+            OMP_NUM_THREADS=str(threads),
+        )
+        stdout = subprocess.PIPE if capture_output else None
+        processes.append(subprocess.Popen(command, env=env, stdout=stdout, text=True))
+    logger.info(f"Launched {num_workers} local workers with {threads} threads each: {cluster['worker']}")
+
+    results = []
+    for process in processes:
+        stdout, _ = process.communicate()
+        results.append(subprocess.CompletedProcess(process.args, process.returncode, stdout))
+    failed = [index for index, result in enumerate(results) if result.returncode != 0]
+    if failed:
+        raise RuntimeError(f"Workers {failed} exited with an error")
+    return results
+
+
+if __name__ == "__main__":
+    # python -m kidney_disease_classifier.utils.distributed --workers 2 -- python src/.../stage_3_model_training.py
+    parser = argparse.ArgumentParser(description="Run a command as a local TF_CONFIG multi-worker cluster")
+    parser.add_argument("--workers", type=int, default=2, help="Number of worker processes")
+    parser.add_argument("--threads-per-worker", type=int, default=None, help="Intra-op threads per worker")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Command run by every worker (after --)")
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("no command given to run in the workers")
+    launch_local_workers(args.workers, command, args.threads_per_worker)
@@ -0,0 +1,40 @@
+
+# import required libraries
+import importlib
+import threading
+import types
+
+# One import at a time: TensorFlow and MLflow are not safe to initialize from two threads at once
+_IMPORT_LOCK = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    `tf = LazyModule("tensorflow")` at the top of a module costs nothing; the first
+    `tf.<name>` imports TensorFlow and later accesses go straight to the real module.
+    Modules using it for type annotations need `from __future__ import annotations`
+    so the annotations are not evaluated at definition time.
+
+    Args:
+        name (str): Fully qualified name of the module to import.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _IMPORT_LOCK:
+                if self._module is None:
+                    self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attribute):
+        # Only called for attributes not set on the stand-in itself
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
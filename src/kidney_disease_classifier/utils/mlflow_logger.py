@@ -0,0 +1,339 @@
+
+# import required libraries
+import os
+import json
+import time
+import queue
+import atexit
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+from kidney_disease_classifier import logger
+
+# Runs logged to the local fallback store that still have to be copied to their tracking server
+PENDING_SYNC_FILE = "pending_sync.json"
+
+# MLflow log_batch limits per request
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+
+# MLflow's package initialization is not safe to run from two threads at once
+_IMPORT_LOCK = threading.Lock()
+
+
+def _is_remote(tracking_uri: str) -> bool:
+    # file: URIs and plain paths are local stores; everything else goes over the network
+    return urlparse(str(tracking_uri)).scheme not in ("", "file")
+
+
+def _local_root(fallback_uri: str) -> Path:
+    # Directory of a file: tracking store
+    parsed = urlparse(fallback_uri)
+    return Path(parsed.netloc + parsed.path if parsed.scheme == "file" else fallback_uri)
+
+
+def _import_mlflow():
+    # The worker thread and close() may both be the first to import MLflow
+    with _IMPORT_LOCK:
+        import mlflow.tracking
+        import mlflow.entities
+        import mlflow.exceptions
+    return mlflow
+
+
+def _mlflow_client(tracking_uri: str):
+    mlflow = _import_mlflow()
+    if urlparse(tracking_uri).scheme in ("", "file"):
+        # Recent MLflow versions only open file stores when explicitly allowed
+        os.environ.setdefault("MLFLOW_ALLOW_FILE_STORE", "true")
+    return mlflow.tracking.MlflowClient(tracking_uri=tracking_uri)
+
+
+def server_reachable(tracking_uri: str, timeout: float) -> bool:
+    """
+    Check that a tracking server answers at all (any HTTP status, even 401, counts)
+    without MLflow's retry loop, which can block for minutes when offline.
+    """
+    import requests
+    try:
+        requests.get(str(tracking_uri).rstrip("/") + "/health", timeout=timeout)
+        return True
+    except requests.RequestException as e:
+        logger.warning(f"MLflow tracking server {tracking_uri} is unreachable: {e}")
+        return False
+
+
+class AsyncMlflowLogger:
+    """
+    Non-blocking MLflow run logger.
+
+    Calls only enqueue the operation; a background thread creates the run and
+    sends the queued params, metrics and tags as batched `log_batch` requests,
+    followed by the artifacts. When the tracking server is unreachable, fails, or
+    does not finish within `flush_timeout` at `close()`, the complete run is
+    written to the local `fallback_uri` file store instead and recorded for a
+    later `sync_pending_runs()`, so pipeline time no longer depends on the server.
+    """
+
+    def __init__(self, tracking_uri: str, experiment_name: str, run_name: str = None,
+                 fallback_uri: str = "file:./mlruns", probe_timeout: float = 5.0, flush_timeout: float = 60.0):
+        self.tracking_uri = str(tracking_uri)
+        self.experiment_name = experiment_name
+        self.run_name = run_name
+        self.fallback_uri = fallback_uri  # None: no fallback, the run is dropped on failure
+        self.probe_timeout = probe_timeout
+        self.flush_timeout = flush_timeout
+
+        # Every operation is kept so the whole run can be replayed to the fallback store;
+        # operations numbered below `_replayed` were already written there
+        self._history = []
+        self._replayed = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+
+        # Run the worker currently logs to (created lazily, remote first)
+        self._client = None
+        self.run_id = None
+        self.fell_back = False
+        self._closed = False
+
+        self._worker = threading.Thread(target=self._run, name="mlflow-logger", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def log_params(self, params: dict):
+        # MLflow stores params as strings, so nested values are logged as their repr
+        self._put("params", {key: str(value) for key, value in params.items()})
+
+    def log_metrics(self, metrics: dict, step: int = 0):
+        self._put("metrics", ({key: float(value) for key, value in metrics.items()}, step, int(time.time() * 1000)))
+
+    def set_tags(self, tags: dict):
+        self._put("tags", {key: str(value) for key, value in tags.items()})
+
+    def log_dict(self, data, artifact_file: str):
+        # Serialize now so later changes to `data` do not leak into the run
+        self._put("text", (json.dumps(data, indent=2), artifact_file))
+
+    def log_artifact(self, local_path, artifact_path: str = None):
+        self._put("artifact", (str(local_path), artifact_path))
+
+    def register_model(self, artifact_path: str, name: str):
+        # Only tracking servers have a model registry; file stores skip this operation
+        self._put("register", (artifact_path, name))
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every queued operation is logged. Returns False on timeout.
+        """
+        deadline = time.monotonic() + (self.flush_timeout if timeout is None else timeout)
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout: float = None):
+        """
+        End the run and flush within `timeout` seconds (default `flush_timeout`).
+        Whatever the server has not received by then is written to the local store.
+        """
+        if self._closed:
+            return
+        timeout = self.flush_timeout if timeout is None else timeout
+        self._put("end", "FINISHED")
+        self._closed = True
+        if not self.flush(timeout):
+            logger.warning(f"MLflow logging did not finish within {timeout}s")
+            with self._lock:
+                self._fall_back()
+        self._queue.put(None)
+
+    def _put(self, kind, payload):
+        if self._closed:
+            raise RuntimeError("MLflow logger is already closed")
+        with self._lock:
+            self._queue.put((len(self._history), kind, payload))
+            self._history.append((kind, payload))
+
+    def _run(self):
+        while True:
+            # Take everything queued right now so consecutive params/metrics/tags share requests
+            items = [self._queue.get()]
+            while items[-1] is not None and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+
+            with self._lock:
+                operations = [(kind, payload) for item in items if item is not None
+                              for number, kind, payload in [item] if number >= self._replayed]
+            try:
+                if operations and (self.fallback_uri or not self.fell_back):
+                    self._apply(operations)
+            except Exception as e:
+                logger.warning(f"MLflow logging failed: {e}")
+                with self._lock:
+                    self._fall_back()
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if items[-1] is None:
+                return
+
+    def _open_run(self, tracking_uri: str):
+        # Create the run on the given store; remote servers are probed first
+        if _is_remote(tracking_uri) and not server_reachable(tracking_uri, self.probe_timeout):
+            raise ConnectionError(f"{tracking_uri} is unreachable")
+        client = _mlflow_client(tracking_uri)
+        experiment = client.get_experiment_by_name(self.experiment_name)
+        experiment_id = experiment.experiment_id if experiment else client.create_experiment(self.experiment_name)
+        run = client.create_run(experiment_id, run_name=self.run_name)
+        logger.info(f"MLflow run {run.info.run_id} started on {tracking_uri}")
+        return client, run.info.run_id
+
+    def _apply(self, operations: list):
+        mlflow = _import_mlflow()
+        Metric, Param, RunTag = mlflow.entities.Metric, mlflow.entities.Param, mlflow.entities.RunTag
+
+        if self._client is None:
+            client, run_id = self._open_run(self.tracking_uri)
+            with self._lock:
+                if self.fell_back:
+                    return  # close() replayed the run to the fallback store meanwhile
+                self._client, self.run_id = client, run_id
+        client, run_id = self._client, self.run_id
+
+        metrics, params, tags = [], [], []
+        for kind, payload in operations:
+            if kind == "metrics":
+                values, step, timestamp = payload
+                metrics.extend(Metric(key, value, timestamp, step) for key, value in values.items())
+            elif kind == "params":
+                params.extend(Param(key, value) for key, value in payload.items())
+            elif kind == "tags":
+                tags.extend(RunTag(key, value) for key, value in payload.items())
+
+        # Batched requests for the scalar data, within MLflow's per-request limits
+        while metrics or params or tags:
+            client.log_batch(run_id, metrics=metrics[:MAX_METRICS_PER_BATCH],
+                             params=params[:MAX_PARAMS_PER_BATCH], tags=tags[:MAX_PARAMS_PER_BATCH])
+            metrics = metrics[MAX_METRICS_PER_BATCH:]
+            params, tags = params[MAX_PARAMS_PER_BATCH:], tags[MAX_PARAMS_PER_BATCH:]
+
+        # Files, registration and the end of the run, in submission order
+        for kind, payload in operations:
+            if kind == "text":
+                client.log_text(run_id, *payload)
+            elif kind == "artifact":
+                client.log_artifact(run_id, *payload)
+            elif kind == "register" and _is_remote(client.tracking_uri):
+                artifact_path, name = payload
+                try:
+                    client.create_registered_model(name)
+                except mlflow.exceptions.MlflowException:
+                    pass  # Already registered; add a new version
+                source = f"{client.get_run(run_id).info.artifact_uri}/{artifact_path}"
+                client.create_model_version(name, source=source, run_id=run_id)
+            elif kind == "end":
+                client.set_terminated(run_id, status=payload)
+
+    def _fall_back(self):
+        # Replay the whole run into the local file store; called with the lock held
+        if self.fell_back:
+            return
+        self.fell_back = True
+        self._replayed = len(self._history)
+        remote_run_id = self.run_id
+        if not self.fallback_uri:
+            logger.error(f"MLflow run for {self.tracking_uri} was not logged")
+            return
+
+        try:
+            self._client, self.run_id = self._open_run(self.fallback_uri)
+            self._apply(list(self._history))
+        except Exception as e:
+            logger.exception(f"MLflow logging to the fallback store {self.fallback_uri} failed: {e}")
+            return
+        if _is_remote(self.tracking_uri):
+            _record_pending_sync(self.fallback_uri, {
+                "local_run_id": self.run_id,
+                "tracking_uri": self.tracking_uri,
+                "experiment_name": self.experiment_name,
+                "run_name": self.run_name,
+                "incomplete_remote_run_id": remote_run_id,
+                # File stores have no registry, so registrations are repeated on sync
+                "registered_models": [payload for kind, payload in self._history if kind == "register"]
+            })
+        logger.info(f"MLflow run {self.run_id} written to {self.fallback_uri}, "
+                    f"sync it later with `python -m kidney_disease_classifier.utils.mlflow_logger --sync`")
+
+
+def _pending_sync_path(fallback_uri: str) -> Path:
+    return _local_root(fallback_uri) / PENDING_SYNC_FILE
+
+
+def _record_pending_sync(fallback_uri: str, entry: dict):
+    path = _pending_sync_path(fallback_uri)
+    pending = json.loads(path.read_text()) if path.exists() else []
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(pending + [entry], indent=2))
+
+
+def sync_pending_runs(fallback_uri: str = "file:./mlruns") -> int:
+    """
+    Copy the runs that fell back to the local store to the tracking servers they
+    were meant for. Runs that still cannot be copied stay pending.
+
+    Args:
+        fallback_uri (str): The local file store the runs were written to.
+
+    Returns:
+        int: Number of runs copied.
+    """
+    path = _pending_sync_path(fallback_uri)
+    if not path.exists():
+        return 0
+    local = _mlflow_client(fallback_uri)
+    remaining, synced = [], 0
+    for entry in json.loads(path.read_text()):
+        try:
+            run = local.get_run(entry["local_run_id"])
+            # No fallback: a run that cannot reach its server simply stays pending
+            remote = AsyncMlflowLogger(entry["tracking_uri"], entry["experiment_name"], entry["run_name"],
+                                       fallback_uri=None)
+            remote.log_params(run.data.params)
+            remote.set_tags({key: value for key, value in run.data.tags.items() if not key.startswith("mlflow.")})
+            for key in run.data.metrics:
+                for metric in local.get_metric_history(run.info.run_id, key):
+                    remote.log_metrics({key: metric.value}, step=metric.step)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                local_artifacts = local.download_artifacts(run.info.run_id, "", tmp_dir)
+                for name in os.listdir(local_artifacts):
+                    item = os.path.join(local_artifacts, name)
+                    remote.log_artifact(item, None)
+                for artifact_path, name in entry.get("registered_models", []):
+                    remote.register_model(artifact_path, name)
+                remote.close()
+            if remote.fell_back:
+                raise ConnectionError(f"{entry['tracking_uri']} is unreachable")
+            synced += 1
+        except Exception as e:
+            logger.warning(f"Run {entry['local_run_id']} is still pending: {e}")
+            remaining.append(entry)
+
+    path.write_text(json.dumps(remaining, indent=2))
+    logger.info(f"Synced {synced} MLflow runs, {len(remaining)} still pending")
+    return synced
+
+
+if __name__ == "__main__":
+    # python -m kidney_disease_classifier.utils.mlflow_logger --sync
+    parser = argparse.ArgumentParser(description="Copy MLflow runs from the local fallback store to their server")
+    parser.add_argument("--sync", action="store_true", help="Sync the pending runs")
+    parser.add_argument("--fallback-uri", default="file:./mlruns", help="Local store the runs fell back to")
+    args = parser.parse_args()
+    if args.sync:
+        sync_pending_runs(args.fallback_uri)
+    else:
+        parser.print_help()
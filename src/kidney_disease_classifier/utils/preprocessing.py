@@ -0,0 +1,125 @@
+# Import libraries
+import io
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Factor used to bring raw 0-255 pixel values into the [0, 1] range expected by the model
+RESCALE_FACTOR = 1.0 / 255
+
+# Interpolation used when resizing images (matches flow_from_directory in training)
+INTERPOLATION = "bilinear"
+
+
+def decode_image(image, image_size: list) -> np.ndarray:
+    """
+    Decodes a single image, converts it to RGB and resizes it to the model input.
+
+    The steps mirror `tf.keras.utils.load_img(..., interpolation="bilinear")` used by
+    `flow_from_directory`, so serving sees exactly the pixels training saw.
+
+    Args:
+        image: File path, raw encoded bytes, PIL image or uint8 numpy array.
+        image_size (list): Model input size as [height, width, channels].
+
+    Returns:
+        np.ndarray: uint8 array of shape (height, width, 3).
+    """
+    height, width = image_size[:2]
+
+    if isinstance(image, (str, Path)):
+        with open(image, "rb") as f:
+            image = Image.open(io.BytesIO(f.read()))
+    elif isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+    elif isinstance(image, np.ndarray):
+        image = Image.fromarray(np.asarray(image, dtype=np.uint8))
+
+    if not isinstance(image, Image.Image):
+        raise TypeError(f"Unsupported image input type: {type(image).__name__}")
+
+    # Convert image to RGB if it has an alpha channel or grayscale
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    # Resize image to match the model's input shape
+    if image.size != (width, height):
+        image = image.resize((width, height), Image.BILINEAR)
+
+    return np.asarray(image, dtype=np.uint8)
+
+
+def decode_batch(images: list, image_size: list, num_workers: int = 8) -> np.ndarray:
+    """
+    Decodes and resizes a list of images in parallel into one uint8 batch.
+
+    Args:
+        images (list): File paths, encoded bytes, PIL images or numpy arrays.
+        image_size (list): Model input size as [height, width, channels].
+        num_workers (int, optional): Threads used for decoding. Defaults to 8.
+
+    Returns:
+        np.ndarray: uint8 array of shape (len(images), height, width, 3).
+    """
+    height, width = image_size[:2]
+    batch = np.empty((len(images), height, width, 3), dtype=np.uint8)
+
+    def _decode_into(index):
+        batch[index] = decode_image(images[index], image_size)
+
+    # PIL releases the GIL while decoding and resizing, so threads scale on CPU
+    if num_workers > 1 and len(images) > 1:
+        with ThreadPoolExecutor(max_workers=min(num_workers, len(images))) as executor:
+            list(executor.map(_decode_into, range(len(images))))
+    else:
+        for index in range(len(images)):
+            _decode_into(index)
+    return batch
+
+
+def normalize_batch(batch: np.ndarray) -> np.ndarray:
+    """
+    Rescales a batch of raw pixel values to [0, 1] as float32.
+
+    Uses the same float32 multiply as `ImageDataGenerator(rescale=RESCALE_FACTOR)`
+    so the result is bit-identical to the training generators.
+
+    Args:
+        batch (np.ndarray): Array of raw 0-255 pixel values.
+
+    Returns:
+        np.ndarray: float32 array with the same shape.
+    """
+    return np.asarray(batch, dtype=np.float32) * np.float32(RESCALE_FACTOR)
+
+
+def preprocess_batch(images: list, image_size: list, num_workers: int = 8) -> np.ndarray:
+    """
+    Decodes, resizes and normalizes a list of images into a model-ready batch.
+
+    Args:
+        images (list): File paths, encoded bytes, PIL images or numpy arrays.
+        image_size (list): Model input size as [height, width, channels].
+        num_workers (int, optional): Threads used for decoding. Defaults to 8.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(images), height, width, 3).
+    """
+    return normalize_batch(decode_batch(images, image_size, num_workers=num_workers))
+
+
+def tf_normalize(batch):
+    """
+    Rescales a tensor of raw pixel values to [0, 1] inside a TensorFlow graph.
+
+    Args:
+        batch (tf.Tensor): Tensor of raw 0-255 pixel values.
+
+    Returns:
+        tf.Tensor: float32 tensor with the same shape.
+    """
+    import tensorflow as tf
+
+    return tf.cast(batch, tf.float32) * RESCALE_FACTOR
@@ -0,0 +1,113 @@
+
+# import required libraries
+import os
+import sys
+from kidney_disease_classifier import logger
+
+# tf.data map parallelism set from the runtime section (None: let tf.data autotune it)
+_data_parallel_calls = None
+
+# Runtime settings already applied in this process (TensorFlow's thread pools can be set only once)
+_applied_runtime = None
+
+# Thread count variables exported by apply_runtime_config itself, before TensorFlow was imported
+_exported_env_vars = set()
+
+
+def configure_environment(runtime: dict):
+    """
+    Export the settings TensorFlow and OpenMP read once, when TensorFlow is imported.
+
+    Call it before the first `import tensorflow` of the process. Worker processes
+    started afterwards inherit the variables, so the settings also reach them.
+
+    Args:
+        runtime (dict): The runtime section of config.yaml.
+    """
+    if runtime["onednn"] is not None:
+        value = "1" if runtime["onednn"] else "0"
+        if "tensorflow" in sys.modules and os.environ.get("TF_ENABLE_ONEDNN_OPTS") != value:
+            logger.warning("TensorFlow is already imported, the oneDNN setting applies to child processes only; "
+                           f"export TF_ENABLE_ONEDNN_OPTS={value} to apply it here")
+        os.environ["TF_ENABLE_ONEDNN_OPTS"] = value
+    if runtime["intra_op_threads"]:
+        # oneDNN kernels use OpenMP threads next to TensorFlow's own pool
+        os.environ.setdefault("OMP_NUM_THREADS", str(runtime["intra_op_threads"]))
+
+
+def apply_runtime_config(runtime: dict):
+    """
+    Apply the runtime section of config.yaml to this process: environment, CPU
+    affinity, TensorFlow intra/inter-op thread pools and tf.data parallelism.
+
+    TensorFlow's thread pools are fixed once it runs its first op, so this must be
+    called before any model is built. When TensorFlow is not imported yet, the
+    thread counts are exported as TF_NUM_INTRAOP_THREADS / TF_NUM_INTEROP_THREADS
+    instead of importing it. Later calls with the same settings are no-ops.
+
+    Args:
+        runtime (dict): The runtime section of config.yaml.
+    """
+    global _applied_runtime, _data_parallel_calls
+    runtime = dict(runtime)
+    if runtime == _applied_runtime:
+        return
+    configure_environment(runtime)
+
+    if runtime["cpu_affinity"] and hasattr(os, "sched_setaffinity"):
+        # Pin the process (and the threads it starts afterwards) to the given cores
+        os.sched_setaffinity(0, runtime["cpu_affinity"])
+
+    thread_env_vars = (("intra_op_threads", "TF_NUM_INTRAOP_THREADS"), ("inter_op_threads", "TF_NUM_INTEROP_THREADS"))
+    if "tensorflow" not in sys.modules:
+        # TensorFlow is imported lazily, when a stage first needs it, and reads its thread counts from
+        # these variables when it starts; stages that never use it skip the import entirely
+        for key, env_var in thread_env_vars:
+            # Thread counts exported for this process (e.g. by the local worker launcher) take precedence
+            if os.environ.get(env_var) and env_var not in _exported_env_vars:
+                continue
+            if runtime[key]:
+                os.environ[env_var] = str(runtime[key])
+                _exported_env_vars.add(env_var)
+            elif env_var in _exported_env_vars:
+                del os.environ[env_var]
+                _exported_env_vars.discard(env_var)
+        _data_parallel_calls = runtime["data_parallel_calls"]
+        _applied_runtime = runtime
+        logger.info(f"Runtime: {runtime}")
+        return
+
+    import tensorflow as tf
+    threading_settings = (
+        ("intra_op_threads", "TF_NUM_INTRAOP_THREADS", tf.config.threading.get_intra_op_parallelism_threads,
+         tf.config.threading.set_intra_op_parallelism_threads),
+        ("inter_op_threads", "TF_NUM_INTEROP_THREADS", tf.config.threading.get_inter_op_parallelism_threads,
+         tf.config.threading.set_inter_op_parallelism_threads),
+    )
+    for key, env_var, get_threads, set_threads in threading_settings:
+        # Thread counts exported for this process (e.g. by the local worker launcher) take precedence,
+        # and counts exported here before the import were already read by TensorFlow
+        if os.environ.get(env_var) and (env_var not in _exported_env_vars or
+                                        os.environ[env_var] == str(runtime[key])):
+            continue
+        # None keeps TensorFlow's default (0: one thread per core)
+        threads = runtime[key] or 0
+        if get_threads() == threads:
+            continue
+        try:
+            set_threads(threads)
+        except RuntimeError:
+            logger.warning(f"TensorFlow is already initialized, {key}={threads} is not applied")
+
+    _data_parallel_calls = runtime["data_parallel_calls"]
+    _applied_runtime = runtime
+    logger.info(f"Runtime: {runtime}")
+
+
+def data_parallel_calls() -> int:
+    """
+    Returns the `num_parallel_calls` for tf.data map transformations: the configured
+    value, or tf.data.AUTOTUNE when the runtime section leaves it unset.
+    """
+    import tensorflow as tf
+    return _data_parallel_calls or tf.data.AUTOTUNE
@@ -1,9 +1,16 @@
 import os
+import time
 import numpy as np
 import streamlit as st
 from PIL import Image
+from kidney_disease_classifier.config.configuration import ConfigurationManager, configure_process
+
+# Set up logging and export the oneDNN settings of config.yaml before TensorFlow is imported
+configure_process()
+
 from tensorflow.keras.models import load_model
-from tensorflow.keras.utils import img_to_array
+from kidney_disease_classifier.utils.preprocessing import preprocess_batch
+from kidney_disease_classifier.constants import CLASS_NAMES
 
 # Streamlit page configuration
 st.set_page_config(
@@ -94,77 +101,80 @@ st.markdown(
 )
 
 # File uploader
-st.markdown('<div class="upload-box"><h3>📤 Upload your X-Ray Image below (JPEG, PNG, JPG)</h3></div>', unsafe_allow_html=True)
-uploaded_file = st.file_uploader("📂 Select an image file...", type=["png", "jpg", "jpeg"])
+st.markdown('<div class="upload-box"><h3>📤 Upload your X-Ray Images below (JPEG, PNG, JPG)</h3></div>', unsafe_allow_html=True)
+uploaded_files = st.file_uploader("📂 Select one or more image files...", type=["png", "jpg", "jpeg"], accept_multiple_files=True)
 
 # Class for prediction pipeline
 class PredictionPipeline:
     def __init__(self, model_path):
         self.model = load_model(model_path)
 
-    def preprocess_image(self, image):
+    def preprocess_images(self, images):
         """
-        Preprocesses the uploaded image to ensure compatibility with the model.
-        - Converts to RGB if necessary.
-        - Resizes the image to (224, 224).
-        - Converts to a NumPy array with appropriate dimensions.
+        Preprocesses the uploaded images into one batch compatible with the model.
+        Uses the shared preprocessing module so the tensor matches training exactly.
         """
-        # Convert image to RGB if it has an alpha channel or grayscale
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        
-        # Resize image to match the model's input shape
-        resized_image = image.resize((224, 224))
-        
-        # Convert the image to a NumPy array
-        image_array = img_to_array(resized_image)
-        
-        # Expand dimensions to match the model's input (1, 224, 224, 3)
-        preprocessed_image = np.expand_dims(image_array, axis=0)
-        
-        # Normalize pixel values (optional, based on your model's training)
-        preprocessed_image /= 255.0
-        
-        return preprocessed_image
-
-    def predict(self, image):
+        return preprocess_batch(images, IMAGE_SIZE)
+
+    def predict(self, images):
         """
-        Predicts the class of the uploaded image.
-        - Preprocesses the image.
-        - Passes it through the model for prediction.
-        - Returns a user-friendly result string.
+        Predicts the class of every uploaded image in a single batched forward pass.
+        - Preprocesses the images into one batch.
+        - Passes the batch through the model for prediction.
+        - Returns the user-friendly result strings and the inference latency in seconds.
         """
-        # Preprocess the image
-        preprocessed_image = self.preprocess_image(image)
-        
-        # Predict using the loaded model
-        result = np.argmax(self.model.predict(preprocessed_image), axis=1)
-        
-        # Return prediction result
-        return "Tumor" if result[0] == 1 else "Normal"
-
-# Load the model only once to save resources
+        # Preprocess the images
+        preprocessed_images = self.preprocess_images(images)
+
+        # Predict using the loaded model, timing only the forward pass
+        start = time.perf_counter()
+        result = np.argmax(self.model.predict_on_batch(preprocessed_images), axis=1)
+        latency = time.perf_counter() - start
+
+        # Return prediction results
+        return [CLASS_NAMES[index] for index in result], latency
+
+@st.cache_resource(max_entries=1, show_spinner="Loading model...")
+def load_pipeline(model_path, model_mtime_ns, model_size):
+    """
+    Loads the model once per process and shares it across reruns and sessions.
+    The file's mtime and size are part of the cache key, so replacing model.h5
+    loads the new model and evicts the old one (max_entries=1).
+    """
+    # Apply the thread and affinity settings of config.yaml before the model is built
+    ConfigurationManager()
+    return PredictionPipeline(model_path)
+
+def get_pipeline(model_path):
+    # Key the cached pipeline on the model file's current mtime and size
+    stat = os.stat(model_path)
+    return load_pipeline(model_path, stat.st_mtime_ns, stat.st_size)
+
 MODEL_PATH = r"model/model.h5"
-pipeline = PredictionPipeline(MODEL_PATH)
+IMAGE_SIZE = [224, 224, 3]
+pipeline = get_pipeline(MODEL_PATH)
 
-if uploaded_file:
-    # Display the uploaded image
-    image = Image.open(uploaded_file)
-    st.image(image, caption="🖼️ Uploaded X-Ray Image", use_container_width=True)
+if uploaded_files:
+    # Display the uploaded images
+    images = [Image.open(uploaded_file) for uploaded_file in uploaded_files]
+    st.image(images, caption=[f"🖼️ {uploaded_file.name}" for uploaded_file in uploaded_files], use_container_width=True)
 
     # Centered prediction button
     st.markdown('<div class="button-container">', unsafe_allow_html=True)
     if st.button("🔍 Predict"):
-        prediction = pipeline.predict(image)
-        # Conditional styling for the result box
-        if prediction == "Normal":
-            st.markdown(
-                f"<div class='result-box'>🌟 <b>Prediction:</b> {prediction} - No signs of disease detected. 🌟</div>",
-                unsafe_allow_html=True
-            )
-        else:
-            st.markdown(
-                f"<div class='result-box disease'>⚠️ <b>Prediction:</b> {prediction} - Consult a doctor immediately for further diagnosis. ⚠️</div>",
-                unsafe_allow_html=True
-            )
-    st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+        predictions, latency = pipeline.predict(images)
+        st.caption(f"⏱️ Inference latency: {latency * 1000:.1f} ms for {len(images)} image(s) "
+                   f"({latency * 1000 / len(images):.1f} ms per image)")
+        for uploaded_file, prediction in zip(uploaded_files, predictions):
+            # Conditional styling for the result box
+            if prediction == "Normal":
+                st.markdown(
+                    f"<div class='result-box'>🌟 <b>{uploaded_file.name}:</b> {prediction} - No signs of disease detected. 🌟</div>",
+                    unsafe_allow_html=True
+                )
+            else:
+                st.markdown(
+                    f"<div class='result-box disease'>⚠️ <b>{uploaded_file.name}:</b> {prediction} - Consult a doctor immediately for further diagnosis. ⚠️</div>",
+                    unsafe_allow_html=True
+                )
+    st.markdown('</div>', unsafe_allow_html=True)
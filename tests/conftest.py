@@ -0,0 +1,95 @@
+# Shared fixtures for the test suite
+import dataclasses
+import numpy as np
+import pytest
+from PIL import Image
+
+# Input size of the tiny models trained by the tests
+IMAGE_SIZE = [24, 24, 3]
+
+
+def write_images(root, class_names=("Normal", "Tumor"), per_class: int = 4, seed: int = 0,
+                 separable: bool = False):
+    """
+    Write small random JPEGs in one sub-directory per class, in sizes and modes that
+    exercise resizing and RGB conversion. With `separable`, every class has its own
+    brightness range so a model can learn to tell them apart. Returns the root directory.
+    """
+    rng = np.random.default_rng(seed)
+    sizes = [(48, 40), (32, 32), (20, 36), (64, 50)]
+    for class_index, class_name in enumerate(class_names):
+        class_dir = root / class_name
+        class_dir.mkdir(parents=True, exist_ok=True)
+        low, high = (0, 256)
+        if separable:
+            span = 256 // len(class_names)
+            low, high = class_index * span, (class_index + 1) * span
+        for index in range(per_class):
+            width, height = sizes[index % len(sizes)]
+            pixels = rng.integers(low, high, size=(height, width, 3), dtype=np.uint8)
+            image = Image.fromarray(pixels)
+            # Every other image is grayscale, as some CT exports are
+            if index % 2:
+                image = image.convert("L")
+            image.save(class_dir / f"{class_name.lower()}_{index}.jpg", quality=90)
+    return root
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    # Two classes of four JPEGs each
+    return write_images(tmp_path / "images")
+
+
+def training_config(tmp_path, **overrides):
+    """
+    A TrainingConfig for a small one-process training run in `tmp_path`, with a tiny
+    model standing in for the prepared base model and the optional features off.
+    """
+    import tensorflow as tf
+    from kidney_disease_classifier.entity.config_entity import TrainingConfig
+
+    base_model_path = tmp_path / "base_model.h5"
+    if not base_model_path.exists():
+        # Seeded, so every run starts from the same weights
+        tf.keras.utils.set_random_seed(0)
+        model = tf.keras.Sequential([
+            tf.keras.Input(shape=IMAGE_SIZE),
+            tf.keras.layers.Conv2D(4, 3, activation="relu"),
+            tf.keras.layers.GlobalAveragePooling2D(),
+            tf.keras.layers.Dense(2, activation="softmax"),
+        ])
+        model.save(base_model_path)
+    images = tmp_path / "images"
+    if not images.exists():
+        write_images(images, per_class=5)
+    config = TrainingConfig(
+        root_dir=tmp_path / "training",
+        trained_model_path=tmp_path / "training" / "model.h5",
+        updated_base_model_path=base_model_path,
+        training_data=images,
+        packed_data=tmp_path / "packed",
+        feature_cache_dir=tmp_path / "features",
+        checkpoint_dir=tmp_path / "training" / "checkpoints",
+        telemetry_path=tmp_path / "training" / "telemetry.jsonl",
+        mlflow_uri="",
+        mlflow_flush_timeout=5,
+        params_epochs=1,
+        params_batch_size=4,
+        params_learning_rate=0.001,
+        params_is_augmentation=False,
+        params_augmentation={},
+        params_image_size=IMAGE_SIZE,
+        params_training_mode="full",
+        params_input_pipeline="tf_data",
+        params_data_cache="",
+        params_performance={"MIXED_PRECISION": None, "JIT_COMPILE": False, "STEPS_PER_EXECUTION": 1},
+        params_distribution={"STRATEGY": None, "COMMUNICATION": "auto"},
+        params_checkpointing={"RESUME": True, "MONITOR": "val_loss"},
+        params_early_stopping={"PATIENCE": None, "MIN_DELTA": 0.001},
+        params_reduce_lr={"PATIENCE": None, "FACTOR": 0.2, "MIN_LR": 1.0e-6},
+        params_telemetry={"ENABLED": False, "STEP_INTERVAL": 0, "MLFLOW": False},
+    )
+    config = dataclasses.replace(config, **overrides)
+    config.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    return config
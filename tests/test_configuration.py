@@ -0,0 +1,67 @@
+# Configuration overrides: --set values reach the runtime section and the process environment
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import yaml
+
+from kidney_disease_classifier.config.configuration import load_configuration
+from kidney_disease_classifier.constants import CONFIG_FILE_PATH, PARAMS_FILE_PATH, OVERRIDES_ENV_VAR
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+RUNTIME_OVERRIDES = ["config.runtime.intra_op_threads=3", "config.runtime.inter_op_threads=2",
+                     "config.runtime.onednn=false"]
+
+# The start of main.py: set the --set overrides, configure the process, then build a configuration
+ENTRY_POINT = """
+import json, os, sys
+from kidney_disease_classifier.config.configuration import ConfigurationManager, set_overrides, configure_process
+set_overrides({overrides!r})
+configure_process()
+runtime = ConfigurationManager().config.runtime
+print(json.dumps({{
+    "runtime": dict(runtime),
+    "env": {{name: os.environ.get(name) for name in
+             ("OMP_NUM_THREADS", "TF_ENABLE_ONEDNN_OPTS", "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS")}},
+    "tensorflow_imported": "tensorflow" in sys.modules,
+}}))
+"""
+
+
+def _copy_configuration(tmp_path):
+    # Run against copies of the YAML files so the repository's artifacts are left alone; the
+    # runtime section sets other values than the overrides, so reading it too early shows up
+    (tmp_path / CONFIG_FILE_PATH).parent.mkdir(parents=True)
+    config = yaml.safe_load((REPO_ROOT / CONFIG_FILE_PATH).read_text())
+    config["runtime"].update(intra_op_threads=8, inter_op_threads=4, onednn=True)
+    (tmp_path / CONFIG_FILE_PATH).write_text(yaml.safe_dump(config))
+    shutil.copy(REPO_ROOT / PARAMS_FILE_PATH, tmp_path / PARAMS_FILE_PATH)
+
+
+def test_overrides_reach_the_runtime_section(monkeypatch):
+    monkeypatch.setenv(OVERRIDES_ENV_VAR, ";".join(RUNTIME_OVERRIDES))
+    _, config, _ = load_configuration(REPO_ROOT / CONFIG_FILE_PATH, REPO_ROOT / PARAMS_FILE_PATH)
+    assert config.runtime.intra_op_threads == 3
+    assert config.runtime.inter_op_threads == 2
+    assert config.runtime.onednn is False
+
+
+def test_entry_point_exports_the_overridden_runtime(tmp_path):
+    _copy_configuration(tmp_path)
+    env = {name: value for name, value in os.environ.items()
+           if name not in ("OMP_NUM_THREADS", "TF_ENABLE_ONEDNN_OPTS", "TF_NUM_INTRAOP_THREADS",
+                           "TF_NUM_INTEROP_THREADS", OVERRIDES_ENV_VAR)}
+    process = subprocess.run([sys.executable, "-c", ENTRY_POINT.format(overrides=RUNTIME_OVERRIDES)],
+                             cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+    report = json.loads(process.stdout.splitlines()[-1])
+
+    assert report["runtime"]["intra_op_threads"] == 3
+    # The environment TensorFlow reads when it is imported comes from the overridden values,
+    # not from the files, and nothing imported TensorFlow before they were set
+    assert report["env"] == {"OMP_NUM_THREADS": "3", "TF_ENABLE_ONEDNN_OPTS": "0",
+                             "TF_NUM_INTRAOP_THREADS": "3", "TF_NUM_INTEROP_THREADS": "2"}
+    assert not report["tensorflow_imported"]
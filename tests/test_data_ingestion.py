@@ -0,0 +1,144 @@
+# Dataset download and extraction
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from kidney_disease_classifier.components import data_ingestion
+from kidney_disease_classifier.components.data_ingestion import DataIngestion
+from kidney_disease_classifier.entity.config_entity import DataIngestionConfig
+
+
+def _archive(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """
+    Serves one payload with HTTP Range support. The first full (non-range) request
+    is cut off halfway to simulate a dropped connection.
+    """
+
+    def __init__(self, payload, requests, *args, **kwargs):
+        self.payload = payload
+        self.requests = requests
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        self.requests.append(range_header)
+        start = int(range_header[len("bytes="):].rstrip("-")) if range_header else 0
+        if start >= len(self.payload):
+            self.send_response(416)
+            self.end_headers()
+            return
+        body = self.payload[start:]
+        self.send_response(206 if range_header else 200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(body)))
+        if range_header:
+            self.send_header("Content-Range", f"bytes {start}-{len(self.payload) - 1}/{len(self.payload)}")
+        self.end_headers()
+        if not range_header and len(self.requests) == 1:
+            # Drop the connection after half of the body
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    # Random bytes do not compress, so the archive spans many download chunks
+    payload = _archive({f"kidney-ct-scan-image/Normal/{index}.jpg": os.urandom(50_000) for index in range(8)})
+    requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(RangeHandler, payload, requests))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/data.zip", payload, requests
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _ingestion(tmp_path, url="", sha256=None) -> DataIngestion:
+    return DataIngestion(DataIngestionConfig(
+        root_dir=tmp_path, source_URL=url, local_data_file=str(tmp_path / "data.zip"), sha256=sha256,
+        chunk_size=4096, unzip_dir=str(tmp_path / "extracted"), data_dir=tmp_path / "extracted",
+        packed_dir=tmp_path / "packed", params_image_size=[8, 8, 3]
+    ))
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # Retry immediately instead of waiting between attempts
+    monkeypatch.setattr(data_ingestion.time, "sleep", lambda seconds: None)
+
+
+def test_interrupted_download_resumes_from_part_file(server, tmp_path):
+    url, payload, requests = server
+    ingestion = _ingestion(tmp_path, url, sha256=hashlib.sha256(payload).hexdigest())
+
+    path = ingestion.download_file()
+
+    with open(path, "rb") as f:
+        assert f.read() == payload
+    assert not (tmp_path / "data.zip.part").exists()
+    # The second request asked only for the bytes that were missing
+    assert requests[0] is None
+    assert 0 < int(requests[1][len("bytes="):].rstrip("-")) <= len(payload) // 2
+
+    # A valid archive on disk is not downloaded again
+    ingestion.download_file()
+    assert len(requests) == 2
+
+
+def test_checksum_mismatch_raises_and_discards_the_download(server, tmp_path):
+    url, _, _ = server
+    ingestion = _ingestion(tmp_path, url, sha256="0" * 64)
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        ingestion.download_file()
+    assert not (tmp_path / "data.zip").exists()
+    assert not (tmp_path / "data.zip.part").exists()
+
+
+def test_parallel_extraction_of_a_multi_directory_archive(tmp_path):
+    # Many members per class directory, so several workers write into every directory at once
+    members = {f"kidney-ct-scan-image/{class_name}/{index}.jpg": os.urandom(2_000)
+               for class_name in ("Cyst", "Normal", "Stone", "Tumor") for index in range(40)}
+    members["kidney-ct-scan-image/Tumor/nested/extra.jpg"] = os.urandom(100)
+    ingestion = _ingestion(tmp_path)
+    (tmp_path / "data.zip").write_bytes(_archive(members))
+
+    ingestion.extract_zip_file(max_workers=8)
+
+    for name, data in members.items():
+        assert (tmp_path / "extracted" / name).read_bytes() == data
+
+    # Unchanged members are not extracted again
+    (tmp_path / "extracted" / "kidney-ct-scan-image/Cyst/0.jpg").write_bytes(b"")
+    ingestion.extract_zip_file(max_workers=8)
+    assert (tmp_path / "extracted" / "kidney-ct-scan-image/Cyst/0.jpg").read_bytes() == \
+        members["kidney-ct-scan-image/Cyst/0.jpg"]
+
+
+def test_extraction_rejects_members_outside_the_target_directory(tmp_path):
+    ingestion = _ingestion(tmp_path)
+    (tmp_path / "data.zip").write_bytes(_archive({"../escaped.txt": b"x"}))
+
+    with pytest.raises(ValueError, match="outside"):
+        ingestion.extract_zip_file(max_workers=2)
+    assert not (tmp_path / "escaped.txt").exists()
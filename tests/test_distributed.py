@@ -0,0 +1,65 @@
+# Multi-worker training: the custom strategy.run loop learns and exports the best epoch
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+
+from conftest import training_config, write_images
+from kidney_disease_classifier.utils.distributed import launch_local_workers
+
+# Run by every worker: MultiWorkerMirroredStrategy must be created before any other
+# TensorFlow op, so each worker is a fresh process that trains and reports its history
+WORKER = """
+import json, os, sys
+sys.path.insert(0, {tests!r})
+from pathlib import Path
+from conftest import training_config
+from kidney_disease_classifier.components.model_trainer import Training
+
+tmp_path = Path({tmp_path!r})
+config = training_config(
+    tmp_path,
+    params_epochs=8,
+    params_learning_rate=0.01,
+    params_distribution={{"STRATEGY": "multi_worker", "COMMUNICATION": "ring"}},
+)
+training = Training(config)
+training.get_base_model()
+training.train_valid_generator()
+training.train()
+index = json.loads(os.environ["TF_CONFIG"])["task"]["index"]
+with open(tmp_path / f"worker_{{index}}.json", "w") as f:
+    json.dump({{"replicas": training.num_replicas, "history": training.history.history}}, f)
+"""
+
+
+def test_two_workers_learn_and_export_the_best_epoch(tmp_path):
+    # Dark and bright images, so the loss must go down within a few epochs
+    write_images(tmp_path / "images", per_class=16, separable=True)
+    # Save the base model once, before the workers start
+    training_config(tmp_path)
+    code = WORKER.format(tests=str(Path(__file__).parent), tmp_path=str(tmp_path))
+    launch_local_workers(2, [sys.executable, "-c", code], threads_per_worker=1)
+
+    reports = [json.loads((tmp_path / f"worker_{index}.json").read_text()) for index in range(2)]
+    for report in reports:
+        assert report["replicas"] == 2
+        assert report["history"]["loss"][-1] < report["history"]["loss"][0]
+    # The replicas stay in sync, so both workers see the same reduced metrics
+    for metric in ("loss", "accuracy", "val_loss", "val_accuracy"):
+        assert reports[0]["history"][metric] == reports[1]["history"][metric]
+
+    # Only the chief saves the model, and it holds the weights of the best validation epoch
+    checkpoints = tmp_path / "training" / "checkpoints"
+    val_loss = reports[0]["history"]["val_loss"]
+    best = json.loads((checkpoints / "worker_0" / "best.json").read_text())
+    assert best["value"] == min(val_loss)
+    assert best["epoch"] == int(np.argmin(val_loss)) + 1
+
+    model = tf.keras.models.load_model(tmp_path / "training" / "model.h5")
+    best_model = tf.keras.models.load_model(tmp_path / "base_model.h5")
+    best_model.load_weights(checkpoints / "worker_0" / "best.weights.h5")
+    for exported, stored in zip(model.get_weights(), best_model.get_weights()):
+        np.testing.assert_array_equal(exported, stored)
@@ -0,0 +1,39 @@
+# Evaluation class names come from the same source as the validation data
+import json
+
+from conftest import write_images
+from kidney_disease_classifier.components import model_evaluation_with_mlflow
+from kidney_disease_classifier.components.model_evaluation_with_mlflow import Evaluation
+from kidney_disease_classifier.entity.config_entity import EvaluationConfig
+
+
+def _evaluation(tmp_path, input_pipeline: str) -> Evaluation:
+    return Evaluation(EvaluationConfig(
+        path_of_model=tmp_path / "model.h5",
+        training_data=tmp_path / "images",
+        packed_data=tmp_path / "packed",
+        all_params={},
+        mlflow_uri="",
+        mlflow_flush_timeout=5,
+        params_image_size=[24, 24, 3],
+        params_batch_size=4,
+        params_input_pipeline=input_pipeline,
+        params_positive_class="Tumor",
+    ))
+
+
+def test_packed_pipeline_reads_the_class_names_from_the_index(tmp_path, monkeypatch):
+    (tmp_path / "packed").mkdir()
+    (tmp_path / "packed" / "index.json").write_text(json.dumps({"class_names": ["Normal", "Tumor"]}))
+
+    # The raw image tree is neither scanned nor needed
+    def fail(*args, **kwargs):
+        raise AssertionError("the image tree was scanned")
+    monkeypatch.setattr(model_evaluation_with_mlflow, "list_image_files", fail)
+    assert _evaluation(tmp_path, "packed").class_names() == ["Normal", "Tumor"]
+
+
+def test_image_pipelines_use_the_sorted_class_folders(tmp_path):
+    write_images(tmp_path / "images", class_names=("Tumor", "Normal"), per_class=1)
+    for input_pipeline in ("generator", "tf_data"):
+        assert _evaluation(tmp_path, input_pipeline).class_names() == ["Normal", "Tumor"]
@@ -0,0 +1,46 @@
+# Feature store consistency across interrupted runs
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from kidney_disease_classifier.components.data_pipeline import list_image_files
+from kidney_disease_classifier.components.feature_cache import FeatureCache
+from kidney_disease_classifier.utils.preprocessing import preprocess_batch
+
+IMAGE_SIZE = [16, 16, 3]
+
+
+@pytest.fixture
+def backbone():
+    # Tiny deterministic convolutional backbone
+    tf.keras.utils.set_random_seed(0)
+    inputs = tf.keras.Input(IMAGE_SIZE)
+    features = tf.keras.layers.Conv2D(4, 3, activation="relu")(inputs)
+    return tf.keras.Model(inputs, tf.keras.layers.GlobalAveragePooling2D()(features))
+
+
+def test_interrupted_extraction_does_not_shift_rows(image_dir, tmp_path, backbone, monkeypatch):
+    filepaths, _, _ = list_image_files(image_dir)
+    first, second = filepaths[:4], filepaths[4:]
+
+    # Crash after the features were appended but before the index was saved
+    cache = FeatureCache(tmp_path / "cache", backbone, IMAGE_SIZE)
+    def crash():
+        raise KeyboardInterrupt
+    monkeypatch.setattr(cache, "_save_index", crash)
+    with pytest.raises(KeyboardInterrupt):
+        cache.get_features(first, batch_size=2)
+    monkeypatch.undo()
+    assert cache.features_path.stat().st_size > 0
+    assert not cache.index_path.exists()
+
+    # A new run must map the new images to their own rows, not to the orphaned ones
+    cache = FeatureCache(tmp_path / "cache", backbone, IMAGE_SIZE)
+    features = cache.get_features(second, batch_size=2)
+    expected = backbone.predict_on_batch(preprocess_batch(second, IMAGE_SIZE))
+    np.testing.assert_allclose(features, expected, rtol=1e-5, atol=1e-6)
+    assert cache.features_path.stat().st_size == len(second) * cache.feature_dim * 4
+
+    # Later runs read the same features back from the store
+    reopened = FeatureCache(tmp_path / "cache", backbone, IMAGE_SIZE)
+    np.testing.assert_allclose(reopened.get_features(second), expected, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,65 @@
+# Background MLflow logging: records reach a file: store, and close() is bounded by its timeout
+import json
+import socket
+import time
+
+from kidney_disease_classifier.utils.mlflow_logger import AsyncMlflowLogger, PENDING_SYNC_FILE, _mlflow_client
+
+
+def _only_run(tracking_uri: str, experiment_name: str):
+    client = _mlflow_client(tracking_uri)
+    experiment = client.get_experiment_by_name(experiment_name)
+    runs = client.search_runs([experiment.experiment_id])
+    assert len(runs) == 1
+    return client, runs[0]
+
+
+def test_records_arrive_and_close_drains_the_queue(tmp_path):
+    tracking_uri = f"file:{tmp_path / 'mlruns'}"
+    mlflow_logger = AsyncMlflowLogger(tracking_uri, "tests", run_name="records", fallback_uri=None)
+    mlflow_logger.log_params({"EPOCHS": 3, "IMAGE_SIZE": [24, 24, 3]})
+    mlflow_logger.set_tags({"stage": "test"})
+    for step in range(3):
+        mlflow_logger.log_metrics({"loss": 1.0 / (step + 1)}, step=step)
+    mlflow_logger.log_dict({"accuracy": 0.9}, "scores.json")
+    mlflow_logger.close(timeout=30)
+
+    # close() returns once the worker has applied every operation, and the worker then stops
+    mlflow_logger._worker.join(timeout=5)
+    assert not mlflow_logger._worker.is_alive()
+    assert not mlflow_logger.fell_back
+
+    client, run = _only_run(tracking_uri, "tests")
+    assert run.info.run_id == mlflow_logger.run_id
+    assert run.info.status == "FINISHED"
+    assert run.data.params == {"EPOCHS": "3", "IMAGE_SIZE": "[24, 24, 3]"}
+    assert run.data.tags["stage"] == "test"
+    history = client.get_metric_history(run.info.run_id, "loss")
+    assert [(metric.step, metric.value) for metric in history] == [(0, 1.0), (1, 0.5), (2, 1.0 / 3)]
+    assert [artifact.path for artifact in client.list_artifacts(run.info.run_id)] == ["scores.json"]
+
+
+def test_close_falls_back_after_the_flush_timeout(tmp_path):
+    # A server that accepts connections but never answers keeps the worker waiting
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    tracking_uri = f"http://127.0.0.1:{server.getsockname()[1]}"
+    fallback_uri = f"file:{tmp_path / 'mlruns'}"
+    try:
+        mlflow_logger = AsyncMlflowLogger(tracking_uri, "tests", run_name="slow", fallback_uri=fallback_uri,
+                                          probe_timeout=30, flush_timeout=0.5)
+        mlflow_logger.log_params({"EPOCHS": 3})
+        start = time.monotonic()
+        mlflow_logger.close()
+        assert time.monotonic() - start < 10
+    finally:
+        server.close()
+
+    # The whole run was written to the local store and recorded for a later sync
+    assert mlflow_logger.fell_back
+    _, run = _only_run(fallback_uri, "tests")
+    assert run.data.params == {"EPOCHS": "3"}
+    assert run.info.status == "FINISHED"
+    pending = json.loads((tmp_path / "mlruns" / PENDING_SYNC_FILE).read_text())
+    assert [entry["local_run_id"] for entry in pending] == [run.info.run_id]
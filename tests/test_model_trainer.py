@@ -0,0 +1,69 @@
+# Checkpointing of the training component: resumed runs keep their best epoch, unrelated runs start clean
+import dataclasses
+import json
+
+import numpy as np
+import pytest
+
+from conftest import training_config
+from kidney_disease_classifier.components.callbacks import BestWeightsCheckpoint
+from kidney_disease_classifier.components.model_trainer import Training
+from kidney_disease_classifier.entity.config_entity import TrainingConfig
+
+
+def _train(config: TrainingConfig) -> Training:
+    training = Training(config)
+    training.get_base_model()
+    training.train_valid_generator()
+    training.train()
+    return training
+
+
+def _store_best(config: TrainingConfig, value: float) -> list:
+    # Pretend an earlier run of this configuration reached `value` and saved its weights
+    training = _train(config)
+    best_weights = [weights.copy() for weights in training.model.get_weights()]
+    with open(config.checkpoint_dir / "best.json", "w") as f:
+        json.dump({"monitor": "val_loss", "value": value, "epoch": 1}, f)
+    return best_weights
+
+
+def test_checkpoint_starts_from_the_stored_best_value(tmp_path):
+    best_value_path = tmp_path / "best.json"
+    with open(best_value_path, "w") as f:
+        json.dump({"monitor": "val_loss", "value": 0.25}, f)
+
+    checkpoint = BestWeightsCheckpoint(tmp_path / "best.weights.h5", best_value_path, "val_loss")
+    assert checkpoint.best == 0.25
+
+    # A value recorded for another metric is ignored
+    checkpoint = BestWeightsCheckpoint(tmp_path / "best.weights.h5", best_value_path, "val_accuracy")
+    assert checkpoint.best is None
+
+
+def test_resumed_run_keeps_the_better_best_weights(tmp_path):
+    config = training_config(tmp_path)
+    best_weights = _store_best(config, value=0.0)
+
+    # No epoch can beat a loss of zero, so the stored weights must survive the resumed run
+    training = _train(config)
+    for exported, stored in zip(training.model.get_weights(), best_weights):
+        np.testing.assert_array_equal(exported, stored)
+    with open(config.checkpoint_dir / "best.json") as f:
+        assert json.load(f)["value"] == 0.0
+
+
+@pytest.mark.parametrize("change", [
+    {"params_checkpointing": {"RESUME": False, "MONITOR": "val_loss"}},
+    {"params_learning_rate": 0.01},
+])
+def test_stale_checkpoints_are_cleared(tmp_path, change):
+    config = training_config(tmp_path)
+    _store_best(config, value=0.0)
+    config = dataclasses.replace(config, **change)
+    _train(config)
+
+    # The new run selects its own best epoch instead of loading the earlier run's weights
+    with open(config.checkpoint_dir / "best.json") as f:
+        assert json.load(f)["value"] > 0.0
+
@@ -0,0 +1,13 @@
+# Label mapping shared by training and serving
+from kidney_disease_classifier.components.data_pipeline import list_image_files
+from kidney_disease_classifier.constants import CLASS_NAMES
+from kidney_disease_classifier.pipeline.stage_5_prediction import PredictionPipeline
+
+from conftest import write_images
+
+
+def test_serving_labels_follow_the_training_class_order(tmp_path):
+    # Training numbers the classes by their sorted folder names
+    _, _, class_names = list_image_files(write_images(tmp_path / "images", class_names=CLASS_NAMES, per_class=1))
+    assert class_names == CLASS_NAMES
+    assert [PredictionPipeline._label(index) for index in range(len(CLASS_NAMES))] == class_names
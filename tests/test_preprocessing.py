@@ -0,0 +1,59 @@
+# Parity of the training, evaluation and serving preprocessing paths
+import numpy as np
+import tensorflow as tf
+
+from kidney_disease_classifier.components.data_ingestion import DataIngestion
+from kidney_disease_classifier.components.data_pipeline import (build_image_dataset, build_packed_dataset,
+                                                                list_image_files)
+from kidney_disease_classifier.entity.config_entity import DataIngestionConfig
+from kidney_disease_classifier.utils.preprocessing import INTERPOLATION, RESCALE_FACTOR, preprocess_batch
+
+IMAGE_SIZE = [24, 24, 3]
+
+# Every path decodes with PIL and rescales with the same float32 multiply, so the tensors
+# must agree to float32 rounding
+TOLERANCE = 1e-6
+
+
+def _generator_batch(image_dir, num_images):
+    # The ImageDataGenerator configuration of the Training and Evaluation components
+    generator = tf.keras.preprocessing.image.ImageDataGenerator(rescale=RESCALE_FACTOR).flow_from_directory(
+        directory=str(image_dir),
+        shuffle=False,
+        class_mode="sparse",
+        target_size=IMAGE_SIZE[:-1],
+        batch_size=num_images,
+        interpolation=INTERPOLATION
+    )
+    images, labels = generator[0]
+    return images, labels.astype(np.int32), generator.filepaths
+
+
+def test_generator_tf_data_packed_and_serving_agree(image_dir, tmp_path):
+    filepaths, labels, class_names = list_image_files(image_dir)
+    generator_images, generator_labels, generator_files = _generator_batch(image_dir, len(filepaths))
+
+    # list_image_files orders and labels files exactly like flow_from_directory
+    assert [str(path) for path in generator_files] == filepaths
+    np.testing.assert_array_equal(generator_labels, labels)
+
+    tf_data_images, tf_data_labels = next(iter(
+        build_image_dataset(filepaths, labels, IMAGE_SIZE, batch_size=len(filepaths))))
+
+    ingestion = DataIngestion(DataIngestionConfig(
+        root_dir=tmp_path, source_URL="", local_data_file=tmp_path / "data.zip", sha256=None,
+        chunk_size=1024, unzip_dir=tmp_path, data_dir=image_dir, packed_dir=tmp_path / "packed",
+        params_image_size=IMAGE_SIZE
+    ))
+    ingestion.pack_dataset()
+    packed_images, packed_labels = next(iter(
+        build_packed_dataset(tmp_path / "packed", IMAGE_SIZE, batch_size=len(filepaths))))
+
+    serving_images = preprocess_batch(filepaths, IMAGE_SIZE)
+
+    assert generator_images.shape == (len(filepaths), *IMAGE_SIZE)
+    for images in (tf_data_images.numpy(), packed_images.numpy(), serving_images):
+        assert images.dtype == np.float32
+        np.testing.assert_allclose(images, generator_images, rtol=0, atol=TOLERANCE)
+    np.testing.assert_array_equal(tf_data_labels.numpy(), labels)
+    np.testing.assert_array_equal(packed_labels.numpy(), labels)